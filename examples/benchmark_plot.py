@@ -0,0 +1,52 @@
+import sys
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from tlars import TLARS
+
+# Render time of TLARS.plot() versus the number of predictors, compared with drawing one
+# Line2D per predictor (the previous implementation).
+# Usage: python benchmark_plot.py [n] [max_p]
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+max_p = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+T_stop = 5
+
+
+def plot_one_line_per_predictor(model):
+    """Draw the solution path with one Line2D per predictor and one axvline per action."""
+    beta_path = np.array(model.coef_path_)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for i in range(beta_path.shape[1]):
+        ax.plot(beta_path[:, i], color="black")
+    for action_pos in range(1, len(model.actions_) + 1):
+        ax.axvline(x=action_pos, color='gray', linestyle=':', alpha=0.5)
+    return fig
+
+
+def render_time(make_figure):
+    """Time creating and rendering a figure."""
+    start_time = time.perf_counter()
+    fig = make_figure()
+    fig.canvas.draw()
+    elapsed = time.perf_counter() - start_time
+    plt.close(fig)
+    return elapsed
+
+
+rng = np.random.default_rng(42)
+print(f"{'columns':>8} {'steps':>6} {'plot() [s]':>11} {'one Line2D per predictor [s]':>30}")
+p = 1000
+while p <= max_p:
+    XD = rng.standard_normal((n, 2 * p))
+    y = XD[:, :5] @ np.full(5, 2.0) + rng.standard_normal(n)
+    model = TLARS(XD, y, num_dummies=p)
+    model.fit(T_stop=T_stop, early_stop=True)
+
+    fast = render_time(lambda: model.plot()[0])
+    # The per-predictor baseline becomes very slow, so it is only timed for moderate p
+    slow = render_time(lambda: plot_one_line_per_predictor(model)) if p <= 5000 else float('nan')
+
+    print(f"{2 * p:8d} {len(model.rss_):6d} {fast:11.3f} {slow:30.3f}")
+    p = {1000: 5000, 5000: 20000}.get(p, 2 * p)
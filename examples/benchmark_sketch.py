@@ -0,0 +1,36 @@
+import sys
+import time
+import numpy as np
+from tlars import TLARS
+
+# Exact T-LARS versus the row-sketched approximate correlation mode on a very tall predictor matrix.
+# Usage: python benchmark_sketch.py [n] [p] [sketch_rows]
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+p = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+sketch_rows = int(sys.argv[3]) if len(sys.argv) > 3 else 20_000
+num_dummies = p
+T_stop = 1
+
+rng = np.random.default_rng(42)
+XD = rng.standard_normal((n, p + num_dummies))
+beta = np.zeros(p)
+beta[:20] = rng.uniform(1, 2, 20)
+y = XD[:, :p] @ beta + rng.standard_normal(n)
+print(f"Data dimensions: n={n}, p={p + num_dummies}, sketch rows={sketch_rows}")
+
+exact = TLARS(XD, y, num_dummies=num_dummies)
+start_time = time.perf_counter()
+exact.fit(T_stop=T_stop)
+exact_time = time.perf_counter() - start_time
+print(f"exact:   {exact_time:8.3f} s  ({len(exact.actions_)} steps)")
+
+for confidence in (6.0, 4.0, 3.0):
+    model = TLARS(XD, y, num_dummies=num_dummies)
+    start_time = time.perf_counter()
+    model.set_sketch(sketch_rows, confidence=confidence)
+    sketch_time = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    model.fit(T_stop=T_stop)
+    elapsed = time.perf_counter() - start_time
+    print(f"sketch (confidence={confidence}): {elapsed:8.3f} s + {sketch_time:.3f} s for the sketch, "
+          f"same path: {model.actions_ == exact.actions_}, {model.sketch_stats()}")
@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+import numpy as np
+from tlars import TLARS
+
+# Scaling of a single T-LARS fit on a very wide predictor matrix with the number of threads.
+# Usage: python benchmark_threads.py [n] [p] [max_threads]
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+p = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+max_threads = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+num_dummies = p // 2
+T_stop = 5
+
+rng = np.random.default_rng(42)
+XD = rng.standard_normal((n, p))
+y = XD[:, :5] @ np.full(5, 2.0) + rng.standard_normal(n)
+
+print(f"Data dimensions: n={n}, p={p}, CPUs={os.cpu_count()}")
+print("Pin BLAS to one thread (e.g., OPENBLAS_NUM_THREADS=1) to measure the scaling of tlars alone.")
+
+baseline = None
+reference = None
+thread_counts = [t for t in (1, 2, 4, 8, 16, 32, 64) if t <= max_threads]
+for n_threads in thread_counts:
+    model = TLARS(XD, y, num_dummies=num_dummies, n_threads=n_threads)
+    start_time = time.perf_counter()
+    model.fit(T_stop=T_stop, early_stop=True)
+    elapsed = time.perf_counter() - start_time
+
+    if baseline is None:
+        baseline = elapsed
+        reference = model.actions_
+    assert model.actions_ == reference, "The solution path depends on the number of threads"
+
+    print(f"n_threads={n_threads:3d}: {elapsed:8.3f} s  (speedup {baseline / elapsed:5.2f}x, "
+          f"{len(model.actions_)} steps)")
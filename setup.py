@@ -160,7 +160,7 @@ if platform.system() == 'Darwin' and os.environ.get('CONDA_BUILD', '') != '1':
 ext_modules = [
     Extension(
         'tlars.tlars_cpp',
-        ['src/tlars_cpp_pybind.cpp', 'src/tlars_cpp.cpp'],
+        ['src/tlars_cpp_pybind.cpp', 'src/tlars_cpp.cpp', 'src/tlars_batch.cpp', 'src/tlars_design.cpp', 'src/tlars_threads.cpp'],
         include_dirs=include_dirs,
         library_dirs=library_dirs,
         libraries=libraries,
@@ -0,0 +1,213 @@
+//  tlars_batch.cpp
+
+#include "tlars_batch.h"
+#include <algorithm>
+#include <atomic>
+#include <exception>
+#include <functional>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+
+
+static void parallel_tasks(int num_tasks, int n_threads, const std::function<void(int, int)> &task);
+
+/** Runs T-LARS on many row subsamples of a shared predictor matrix and counts the selected predictors
+ *
+ * Every subsample is given by a block of the compressed arrays rows/row_weights: the fit with index b uses the rows
+ * rows(offsets(b)), ..., rows(offsets(b+1)-1) of X with the corresponding multiplicities. The subsamples are never
+ * copied out of X and every fit standardizes its rows on the fly. The fits are distributed over n_threads threads
+ * and only the summed selection counts are returned.
+ *
+ * @param X Predictor matrix with all rows (shared read-only by all fits).
+ * @param y Response vector with all rows.
+ * @param rows Concatenated row indices of all subsamples.
+ * @param row_weights Concatenated multiplicities of the rows of all subsamples.
+ * @param offsets Start of every subsample in rows/row_weights (number of subsamples + 1 entries).
+ * @param T_stop Number of included dummies after which the forward selection processes are stopped.
+ * @param early_stop Logical. If TRUE, then the forward selection processes are stopped after T_stop dummies have been included.
+ * @param intercept Logical. If TRUE an intercept is included.
+ * @param standardize Logical. If TRUE the predictors are standardized and the response is centered.
+ * @param num_dummies Number of dummies that are appended to the predictor matrix.
+ * @param type Type of used algorithm (currently possible choices: 'lar' or 'lasso').
+ * @param n_threads Number of threads.
+ *
+ * @return Number of subsamples in which each predictor is active when the forward selection process terminates.
+ */
+arma::uvec subsample_selection_counts(std::shared_ptr<const arma::mat> X, arma::vec y, arma::uvec rows, arma::vec row_weights, arma::uvec offsets,
+                                      int T_stop, bool early_stop, bool intercept, bool standardize, int num_dummies, std::string type, int n_threads)
+{
+    int num_subsamples = (int) offsets.n_elem - 1;
+    int p = X->n_cols;
+    n_threads = std::max(1, std::min(n_threads, num_subsamples));
+
+    std::vector<arma::uvec> thread_counts(n_threads, arma::zeros<arma::uvec>(p));
+    parallel_tasks(num_subsamples, n_threads, [&](int thread_index, int b)
+    {
+        arma::uvec sub_rows = rows.subvec(offsets(b), offsets(b+1)-1);
+        arma::vec sub_weights = row_weights.subvec(offsets(b), offsets(b+1)-1);
+        tlars_cpp model(X, y, sub_rows, sub_weights, false, intercept, standardize, num_dummies, type);
+        model.set_history("last");
+        model.execute_lars_step(T_stop, early_stop);
+        std::list<int> active_pred = model.get_active_pred();
+        for (std::list<int>::iterator it = active_pred.begin(); it != active_pred.end(); ++it)
+        {
+            thread_counts[thread_index](*it)++;
+        }
+    });
+
+    arma::uvec counts = arma::zeros<arma::uvec>(p);
+    for (int t = 0; t < n_threads; t++)
+    {
+        counts += thread_counts[t];
+    }
+    return counts;
+}
+
+/** Continues many T-LARS experiments until T_stop dummies are included and returns their active sets
+ *
+ * Every experiment is warm-continued from its current state with execute_lars_step(), i.e., the steps of earlier calls
+ * are not recomputed. The experiments are distributed over n_threads threads.
+ *
+ * @param models T-LARS objects of the experiments (all with the same number of original predictors).
+ * @param T_stop Number of included dummies after which the forward selection processes are stopped.
+ * @param n_threads Number of threads.
+ * @param early_stop Logical. If FALSE, the entire solution paths are computed.
+ *
+ * @return Activation snapshot with one row per experiment and one column per original predictor (1 if active).
+ */
+arma::umat continue_experiments(std::vector<tlars_cpp*> models, int T_stop, int n_threads, bool early_stop)
+{
+    int num_models = (int) models.size();
+    int p = num_models > 0 ? (int) models[0]->get_norm_X().n_elem - models[0]->get_num_dummies() : 0;
+    arma::umat snapshot = arma::zeros<arma::umat>(num_models, p);
+    parallel_tasks(num_models, std::max(1, std::min(n_threads, num_models)), [&](int thread_index, int k)
+    {
+        models[k]->execute_lars_step(T_stop, early_stop);
+        std::list<int> active_pred = models[k]->get_active_pred();
+        for (std::list<int>::iterator it = active_pred.begin(); it != active_pred.end(); ++it)
+        {
+            if (*it < p)
+            {
+                snapshot(k, *it) = 1;
+            }
+        }
+    });
+    return snapshot;
+}
+
+/** Attaches a shared block of leading predictors to many restored T-LARS objects
+ *
+ * Every object reads the predictors of the shared block from it and copies its remaining predictors (see
+ * tlars_cpp::set_shared_block()). The copies are distributed over n_threads threads.
+ *
+ * @param models T-LARS objects restored from states without predictor matrix.
+ * @param block Shared predictors.
+ * @param own_data Column-major data of the remaining predictors of every object.
+ * @param n_threads Number of threads.
+ */
+void attach_shared_block(std::vector<tlars_cpp*> models, std::shared_ptr<const arma::mat> block, std::vector<const double*> own_data, int n_threads)
+{
+    int num_models = (int) models.size();
+    parallel_tasks(num_models, std::max(1, std::min(n_threads, num_models)), [&](int thread_index, int k)
+    {
+        models[k]->set_shared_block(block, own_data[k]);
+    });
+}
+
+/** Counts how often every original predictor is active when the T-th dummy enters, for T = 1, ..., T_max
+ *
+ * The actions of every experiment are replayed once, so a single fit up to T_max dummies yields the active sets for
+ * all T. Experiments whose path ends before the T-th dummy enters contribute their final active set.
+ *
+ * @param models T-LARS objects of the experiments (all with the same number of original predictors).
+ * @param T_max Largest number of included dummies.
+ *
+ * @return Matrix with T_max rows and one column per original predictor: number of experiments in which the predictor
+ * is active at termination with T dummies. Dividing by the number of experiments gives the relative occurrences.
+ */
+arma::umat occurrence_counts(std::vector<tlars_cpp*> models, int T_max)
+{
+    int num_models = (int) models.size();
+    int p = num_models > 0 ? (int) models[0]->get_norm_X().n_elem - models[0]->get_num_dummies() : 0;
+    arma::umat counts = arma::zeros<arma::umat>(T_max, p);
+    for (int k = 0; k < num_models; k++)
+    {
+        std::list<int> actions = models[k]->get_actions();
+        arma::uvec active = arma::zeros<arma::uvec>(p);
+        int t = 0;
+        for (std::list<int>::iterator it = actions.begin(); it != actions.end() && t < T_max; ++it)
+        {
+            int index = std::abs(*it) - 1;
+            if (index >= p)
+            {
+                // A dummy entered or left the model
+                if (*it > 0)
+                {
+                    counts.row(t) += active.t();
+                    t++;
+                }
+                continue;
+            }
+            active(index) = *it > 0 ? 1 : 0;
+        }
+        for (; t < T_max; t++)
+        {
+            counts.row(t) += active.t();
+        }
+    }
+    return counts;
+}
+
+/** Runs tasks on a pool of threads
+ *
+ * The tasks are handed out one by one, so tasks of different cost are balanced. The first exception that is thrown
+ * by a task stops the remaining tasks and is rethrown in the calling thread.
+ *
+ * @param num_tasks Number of tasks.
+ * @param n_threads Number of threads.
+ * @param task Function that is called with the index of the thread and the index of the task.
+ */
+static void parallel_tasks(int num_tasks, int n_threads, const std::function<void(int, int)> &task)
+{
+    std::atomic<int> next_task(0);
+    std::exception_ptr error;
+    std::mutex error_mutex;
+
+    auto worker = [&](int thread_index)
+    {
+        int b;
+        while ((b = next_task++) < num_tasks)
+        {
+            try
+            {
+                task(thread_index, b);
+            }
+            catch (...)
+            {
+                std::lock_guard<std::mutex> lock(error_mutex);
+                if (!error)
+                {
+                    error = std::current_exception();
+                }
+                next_task = num_tasks;
+            }
+        }
+    };
+
+    std::vector<std::thread> threads;
+    for (int t = 1; t < n_threads; t++)
+    {
+        threads.emplace_back(worker, t);
+    }
+    worker(0);
+    for (std::thread &thread : threads)
+    {
+        thread.join();
+    }
+    if (error)
+    {
+        std::rethrow_exception(error);
+    }
+}
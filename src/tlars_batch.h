@@ -0,0 +1,23 @@
+// tlars_batch.h
+
+#ifndef tlars_batch_H
+#define tlars_batch_H
+
+#include <memory>
+#include <string>
+#include <vector>
+#include "carma_helper.h"
+#include "tlars_cpp.h"
+
+/**
+ * Functions that run and aggregate many T-LARS fits (e.g., subsamples or T-Rex experiments) in parallel.
+ *
+ */
+
+arma::uvec subsample_selection_counts(std::shared_ptr<const arma::mat> X, arma::vec y, arma::uvec rows, arma::vec row_weights, arma::uvec offsets,
+                                      int T_stop, bool early_stop, bool intercept, bool standardize, int num_dummies, std::string type, int n_threads);
+arma::umat continue_experiments(std::vector<tlars_cpp*> models, int T_stop, int n_threads, bool early_stop = true);
+void attach_shared_block(std::vector<tlars_cpp*> models, std::shared_ptr<const arma::mat> block, std::vector<const double*> own_data, int n_threads);
+arma::umat occurrence_counts(std::vector<tlars_cpp*> models, int T_max);
+
+#endif /* tlars_batch_h */
@@ -2,8 +2,15 @@
 
 #include "tlars_cpp.h"
 #include <limits>
+#include <random>
+#include <cmath>
+#include <stdexcept>
+#include <algorithm>
 #include <iterator>
 #include <iostream>
+#include <exception>
+#include <mutex>
+#include <thread>
 
 
 
@@ -33,6 +40,120 @@ tlars_cpp::tlars_cpp(arma::mat X, arma::vec y, bool verbose, bool intercept, boo
     initialize_values();
 }
 
+/** Constructor for a new tlars_cpp-object from sufficient statistics
+ *
+ * Creates a new object of the class tlars_cpp from the cross-products of the data instead of the data itself.
+ * The LARS recursion only requires inner products between predictors and the response, so the object
+ * only stores the p x p Gram matrix and never holds an n x p predictor matrix.
+ *
+ * @param XtX Uncentered cross-product matrix X'X of the predictors.
+ * @param Xty Uncentered cross-product vector X'y.
+ * @param yty Uncentered sum of squares y'y of the response.
+ * @param n Number of observations.
+ * @param col_sums Column sums of X (only needed if intercept is TRUE).
+ * @param y_sum Sum of the response y (only needed if intercept is TRUE).
+ * @param verbose Logical. If TRUE progress in computations is shown.
+ * @param intercept Logical. If TRUE an intercept is included.
+ * @param standardize Logical. If TRUE the predictors are standardized and the response is centered.
+ * @param num_dummies Number of dummies that are appended to the predictor matrix.
+ * @param type Type of used algorithm (currently possible choices: 'lar' or 'lasso').
+ */
+tlars_cpp::tlars_cpp(arma::mat XtX, arma::vec Xty, double yty, int n, arma::vec col_sums, double y_sum, bool verbose, bool intercept, bool standardize, int num_dummies, std::string type)
+{
+    this->gram = XtX;
+    this->n = n;
+    this->verbose = verbose;
+    this->intercept = intercept;
+    this->standardize = standardize;
+    this->num_dummies = num_dummies;
+    this->type = type;
+    initialize_values(Xty, yty, col_sums, y_sum);
+}
+
+/** Constructor for a new tlars_cpp-object on a row subset of a shared predictor matrix
+ *
+ * Creates a new object of the class tlars_cpp that reads the predictors through a read-only matrix shared
+ * with other objects instead of holding its own (standardized) copy. Only the given rows are used and every
+ * row enters with the given multiplicity, i.e., a subsample or a bootstrap sample of the rows of X is fitted
+ * without forming it. Centering and standardization are applied on the fly.
+ *
+ * @param shared_X Read-only predictor matrix with all rows.
+ * @param y Response vector with all rows.
+ * @param rows Indices of the rows of shared_X that are used.
+ * @param row_weights Multiplicity of each row in rows (e.g., bootstrap counts).
+ * @param verbose Logical. If TRUE progress in computations is shown.
+ * @param intercept Logical. If TRUE an intercept is included.
+ * @param standardize Logical. If TRUE the predictors are standardized and the response is centered.
+ * @param num_dummies Number of dummies that are appended to the predictor matrix.
+ * @param type Type of used algorithm (currently possible choices: 'lar' or 'lasso').
+ */
+tlars_cpp::tlars_cpp(std::shared_ptr<const arma::mat> shared_X, arma::vec y, arma::uvec rows, arma::vec row_weights, bool verbose, bool intercept, bool standardize, int num_dummies, std::string type)
+{
+    this->shared_X = shared_X;
+    this->rows = rows;
+    this->row_weights = row_weights;
+    this->verbose = verbose;
+    this->intercept = intercept;
+    this->standardize = standardize;
+    this->num_dummies = num_dummies;
+    this->type = type;
+    initialize_values(y, nullptr);
+}
+
+/** Constructor for a new tlars_cpp-object on a prepared design
+ *
+ * Creates a new object of the class tlars_cpp that reads the predictors from the preprocessed matrix of a
+ * prepared_design. The matrix is shared read-only with all other objects created from the same design, so
+ * neither the centering and standardization nor the copy of X are repeated.
+ *
+ * @param design Prepared design holding the preprocessed predictor matrix (intercept and standardize are taken from it).
+ * @param y Response vector.
+ * @param verbose Logical. If TRUE progress in computations is shown.
+ * @param num_dummies Number of dummies that are appended to the predictor matrix.
+ * @param type Type of used algorithm (currently possible choices: 'lar' or 'lasso').
+ */
+tlars_cpp::tlars_cpp(std::shared_ptr<const prepared_design> design, arma::vec y, bool verbose, int num_dummies, std::string type)
+{
+    this->shared_X = design->X;
+    this->rows = arma::regspace<arma::uvec>(0, design->X->n_rows - 1);
+    this->row_weights = arma::ones<arma::vec>(design->X->n_rows);
+    this->verbose = verbose;
+    this->intercept = design->intercept;
+    this->standardize = design->standardize;
+    this->num_dummies = num_dummies;
+    this->type = type;
+    initialize_values(y, design);
+}
+
+/** Constructor for a new tlars_cpp-object on a prepared design followed by own predictors
+ *
+ * Creates a new object of the class tlars_cpp whose first predictors are the preprocessed matrix of a prepared_design
+ * (e.g., the original predictors of the random experiments of the T-Rex selector), shared read-only with all other
+ * objects created from the same design, and whose remaining predictors (e.g., the dummies) are owned by the object.
+ * The own predictors are centered and standardized like the design (see set_shared_block() for the layout).
+ *
+ * @param design Prepared design holding the preprocessed shared predictors (intercept and standardize are taken from it).
+ * @param own_X Predictor matrix that is appended to the design; all of its columns are dummies.
+ * @param y Response vector.
+ * @param verbose Logical. If TRUE progress in computations is shown.
+ * @param type Type of used algorithm (currently possible choices: 'lar' or 'lasso').
+ */
+tlars_cpp::tlars_cpp(std::shared_ptr<const prepared_design> design, arma::mat own_X, arma::vec y, bool verbose, std::string type)
+{
+    if (own_X.n_rows != design->X->n_rows || y.n_elem != design->X->n_rows)
+    {
+        throw std::invalid_argument("'own_X' and 'y' must have as many rows as the design.");
+    }
+    this->X = std::move(own_X);
+    this->y = y;
+    this->verbose = verbose;
+    this->intercept = design->intercept;
+    this->standardize = design->standardize;
+    this->num_dummies = (int) this->X.n_cols;
+    this->type = type;
+    initialize_values(design);
+}
+
 /** Constructor for a tlars_cpp-object with previous LARS-state as an input
  *
  * Re-creates an object of the class tlars_cpp based on a dictionary of class variables that is obtained via get_all().
@@ -83,6 +204,18 @@ std::list<std::vector<double>> tlars_cpp::get_beta_path()
     std::list<std::vector<double>> beta;
     std::list<std::vector<double>>::iterator it;
     std::vector<double> curr_beta(p);
+    // Steps that are stored as knots (active coefficients only) come first
+    std::list<std::vector<int>>::iterator index_it = knot_indices.begin();
+    std::list<std::vector<double>>::iterator value_it = knot_values.begin();
+    for (; index_it != knot_indices.end(); ++index_it, ++value_it)
+    {
+        std::fill(curr_beta.begin(), curr_beta.end(), 0.0);
+        for (std::size_t index = 0; index < index_it->size(); index++)
+        {
+            curr_beta[(*index_it)[index]] = (*value_it)[index]/norm_x((*index_it)[index]);
+        }
+        beta.push_back(curr_beta);
+    }
     for (it = beta_state.begin(); it != beta_state.end(); ++it)
     {
         curr_beta = *it;
@@ -96,6 +229,42 @@ std::list<std::vector<double>> tlars_cpp::get_beta_path()
     return beta;
 }
 
+/** Returns the estimates of selected coefficients at all steps as a matrix
+ *
+ * Unlike get_beta_path(), only the requested columns are built, which keeps plotting the paths of the few
+ * predictors that ever entered the model cheap for very wide X.
+ *
+ * @param cols Indices of the predictors.
+ *
+ * @return Matrix with one row per step and one column per requested predictor.
+ */
+arma::mat tlars_cpp::get_beta_path_columns(arma::uvec cols)
+{
+    arma::mat path = arma::zeros<arma::mat>(knot_indices.size() + beta_state.size(), cols.n_elem);
+    arma::uword row_index = 0;
+    std::list<std::vector<int>>::iterator index_it = knot_indices.begin();
+    std::list<std::vector<double>>::iterator value_it = knot_values.begin();
+    for (; index_it != knot_indices.end(); ++index_it, ++value_it, ++row_index)
+    {
+        for (arma::uword col_index = 0; col_index < cols.n_elem; col_index++)
+        {
+            std::vector<int>::iterator found = std::lower_bound(index_it->begin(), index_it->end(), (int) cols(col_index));
+            if (found != index_it->end() && *found == (int) cols(col_index))
+            {
+                path(row_index, col_index) = (*value_it)[found - index_it->begin()]/norm_x(cols(col_index));
+            }
+        }
+    }
+    for (std::list<std::vector<double>>::iterator it = beta_state.begin(); it != beta_state.end(); ++it, ++row_index)
+    {
+        for (arma::uword col_index = 0; col_index < cols.n_elem; col_index++)
+        {
+            path(row_index, col_index) = (*it)[cols(col_index)]/norm_x(cols(col_index));
+        }
+    }
+    return path;
+}
+
 /** Returns the number of active predictors
  *
  * @return num_active
@@ -179,7 +348,13 @@ arma::vec tlars_cpp::get_Cp()
     {
         sigma2 = NAN;
     }
-    return double_list_to_vector(RSS) / sigma2 - n + 2*int_list_to_vector(df);
+    arma::vec df_vec = int_list_to_vector(df);
+    if (df_vec.n_elem > RSS.size())
+    {
+        // Only the last steps are stored (history = "last")
+        df_vec = df_vec.tail(RSS.size());
+    }
+    return double_list_to_vector(RSS) / sigma2 - n + 2*df_vec;
 }
 
 /** Returns the lambda-values (penalty parameters) at each
@@ -189,7 +364,14 @@ arma::vec tlars_cpp::get_Cp()
  */
 arma::vec tlars_cpp::get_lambda()
 {
-    return lambda;
+    if (history == "last")
+    {
+        return lambda.head(std::min<arma::uword>(lambda.n_elem, k - lambda_start));
+    }
+    // The lambda vector grows on demand; pad it to the maximum number of steps
+    arma::vec output = arma::zeros<arma::vec>(std::max<int>(max_steps - lambda_start, lambda.n_elem));
+    output.head(lambda.n_elem) = lambda;
+    return output;
 }
 
 /** Returns the first entry/selection steps of the predictors
@@ -229,12 +411,431 @@ double tlars_cpp::get_mean_y()
     return mean_y;
 }
 
+/** Returns the indices of the active predictors
+ *
+ * @return active_pred
+ */
+std::list<int> tlars_cpp::get_active_pred()
+{
+    return active_pred;
+}
+
+/** Getter for the number of threads used within a T-LARS step
+ *
+ * @return Number of threads.
+ */
+int tlars_cpp::get_n_threads()
+{
+    return n_threads;
+}
+
+/** Setter for the number of threads used within a T-LARS step
+ *
+ * The inner products of the predictors with the residuals and the search for the step size are split into blocks
+ * of predictors that are processed in parallel. The results are deterministic for a given number of threads.
+ *
+ * @param n_threads Number of threads.
+ */
+void tlars_cpp::set_n_threads(int n_threads)
+{
+    this->n_threads = std::max(1, n_threads);
+}
+
+/** Getter for the stored history of the solution path
+ *
+ * @return history
+ */
+std::string tlars_cpp::get_history()
+{
+    return history;
+}
+
+/** Setter for the stored history of the solution path
+ *
+ * "full" stores the coefficient vectors of all steps, "knots_only" stores only the active coefficients of all steps
+ * and "last" stores only what is needed to continue the solution path and report the final results (the last
+ * coefficient vector, RSS, R2 and lambda). Switching to a smaller history discards the history immediately.
+ *
+ * @param history One of "full", "last" or "knots_only".
+ */
+void tlars_cpp::set_history(std::string history)
+{
+    if (history != "full" && history != "last" && history != "knots_only")
+    {
+        throw std::invalid_argument("'history' must be one of 'full', 'last', 'knots_only'.");
+    }
+    if (history == "full" && !knot_indices.empty())
+    {
+        // Expand the knots into coefficient vectors
+        std::list<std::vector<double>> knot_states;
+        std::list<std::vector<int>>::iterator index_it = knot_indices.begin();
+        std::list<std::vector<double>>::iterator value_it = knot_values.begin();
+        for (; index_it != knot_indices.end(); ++index_it, ++value_it)
+        {
+            std::vector<double> state(p, 0.0);
+            for (std::size_t index = 0; index < index_it->size(); index++)
+            {
+                state[(*index_it)[index]] = (*value_it)[index];
+            }
+            knot_states.push_back(state);
+        }
+        beta_state.splice(beta_state.begin(), knot_states);
+        knot_indices.clear();
+        knot_values.clear();
+    }
+    this->history = history;
+    record_history();
+}
+
+/** Enables or disables the approximate correlations of a row sketch
+ *
+ * Every T-LARS step needs the correlations of all predictors with the residuals and the equiangular vector, i.e.,
+ * two passes over the predictor matrix. In the sketch mode, a CountSketch SX with the given number of rows is
+ * computed once and the passes are replaced by products with SX. The approximations only shortlist the candidates:
+ * the entering predictors are chosen among the predictors whose correlation cannot be shown to be smaller than the
+ * maximum, the step size among the predictors whose step size cannot be shown to be larger than the smallest verified
+ * one, and the correlations and step sizes of all shortlisted predictors are computed exactly. The error bounds are
+ * confidence times the standard deviation of the sketched inner products. If more than max_verified predictors would
+ * have to be verified, the exact correlations of all predictors are computed instead. A predictor whose sketched
+ * inner product falls outside of its bounds is not verified, so the path is only exact with high probability (by
+ * Chebyshev's inequality, the bounds of a predictor fail with probability at most 1/confidence^2 per step).
+ *
+ * @param rows Number of rows of the sketch (0 disables the sketch mode).
+ * @param confidence Width of the error bounds in standard deviations.
+ * @param max_verified Maximum number of predictors verified exactly per step before falling back to exact passes.
+ * @param seed Seed of the sketch.
+ */
+void tlars_cpp::set_sketch(int rows, double confidence, int max_verified, int seed)
+{
+    if (rows < 0 || confidence <= 0 || max_verified < 1)
+    {
+        throw std::invalid_argument("'rows' must be >= 0, 'confidence' > 0 and 'max_verified' >= 1.");
+    }
+    if (rows > 0 && use_gram)
+    {
+        throw std::invalid_argument("The sketch mode requires the predictor matrix (not available for objects created from sufficient statistics).");
+    }
+    if (sketch_rows > 0 && !corr_exact)
+    {
+        corr_predictors = predictor_tdot(residuals);
+    }
+    corr_exact = true;
+    sketch_rows = rows;
+    sketch_confidence = confidence;
+    sketch_max_verified = max_verified;
+    sketch_stats.clear();
+    if (rows == 0)
+    {
+        sketch_X.reset();
+        sketch_bucket.reset();
+        sketch_sign.reset();
+        sketch_col_norms.reset();
+        sketch_corr.reset();
+        corr_known.clear();
+        return;
+    }
+
+    // Every row is added to a random row of the sketch with a random sign
+    int num_rows = residuals.n_elem;
+    std::mt19937_64 generator(seed);
+    std::uniform_int_distribution<arma::uword> bucket_distribution(0, rows - 1);
+    sketch_bucket.set_size(num_rows);
+    sketch_sign.set_size(num_rows);
+    for (int row_index = 0; row_index < num_rows; row_index++)
+    {
+        sketch_bucket(row_index) = bucket_distribution(generator);
+        sketch_sign(row_index) = (generator() & 1) ? 1.0 : -1.0;
+    }
+    sketch_X.zeros(rows, p);
+    sketch_col_norms.set_size(p);
+    parallel_columns(p, num_rows, [&](int block, int first_col, int last_col)
+    {
+        for (int col_index = first_col; col_index < last_col; col_index++)
+        {
+            arma::vec x_col = predictor_col(col_index);
+            sketch_col_norms(col_index) = arma::norm(x_col);
+            for (int row_index = 0; row_index < num_rows; row_index++)
+            {
+                sketch_X(sketch_bucket(row_index), col_index) += sketch_sign(row_index)*x_col(row_index);
+            }
+        }
+    });
+    corr_known.assign(p, false);
+}
+
+/** Returns how the steps of the sketch mode were computed
+ *
+ * @return Counts: "rows" (rows of the sketch), "sketched_steps" (step sizes certified by the sketch), "entry_fallbacks"
+ * and "step_fallbacks" (steps whose entering predictors or step size required exact passes over all predictors) and
+ * "verified_columns" (predictors whose correlations were computed exactly).
+ */
+std::map<std::string, long long> tlars_cpp::get_sketch_stats()
+{
+    std::map<std::string, long long> stats = sketch_stats;
+    stats["rows"] = sketch_rows;
+    return stats;
+}
+
+/** Replaces the leading predictors by a block that is shared read-only with other objects
+ *
+ * Restoring many objects whose predictor matrices start with the same predictors (e.g., the original predictors of
+ * the random experiments of the T-Rex selector, followed by different dummies) only keeps one copy of these
+ * predictors: the object reads the first block->n_cols predictors from the shared block and stores only the remaining
+ * predictors. The object must have been restored from a state without predictor matrix.
+ *
+ * @param block Shared predictors (already centered and standardized like the predictors of the object).
+ * @param own_data Column-major data of the remaining predictors (n rows and p - block->n_cols columns), copied into X.
+ */
+void tlars_cpp::set_shared_block(std::shared_ptr<const arma::mat> block, const double *own_data)
+{
+    if (use_gram || use_view || (int) block->n_cols > p || (block->n_cols > 0 && (int) block->n_rows != n))
+    {
+        throw std::invalid_argument("The shared block does not match the predictor matrix of the object.");
+    }
+    X = arma::mat(const_cast<double*>(own_data), n, p - block->n_cols);
+    shared_cols = block->n_cols;
+    shared_block = shared_cols > 0 ? block : nullptr;
+}
+
+/** Returns how the solution path was recomputed by the last call of update_rows()
+ *
+ * @return Counts: "rows" (added rows), "cached_columns" (predictors of the previous solution path whose cross-products
+ * with all predictors were computed in advance), "computed_columns" (predictors that entered although they were not
+ * active before the update) and "matched_actions" (number of leading actions that did not change).
+ */
+std::map<std::string, long long> tlars_cpp::get_update_stats()
+{
+    return update_stats;
+}
+
+/** Returns the memory held by the object
+ *
+ * @return Bytes per component: "X" (owned predictor data or Gram matrix), "shared_X" (predictor matrix shared with
+ * other objects), "factor" (Cholesky factor of the active predictors), "path" (solution path history) and "scratch"
+ * (working vectors of the T-LARS steps).
+ */
+std::map<std::string, std::size_t> tlars_cpp::get_memory_usage()
+{
+    const std::size_t node = 2*sizeof(void*);
+    std::map<std::string, std::size_t> usage;
+    usage["X"] = sizeof(double)*(X.n_elem + gram.n_elem + gram_xty.n_elem);
+    usage["shared_X"] = use_view ? sizeof(double)*shared_X->n_elem : (shared_cols > 0 ? sizeof(double)*shared_block->n_elem : 0);
+    usage["factor"] = sizeof(double)*(active_data_decomp.n_elem + old_active_data_decomp.n_elem);
+
+    std::size_t path = 0;
+    for (std::list<std::vector<double>>::iterator it = beta_state.begin(); it != beta_state.end(); ++it)
+    {
+        path += node + sizeof(double)*it->capacity();
+    }
+    for (std::list<std::vector<int>>::iterator it = knot_indices.begin(); it != knot_indices.end(); ++it)
+    {
+        path += 2*node + (sizeof(int) + sizeof(double))*it->capacity();
+    }
+    path += (node + sizeof(double))*(RSS.size() + R2.size() + gamrat.size() + gamhat_list.size());
+    path += (node + sizeof(int))*(actions.size() + df.size());
+    path += sizeof(double)*lambda.n_elem + sizeof(int)*first_in.capacity();
+    usage["path"] = path;
+
+    std::size_t scratch = sizeof(double)*(y.n_elem + residuals.n_elem + corr_predictors.n_elem + u.n_elem + a.n_elem
+                                          + w.n_elem + Gi1.n_elem + gamhat1.n_elem + gamhat2.n_elem + mod_X_matrix.n_elem
+                                          + next_beta.capacity() + sign_vec.n_elem + active_beta.n_elem + gam_lasso.n_elem
+                                          + mean_x.n_elem + norm_x.n_elem + row_weights.n_elem + col_center.n_elem + col_scale.n_elem
+                                          + sketch_X.n_elem + sketch_sign.n_elem + sketch_col_norms.n_elem + sketch_corr.n_elem);
+    scratch += sizeof(arma::uword)*sketch_bucket.n_elem + corr_known.size()/8;
+    scratch += sizeof(arma::uword)*rows.n_elem;
+    scratch += (node + sizeof(int))*(active_pred.size() + inactive_pred.size());
+    scratch += (ignored_pred.size() + pos_corr_predictors.size())/8;
+    usage["scratch"] = scratch;
+    return usage;
+}
+
+/** Returns the changes of the state since a previous checkpoint
+ *
+ * Only the quantities that cannot be recomputed from the predictor matrix are returned: the new actions, the non-zero
+ * coefficients, RSS, step sizes and lambda-values of the steps after since_step (as far as they are stored according
+ * to history) and the current step counter, drop flag and the predictors ignored since the previous checkpoint.
+ *
+ * The first call starts a log of the non-zero coefficients and newly ignored predictors of every following step, which
+ * is cleared by every call. A call that continues from the previous one (since_step and since_ignored at its position)
+ * therefore costs O(changes) instead of O(p) per step. Otherwise, the stored steps and all predictors are scanned.
+ *
+ * @param since_step Step counter at the previous checkpoint.
+ * @param since_action Number of actions at the previous checkpoint.
+ * @param since_ignored Number of ignored predictors at the previous checkpoint. Negative values return all ignored
+ * predictors.
+ *
+ * @return Dictionary with the changes.
+ */
+py::dict tlars_cpp::get_checkpoint_delta(int since_step, int since_action, int since_ignored)
+{
+    py::dict delta;
+    delta["k"] = k;
+    delta["drop"] = drop;
+    delta["history"] = history;
+
+    std::list<int> new_actions;
+    std::list<int> entry_steps;
+    int action_index = 0;
+    for (it = actions.begin(); it != actions.end(); ++it, ++action_index)
+    {
+        if (action_index >= since_action)
+        {
+            new_actions.push_back(*it);
+            entry_steps.push_back(*it > 0 ? first_in[*it - 1] : 0);
+        }
+    }
+    delta["actions"] = new_actions;
+    delta["first_in"] = entry_steps;
+
+    std::list<int> ignored;
+    if (delta_ignored_base >= 0 && since_ignored == delta_ignored_base)
+    {
+        ignored.assign(delta_ignored.begin(), delta_ignored.end());
+    }
+    else
+    {
+        for (int col_index = 0; col_index < p; col_index++)
+        {
+            if (ignored_pred[col_index])
+            {
+                ignored.push_back(col_index);
+            }
+        }
+    }
+    delta["ignored"] = ignored;
+    delta["count_ignored"] = count_ignored_pred;
+
+    // Non-zero coefficients of the stored steps after since_step (knots first, then the stored coefficient vectors)
+    int num_stored = (int) (knot_indices.size() + beta_state.size());
+    int first_step = std::max(since_step + 1, k - num_stored + 1);
+    std::list<std::vector<int>> beta_indices;
+    std::list<std::vector<double>> beta_values;
+    int step;
+    if (delta_first_step >= 0 && first_step >= delta_first_step && k - delta_first_step + 1 == (int) delta_indices.size())
+    {
+        // The log of the steps since the previous call covers all requested steps
+        step = delta_first_step;
+        std::list<std::vector<int>>::iterator index_it = delta_indices.begin();
+        std::list<std::vector<double>>::iterator value_it = delta_values.begin();
+        for (; index_it != delta_indices.end(); ++index_it, ++value_it, ++step)
+        {
+            if (step >= first_step)
+            {
+                beta_indices.push_back(*index_it);
+                beta_values.push_back(*value_it);
+            }
+        }
+    }
+    else
+    {
+        step = k - num_stored + 1;
+        std::list<std::vector<int>>::iterator index_it = knot_indices.begin();
+        std::list<std::vector<double>>::iterator value_it = knot_values.begin();
+        for (; index_it != knot_indices.end(); ++index_it, ++value_it, ++step)
+        {
+            if (step >= first_step)
+            {
+                beta_indices.push_back(*index_it);
+                beta_values.push_back(*value_it);
+            }
+        }
+        for (std::list<std::vector<double>>::iterator state_it = beta_state.begin(); state_it != beta_state.end(); ++state_it, ++step)
+        {
+            if (step >= first_step)
+            {
+                std::vector<int> indices;
+                std::vector<double> values;
+                for (int col_index = 0; col_index < p; col_index++)
+                {
+                    if ((*state_it)[col_index] != 0)
+                    {
+                        indices.push_back(col_index);
+                        values.push_back((*state_it)[col_index]);
+                    }
+                }
+                beta_indices.push_back(indices);
+                beta_values.push_back(values);
+            }
+        }
+    }
+    delta["first_step"] = first_step;
+    delta["beta_indices"] = beta_indices;
+    delta["beta_values"] = beta_values;
+
+    // RSS, gamrat and gamhat of the same steps (the lists end with the current step)
+    std::list<double> new_RSS, new_gamrat, new_gamhat;
+    step = k - (int) RSS.size() + 1;
+    for (double_it = RSS.begin(); double_it != RSS.end(); ++double_it, ++step)
+    {
+        if (step >= first_step) new_RSS.push_back(*double_it);
+    }
+    step = k - (int) gamrat.size() + 1;
+    for (double_it = gamrat.begin(); double_it != gamrat.end(); ++double_it, ++step)
+    {
+        if (step >= first_step) new_gamrat.push_back(*double_it);
+    }
+    step = k - (int) gamhat_list.size() + 1;
+    for (double_it = gamhat_list.begin(); double_it != gamhat_list.end(); ++double_it, ++step)
+    {
+        if (step >= first_step) new_gamhat.push_back(*double_it);
+    }
+    delta["RSS"] = new_RSS;
+    delta["gamrat"] = new_gamrat;
+    delta["gamhat"] = new_gamhat;
+
+    // Lambda-values of the same steps (the lambda-value of step s is stored at index s-1)
+    int lambda_first = std::max(first_step - 1, lambda_start);
+    int lambda_last = std::min<int>(k, lambda_start + lambda.n_elem);
+    std::vector<double> new_lambda;
+    for (int lambda_index = lambda_first; lambda_index < lambda_last; lambda_index++)
+    {
+        new_lambda.push_back(lambda(lambda_index - lambda_start));
+    }
+    delta["lambda_first"] = lambda_first;
+    delta["lambda"] = new_lambda;
+
+    // Start a new log at the current position
+    delta_first_step = k + 1;
+    delta_indices.clear();
+    delta_values.clear();
+    delta_ignored_base = count_ignored_pred;
+    delta_ignored.clear();
+
+    return delta;
+}
+
 /** Returns all class variables: This dictionary can be used as an input to the constructor to re-create an object of class tlars_cpp
+ *
+ * @param include_shared Logical. If FALSE, the predictor matrix of an object that shares a block of predictors with other
+ * objects (see set_shared_block()) only contains its own predictors.
  *
  * @return lars_state
  */
-py::dict tlars_cpp::get_all()
+py::dict tlars_cpp::get_all(bool include_shared)
 {
+    // Objects on a shared predictor matrix are stored like objects that own their data
+    arma::mat view_X;
+    arma::vec view_y, view_residuals, view_u;
+    if (use_view)
+    {
+        view_X.set_size(n, p);
+        for (int col_index = 0; col_index < p; col_index++)
+        {
+            view_X.col(col_index) = expand_rows(predictor_col(col_index));
+        }
+        view_y = expand_rows(y);
+        view_residuals = expand_rows(residuals);
+        view_u = expand_rows(u);
+    }
+    else if (shared_cols > 0 && include_shared)
+    {
+        view_X = arma::join_rows(*shared_block, X);
+    }
+    const arma::mat &state_X = (use_view || (shared_cols > 0 && include_shared)) ? view_X : X;
+    const arma::vec &state_y = use_view ? view_y : y;
+    const arma::vec &state_residuals = use_view ? view_residuals : residuals;
+    const arma::vec &state_u = use_view ? view_u : u;
+
     py::dict l1;
     l1["n"] = n;
     l1["p"] = p;
@@ -247,42 +848,55 @@ py::dict tlars_cpp::get_all()
     l1["count_inactive_pred"] = count_inactive_pred;
     l1["ignored_pred"] = ignored_pred;
     l1["count_ignored_pred"] = count_ignored_pred;
-    l1["norm_x"] = carma::col_to_arr(norm_x);
-    l1["mean_x"] = carma::col_to_arr(mean_x);
+    l1["norm_x"] = carma::col_to_arr(norm_x, true);
+    l1["mean_x"] = carma::col_to_arr(mean_x, true);
     l1["mean_y"] = mean_y;
-    l1["corr_predictors"] = carma::col_to_arr(corr_predictors);
+    if (sketch_rows > 0 && !corr_exact)
+    {
+        l1["corr_predictors"] = carma::col_to_arr(predictor_tdot(residuals));
+    }
+    else
+    {
+        l1["corr_predictors"] = carma::col_to_arr(corr_predictors, true);
+    }
     l1["pos_corr_predictors"] = pos_corr_predictors;
     l1["ssy"] = ssy;
-    l1["residuals"] = carma::col_to_arr(residuals);
+    l1["residuals"] = carma::col_to_arr(state_residuals);
     l1["max_steps"] = max_steps;
     l1["beta_state"] = beta_state;
+    l1["history"] = history;
+    l1["lambda_start"] = lambda_start;
+    l1["knot_indices"] = knot_indices;
+    l1["knot_values"] = knot_values;
 
     py::dict l2;
     l2["RSS"] = RSS;
     l2["RSS_next"] = RSS_next;
     l2["R2"] = R2;
     l2["R2_next"] = R2_next;
-    l2["lambda"] = carma::col_to_arr(lambda);
-    l2["X"] = carma::mat_to_arr(X);
-    l2["y"] = carma::col_to_arr(y);
+    l2["lambda"] = carma::col_to_arr(lambda, true);
+    l2["X"] = carma::mat_to_arr(state_X);
+    l2["y"] = carma::col_to_arr(state_y);
     l2["first_in"] = first_in;
-    l2["active_data_decomp"] = carma::mat_to_arr(active_data_decomp);
+    l2["active_data_decomp"] = carma::mat_to_arr(active_data_decomp, true);
     l2["active_data_rank"] = active_data_rank;
-    l2["A"] = carma::mat_to_arr(A);
-    l2["w"] = carma::col_to_arr(w);
-    l2["Gi1"] = carma::col_to_arr(Gi1);
-    l2["a"] = carma::col_to_arr(a);
-    l2["u"] = carma::col_to_arr(u);
+    l2["A"] = carma::mat_to_arr(A, true);
+    l2["w"] = carma::col_to_arr(w, true);
+    l2["Gi1"] = carma::col_to_arr(Gi1, true);
+    l2["a"] = carma::col_to_arr(a, true);
+    l2["u"] = carma::col_to_arr(state_u);
     l2["gamhat"] = gamhat;
     l2["max_gam1"] = max_gam1;
     l2["max_gam2"] = max_gam2;
     l2["gamrat"] = gamrat;
     l2["gamhat_list"] = gamhat_list;
+    l2["gram"] = carma::mat_to_arr(gram, true);
+    l2["gram_xty"] = carma::col_to_arr(gram_xty, true);
 
     py::dict l3;
     l3["drop"] = drop;
     l3["drop_ind"] = drop_ind;
-    l3["sign_vec"] = carma::col_to_arr(sign_vec);
+    l3["sign_vec"] = carma::col_to_arr(sign_vec, true);
     l3["verbose"] = verbose;
     l3["num_dummies"] = num_dummies;
     l3["standardize"] = standardize;
@@ -292,14 +906,15 @@ py::dict tlars_cpp::get_all()
     l3["count_dummies"] = count_dummies;
     l3["k"] = k;
     l3["early_stop"] = early_stop;
-    l3["gamhat1"] = carma::col_to_arr(gamhat1);
-    l3["gamhat2"] = carma::col_to_arr(gamhat2);
-    l3["mod_X_matrix"] = carma::mat_to_arr(mod_X_matrix);
+    l3["gamhat1"] = carma::col_to_arr(gamhat1, true);
+    l3["gamhat2"] = carma::col_to_arr(gamhat2, true);
+    l3["mod_X_matrix"] = carma::mat_to_arr(mod_X_matrix, true);
     l3["next_beta"] = next_beta;
-    l3["old_active_data_decomp"] = carma::mat_to_arr(old_active_data_decomp);
-    l3["active_beta"] = carma::col_to_arr(active_beta);
-    l3["gam_lasso"] = carma::col_to_arr(gam_lasso);
+    l3["old_active_data_decomp"] = carma::mat_to_arr(old_active_data_decomp, true);
+    l3["active_beta"] = carma::col_to_arr(active_beta, true);
+    l3["gam_lasso"] = carma::col_to_arr(gam_lasso, true);
     l3["machine_prec"] = machine_prec;
+    l3["use_gram"] = use_gram;
 
     py::dict l4;
     l4["actions"] = actions;
@@ -327,112 +942,288 @@ void tlars_cpp::initialize_values()
     // initialize dimensions p and sample size n
     n = X.n_rows;
     p = X.n_cols;
-
-    // set machine precision
-    machine_prec = std::numeric_limits<float>::denorm_min();
-
-
-    //effective n by 1 reduced if intercept is true
-    effective_n = n;
-    if (intercept==true)
+    use_gram = false;
+    use_view = false;
+    initialize_path();
+
+    // if intercept is true, remove the mean in the data X and in the output y, and if standardize is true,
+    // standardize the predictors (predictors with a too low variance are ignored)
+    count_ignored_pred = prepared_design::preprocess(X, intercept, standardize, mean_x, norm_x, ignored_pred);
+    drop_ignored_pred();
+    mean_y = arma::mean(y);
+    if(intercept)
     {
-        effective_n  = n-1;
+        y = y - mean_y;
     }
 
-    // initialize dummy counter
-    count_dummies = 0;
+    // Initialize vector with correlations of the predictor data with y
+    corr_predictors = (y.t() * X).t();
 
-    // initialize the list that lists all predictors (all are inactive at the start)
-    count_active_pred = 0;
-    count_new_pred = 0;
-    count_inactive_pred = p;
-    for (i=0; i<p; i++)
-    {
-        inactive_pred.push_back(i);
-    }
+    // Initialize summed squared response and summed squared residuals
+    ssy = dot(y, y);
+    RSS.push_back(ssy);
 
-    // if intercept is true, remove the mean in the data X and in the output y
-    mean_x = arma::zeros<arma::vec>(p);
-    mean_y = 0;
 
-    for (i=0; i<p; i++)
-    {
-        double dim_mean = 0;
-        for (j=0; j<n; j++)
-        {
-            dim_mean = dim_mean + X(j,i);
-        }
-        mean_x(i) = dim_mean/n;
-        if(intercept)
-        {
-            X.col(i) = X.col(i) - mean_x(i);
-        }
-    }
-    for(j=0; j<n; j++)
-    {
-        mean_y = mean_y + y(j);
-    }
-    mean_y = mean_y/n;
+    // Initialize residuals
+    residuals = y;
+
+}
+
+/** Executes all necessary pre-processing steps for an object on a prepared design followed by own predictors
+ *
+ * Only the own predictors are preprocessed; the means, norms and ignored predictors of the shared ones are taken from
+ * the design.
+ *
+ * @param design Prepared design holding the shared predictors.
+ */
+void tlars_cpp::initialize_values(std::shared_ptr<const prepared_design> design)
+{
+
+    // initialize dimensions p and sample size n
+    shared_block = design->X;
+    shared_cols = design->X->n_cols;
+    n = X.n_rows;
+    p = shared_cols + X.n_cols;
+    use_gram = false;
+    use_view = false;
+    initialize_path();
+
+    // Preprocess the own predictors and append their statistics to the ones of the design
+    arma::vec own_mean_x, own_norm_x;
+    std::vector<bool> own_ignored_pred;
+    int own_count_ignored_pred = prepared_design::preprocess(X, intercept, standardize, own_mean_x, own_norm_x, own_ignored_pred);
+    mean_x = arma::join_cols(design->mean_x, own_mean_x);
+    norm_x = arma::join_cols(design->norm_x, own_norm_x);
+    ignored_pred = design->ignored_pred;
+    ignored_pred.insert(ignored_pred.end(), own_ignored_pred.begin(), own_ignored_pred.end());
+    count_ignored_pred = design->count_ignored_pred + own_count_ignored_pred;
+    drop_ignored_pred();
+    mean_y = arma::mean(y);
     if(intercept)
     {
         y = y - mean_y;
     }
 
+    // Initialize vector with correlations of the predictor data with y
+    corr_predictors = predictor_tdot(y);
+
+    // Initialize summed squared response and summed squared residuals
+    ssy = dot(y, y);
+    RSS.push_back(ssy);
+
+    // Initialize residuals
+    residuals = y;
+
+}
+
+/** Initializes values for an object that is created from sufficient statistics
+ *
+ * Centers (if intercept is TRUE) and standardizes (if standardize is TRUE) the Gram matrix
+ * in the same way as initialize_values() treats the predictor matrix X.
+ *
+ * @param Xty Uncentered cross-product vector X'y.
+ * @param yty Uncentered sum of squares y'y of the response.
+ * @param col_sums Column sums of X.
+ * @param y_sum Sum of the response y.
+ */
+void tlars_cpp::initialize_values(arma::vec Xty, double yty, arma::vec col_sums, double y_sum)
+{
+
+    // initialize dimension p (the sample size n is given)
+    p = gram.n_cols;
+    use_gram = true;
+    use_view = false;
+    X.set_size(0, p);
+    y.set_size(0);
+    initialize_path();
+
+    // if intercept is true, remove the mean from the cross-products
+    mean_x = col_sums/n;
+    mean_y = y_sum/n;
+    arma::vec raw_diag = gram.diag();
+    if(intercept)
+    {
+        gram = gram - n*mean_x*mean_x.t();
+        Xty = Xty - n*mean_y*mean_x;
+        yty = yty - n*mean_y*mean_y;
+    }
 
-    // If standardize is true:
-    // 1. If the variance of the signal is below the threshold epsilon, the predictor is ignored.
-    // 2. The signal is standardized.
+    // If standardize is true, predictors with a (numerically) vanishing variance are ignored and the remaining
+    // ones are scaled to unit norm. Centering the uncentered cross-products cancels digits, so the variance
+    // is additionally compared to the uncentered sum of squares.
     ignored_pred = std::vector<bool>(p, false);
     count_ignored_pred = 0;
     norm_x = arma::ones<arma::vec>(p);
     if (standardize == true)
     {
-        for (it = inactive_pred.begin(); it != inactive_pred.end(); ++it)
+        arma::vec scale = arma::ones<arma::vec>(p);
+        for (i=0; i<p; i++)
         {
-            double squared_sum = 0;
-            for(j=0; j<n; j++)
+            double squared_sum = gram(i,i);
+            if (!(squared_sum > 1e-10*raw_diag(i)) || sqrt(squared_sum)/sqrt(n) < machine_prec)
             {
-                squared_sum = squared_sum + pow(X(j,*it),2);
-            }
-            norm_x(*it) = sqrt(squared_sum);
-            if (norm_x(*it)/sqrt(n)< machine_prec)
-            {
-                norm_x(*it) = machine_prec*sqrt(n);
-                ignored_pred[*it] = true;
+                norm_x(i) = machine_prec*sqrt(n);
+                ignored_pred[i] = true;
                 count_ignored_pred++;
             }
             else
             {
-                X.col(*it) = X.col(*it)/norm_x(*it);
+                norm_x(i) = sqrt(squared_sum);
+                scale(i) = norm_x(i);
             }
         }
-        if (count_ignored_pred>0)
+        gram = gram / (scale*scale.t());
+        Xty = Xty / scale;
+        drop_ignored_pred();
+    }
+
+    // Initialize vector with correlations of the predictors with y and the summed squared response
+    gram_xty = Xty;
+    corr_predictors = Xty;
+    ssy = yty;
+    RSS.push_back(ssy);
+
+    // Residuals are never formed explicitly
+    residuals.reset();
+
+}
+
+/** Initializes values for an object on a row subset of a shared predictor matrix
+ *
+ * Computes the (weighted) means and norms of the used rows in the same way as initialize_values() does for
+ * the predictor matrix X, but stores them as column offsets and scales instead of modifying the data. If the
+ * shared matrix comes from a prepared_design, it is already preprocessed and its means and norms are reused.
+ *
+ * @param y_full Response vector with all rows of the shared predictor matrix.
+ * @param design The prepared_design that holds the shared predictor matrix (nullptr if it is not preprocessed).
+ */
+void tlars_cpp::initialize_values(arma::vec y_full, std::shared_ptr<const prepared_design> design)
+{
+
+    // initialize dimension p and sample size n (rows are counted with their multiplicity)
+    p = shared_X->n_cols;
+    n = (int) arma::accu(row_weights);
+    use_gram = false;
+    use_view = true;
+    all_rows = rows.n_elem == shared_X->n_rows && arma::all(rows == arma::regspace<arma::uvec>(0, shared_X->n_rows - 1));
+    unit_weights = arma::all(row_weights == 1);
+    X.set_size(0, p);
+    initialize_path();
+    y = y_full.elem(rows);
+
+    // if intercept is true, remove the mean in the data X and in the output y
+    col_center = arma::zeros<arma::vec>(p);
+    col_scale = arma::ones<arma::vec>(p);
+    mean_y = dot(row_weights, y)/n;
+    if(intercept)
+    {
+        y = y - mean_y;
+    }
+    if (design)
+    {
+        mean_x = design->mean_x;
+        norm_x = design->norm_x;
+        ignored_pred = design->ignored_pred;
+        count_ignored_pred = design->count_ignored_pred;
+        drop_ignored_pred();
+    }
+    else
+    {
+        mean_x = predictor_tdot(arma::ones<arma::vec>(rows.n_elem))/n;
+        if(intercept)
+        {
+            col_center = mean_x;
+        }
+
+        // If standardize is true:
+        // 1. If the variance of the signal is below the threshold epsilon, the predictor is ignored.
+        // 2. The signal is standardized.
+        ignored_pred = std::vector<bool>(p, false);
+        count_ignored_pred = 0;
+        norm_x = arma::ones<arma::vec>(p);
+        if (standardize == true)
         {
-            for(i=0; i<p; i++)
+            for (it = inactive_pred.begin(); it != inactive_pred.end(); ++it)
             {
-                if(ignored_pred[i] == true)
+                arma::vec x_col = predictor_col(*it);
+                norm_x(*it) = sqrt(dot(weighted(x_col), x_col));
+                if (norm_x(*it)/sqrt(n)< machine_prec)
+                {
+                    norm_x(*it) = machine_prec*sqrt(n);
+                    ignored_pred[*it] = true;
+                    count_ignored_pred++;
+                }
+                else
                 {
-                    inactive_pred.remove(i);
-                    count_inactive_pred--;
+                    col_scale(*it) = norm_x(*it);
                 }
             }
-            if(verbose)
+            drop_ignored_pred();
+        }
+    }
+
+    // Initialize vector with correlations of the predictor data with y and the summed squared response
+    corr_predictors = predictor_tdot(y);
+    ssy = dot(weighted(y), y);
+    RSS.push_back(ssy);
+
+    // Initialize residuals
+    residuals = y;
+
+}
+
+/** Removes the ignored predictors from the set of inactive predictors
+ *
+ */
+void tlars_cpp::drop_ignored_pred()
+{
+    if (count_ignored_pred>0)
+    {
+        for(i=0; i<p; i++)
+        {
+            if(ignored_pred[i] == true)
             {
-                std::cout << count_ignored_pred << " predictor(s) dropped because of low variance \n";
+                inactive_pred.remove(i);
+                count_inactive_pred--;
             }
         }
+        if(verbose)
+        {
+            std::cout << count_ignored_pred << " predictor(s) dropped because of low variance \n";
+        }
     }
+}
 
-    // Initialize vector with correlations of the predictor data with y
-    corr_predictors = (y.t() * X).t();
-    pos_corr_predictors = std::vector<bool>(p, false);
+/** Initializes the path variables shared by all constructors
+ *
+ */
+void tlars_cpp::initialize_path()
+{
 
-    // Initialize summed squared response and summed squared residuals
-    ssy = dot(y, y);
+    // set machine precision
+    machine_prec = std::numeric_limits<float>::denorm_min();
 
 
-    // Initialize residuals
-    residuals = y;
+    //effective n by 1 reduced if intercept is true
+    effective_n = n;
+    if (intercept==true)
+    {
+        effective_n  = n-1;
+    }
+
+    // initialize dummy counter
+    count_dummies = 0;
+
+    // initialize the list that lists all predictors (all are inactive at the start)
+    count_active_pred = 0;
+    count_new_pred = 0;
+    count_inactive_pred = p;
+    for (i=0; i<p; i++)
+    {
+        inactive_pred.push_back(i);
+    }
+
+    pos_corr_predictors = std::vector<bool>(p, false);
 
     // Initialize maximum number of steps
     if (p<effective_n)
@@ -449,11 +1240,10 @@ void tlars_cpp::initialize_values()
     beta_state.push_back(zero_vector);
 
     //Initialize some statistical measures
-    RSS.push_back(ssy);
     R2.push_back(0);
 
-    //Initialize lambda vector
-    lambda = arma::zeros<arma::vec>(max_steps);
+    //Initialize lambda vector (grows on demand)
+    lambda = arma::zeros<arma::vec>(std::min(max_steps, 64));
 
     //Initialize vector that documents parameters entering the model
     std::vector<int> first_in(p);
@@ -475,10 +1265,167 @@ void tlars_cpp::initialize_values()
     step_type = type;
 
     this->first_in = first_in;
-    this->ignored_pred = ignored_pred;
 
 }
 
+/** Clears the solution path before it is recomputed from the first step
+ *
+ */
+void tlars_cpp::reset_path()
+{
+    active_pred.clear();
+    new_pred.clear();
+    inactive_pred.clear();
+    beta_state.clear();
+    RSS.clear();
+    R2.clear();
+    gamrat.clear();
+    gamhat_list.clear();
+    actions.clear();
+    df.clear();
+    drop_ind.clear();
+    knot_indices.clear();
+    knot_values.clear();
+    lambda_start = 0;
+    corr_exact = true;
+    delta_first_step = -1;
+    delta_indices.clear();
+    delta_values.clear();
+    delta_ignored_base = -1;
+    delta_ignored.clear();
+}
+
+/** Updates the means and norms of the predictors with new rows and appends them to the predictor matrix
+ *
+ * The stored predictors are centered with the old means and scaled with the old norms. Their column sums and sums of
+ * squares follow from the old means and norms, so the updated means and norms only require a pass over the new rows.
+ * The stored predictors are then shifted and rescaled column by column, i.e., the result equals the preprocessing
+ * of all rows from scratch (up to rounding).
+ *
+ * @param X_new Predictor matrix of the new rows.
+ * @param y_new Response of the new rows.
+ */
+void tlars_cpp::update_row_statistics(const arma::mat &X_new, const arma::vec &y_new)
+{
+    int n_old = n;
+    int n_total = n + X_new.n_rows;
+
+    // Offsets and scales of the stored predictors and their column sums before the update
+    arma::vec old_center = intercept ? mean_x : arma::zeros<arma::vec>(p);
+    arma::vec old_scale = stored_scale();
+    arma::vec old_sums = n_old*(mean_x - old_center)/old_scale;
+    mean_x = (n_old*mean_x + arma::sum(X_new, 0).t())/n_total;
+    arma::vec center = intercept ? mean_x : arma::zeros<arma::vec>(p);
+    arma::mat new_rows = X_new.each_row() - center.t();
+
+    // Sums of squares of the updated centered predictors (the stored standardized predictors have unit norm)
+    ignored_pred = std::vector<bool>(p, false);
+    count_ignored_pred = 0;
+    norm_x = arma::ones<arma::vec>(p);
+    arma::vec scale = arma::ones<arma::vec>(p);
+    if (standardize == true)
+    {
+        arma::vec shift = old_center - center;
+        arma::vec new_squares = arma::sum(arma::square(new_rows), 0).t();
+        for (i=0; i<p; i++)
+        {
+            double old_squares = old_scale(i) == 1 ? dot(X.col(i), X.col(i)) : 1.0;
+            double squared_sum = old_scale(i)*old_scale(i)*old_squares + 2*old_scale(i)*shift(i)*old_sums(i)
+                                 + n_old*shift(i)*shift(i) + new_squares(i);
+            norm_x(i) = sqrt(std::max(squared_sum, 0.0));
+            if (norm_x(i)/sqrt(n_total) < machine_prec)
+            {
+                norm_x(i) = machine_prec*sqrt(n_total);
+                ignored_pred[i] = true;
+                count_ignored_pred++;
+            }
+            else
+            {
+                scale(i) = norm_x(i);
+            }
+        }
+    }
+
+    // Shift and rescale the stored predictors and append the new rows
+    X.each_row() %= (old_scale/scale).t();
+    X.each_row() += ((old_center - center)/scale).t();
+    new_rows.each_row() /= scale.t();
+    X = arma::join_cols(X, new_rows);
+
+    double old_mean_y = mean_y;
+    mean_y = (n_old*mean_y + arma::accu(y_new))/n_total;
+    if (intercept)
+    {
+        y = arma::join_cols(y + old_mean_y - mean_y, y_new - mean_y);
+    }
+    else
+    {
+        y = arma::join_cols(y, y_new);
+    }
+    n = n_total;
+
+    // Restart the solution path
+    reset_path();
+    initialize_path();
+    drop_ignored_pred();
+    corr_predictors = predictor_tdot(y);
+    ssy = dot(y, y);
+    RSS.push_back(ssy);
+    residuals = y;
+}
+
+/** Adds the cross-products of new rows to the sufficient statistics
+ *
+ * The uncentered cross-products are recovered from the centered and standardized Gram matrix, the cross-products of
+ * the new rows are added and the statistics are centered and standardized again as in the constructor.
+ *
+ * @param X_new Predictor matrix of the new rows.
+ * @param y_new Response of the new rows.
+ */
+void tlars_cpp::update_gram_statistics(const arma::mat &X_new, const arma::vec &y_new)
+{
+    arma::vec scale = stored_scale();
+    arma::mat XtX = gram % (scale*scale.t());
+    arma::vec Xty = gram_xty % scale;
+    double yty = ssy;
+    if (intercept)
+    {
+        XtX = XtX + n*mean_x*mean_x.t();
+        Xty = Xty + n*mean_y*mean_x;
+        yty = yty + n*mean_y*mean_y;
+    }
+    arma::vec col_sums = n*mean_x + arma::sum(X_new, 0).t();
+    double y_sum = n*mean_y + arma::accu(y_new);
+    gram = XtX + X_new.t()*X_new;
+    n = n + X_new.n_rows;
+
+    // Restart the solution path
+    reset_path();
+    initialize_values(Xty + X_new.t()*y_new, yty + dot(y_new, y_new), col_sums, y_sum);
+}
+
+/** Returns the scales by which the stored predictors were divided
+ *
+ * Predictors that are ignored because of a low variance are not scaled (their norm is set to the threshold).
+ *
+ * @return Scale of every predictor.
+ */
+arma::vec tlars_cpp::stored_scale()
+{
+    arma::vec scale = arma::ones<arma::vec>(p);
+    if (standardize == true)
+    {
+        for (i=0; i<p; i++)
+        {
+            if (!(ignored_pred[i] && norm_x(i) == machine_prec*sqrt(n)))
+            {
+                scale(i) = norm_x(i);
+            }
+        }
+    }
+    return scale;
+}
+
 /** Initializes values while recreating an object with a previous
  *  obtained dictionary using get_all()
  *
@@ -513,13 +1460,23 @@ void tlars_cpp::initialize_values(py::dict lars_state)
     residuals = carma::arr_to_col<double>(l1["residuals"].cast<py::array_t<double>>());
     max_steps = l1["max_steps"].cast<int>();
     beta_state = l1["beta_state"].cast<std::list<std::vector<double>>>();
+    if (l1.contains("history"))
+    {
+        history = l1["history"].cast<std::string>();
+        lambda_start = l1["lambda_start"].cast<int>();
+        knot_indices = l1["knot_indices"].cast<std::list<std::vector<int>>>();
+        knot_values = l1["knot_values"].cast<std::list<std::vector<double>>>();
+    }
 
     RSS = l2["RSS"].cast<std::list<double>>();
     RSS_next = l2["RSS_next"].cast<double>();
     R2 = l2["R2"].cast<std::list<double>>();
     R2_next = l2["R2_next"].cast<double>();
     lambda = carma::arr_to_col<double>(l2["lambda"].cast<py::array_t<double>>());
-    X = carma::arr_to_mat<double>(l2["X"].cast<py::array_t<double>>());
+    if (l2.contains("X"))
+    {
+        X = carma::arr_to_mat<double>(l2["X"].cast<py::array_t<double>>());
+    }
     y = carma::arr_to_col<double>(l2["y"].cast<py::array_t<double>>());
     first_in = l2["first_in"].cast<std::vector<int>>();
     active_data_decomp = carma::arr_to_mat<double>(l2["active_data_decomp"].cast<py::array_t<double>>());
@@ -555,6 +1512,13 @@ void tlars_cpp::initialize_values(py::dict lars_state)
     active_beta = carma::arr_to_col<double>(l3["active_beta"].cast<py::array_t<double>>());
     gam_lasso = carma::arr_to_col<double>(l3["gam_lasso"].cast<py::array_t<double>>());
     machine_prec = l3["machine_prec"].cast<double>();
+    use_gram = l3.contains("use_gram") && l3["use_gram"].cast<bool>();
+    use_view = false;
+    if (use_gram)
+    {
+        gram = carma::arr_to_mat<double>(l2["gram"].cast<py::array_t<double>>());
+        gram_xty = carma::arr_to_col<double>(l2["gram_xty"].cast<py::array_t<double>>());
+    }
 
     actions = l4["actions"].cast<std::list<int>>();
     df = l4["df"].cast<std::list<int>>();
@@ -566,27 +1530,31 @@ void tlars_cpp::initialize_values(py::dict lars_state)
  * @param T_stop Number of included dummies after which the random experiments (i.e., forward selection processes) are stopped.
  * @param early_stop Logical. If TRUE, then the forward selection process is stopped after T_stop dummies have been included. Otherwise
  * the entire solution path is computed.
+ * @param num_steps Maximum number of steps executed by this call (e.g., to checkpoint the state in between). Negative values
+ * impose no limit.
+ *
+ * The Python binding releases the GIL while the steps run. The object is not synchronized: no other thread may call a getter,
+ * setter or method of the same object until this call returns.
  */
-void tlars_cpp::execute_lars_step(int T_stop, bool early_stop)
+void tlars_cpp::execute_lars_step(int T_stop, bool early_stop, int num_steps)
 {
 
     // Determine the index of the first dummy
     int dummy_ind = p - num_dummies;
+    int last_step = num_steps < 0 ? max_steps : std::min(max_steps, k + num_steps);
 
     //Begin LARS-algorithm
-    while (k < max_steps&&
+    while (k < last_step&&
             count_inactive_pred > 0 &&
             count_active_pred < effective_n &&
             (count_dummies < T_stop || early_stop == false))
     {
         //Obtain correlations of all inactive predictors
-        arma::vec corr_inactive(count_inactive_pred);
-        counter = 0;
-        for (it = inactive_pred.begin(); it != inactive_pred.end(); ++it)
+        if (sketch_rows > 0 && !corr_exact)
         {
-            corr_inactive(counter) = corr_predictors(*it);
-            counter++;
+            sketch_correlations();
         }
+        arma::vec corr_inactive = corr_predictors.elem(int_list_to_uvec(inactive_pred));
         //Obtain maximum correlation over all inactive predictors
         double corr_max_inactive = max(abs(corr_inactive));
 
@@ -602,7 +1570,7 @@ void tlars_cpp::execute_lars_step(int T_stop, bool early_stop)
             break;
         }
         //Set ideal lambda for this step equal to the maximum correlation
-        lambda(k) = corr_max_inactive;
+        store_lambda(corr_max_inactive);
 
         //
         if(drop==false)
@@ -619,26 +1587,46 @@ void tlars_cpp::execute_lars_step(int T_stop, bool early_stop)
                 }
             }
 
+            // Several new predictors (ties) extend the Cholesky factor by one block
+            std::vector<bool> independent;
+            if (new_pred.size() > 1)
+            {
+                independent = update_decomp_block(new_pred);
+            }
+
             // For every new predictor do:
-            for (it = new_pred.begin(); it!= new_pred.end(); it++)
+            counter = 0;
+            for (it = new_pred.begin(); it!= new_pred.end(); it++, counter++)
             {
-                arma::mat oldX(n,count_active_pred);
-                counter= 0;
-                // Create oldX which is the predictor matrix X of only the active predictors
-                for (inner_it = active_pred.begin(); inner_it!= active_pred.end(); inner_it++)
+                bool dependent;
+                if (new_pred.size() > 1)
                 {
-                    oldX.col(counter) = X.col(*inner_it);
-                    counter++;
+                    dependent = !independent[counter];
+                }
+                else
+                {
+                    // Inner products of the new predictor with itself and with the active predictors
+                    double xtx;
+                    arma::vec Xtx;
+                    cross_products(*it, xtx, Xtx);
+                    // Check for rank including a new predictor
+                    old_active_data_decomp = active_data_decomp;
+                    update_decomp(xtx, Xtx);
+                    dependent = active_data_rank == count_active_pred;
+                    if (dependent)
+                    {
+                        active_data_decomp = old_active_data_decomp;
+                    }
                 }
-                // Check for rank including a new predictor
-                old_active_data_decomp = active_data_decomp;
-                update_decomp(X.col(*it), oldX);
                 // If the new predictor is linear dependent on the previous ones, ignore new predictor.
-                if(active_data_rank == count_active_pred)
+                if(dependent)
                 {
-                    active_data_decomp = old_active_data_decomp;
                     ignored_pred.at(*it) = true;
                     count_ignored_pred++;
+                    if (delta_ignored_base >= 0)
+                    {
+                        delta_ignored.push_back(*it);
+                    }
 
                     if(verbose)
                     {
@@ -664,18 +1652,17 @@ void tlars_cpp::execute_lars_step(int T_stop, bool early_stop)
                     }
                     count_active_pred++;
                 }
-                counter = 0;
-                for (inner_it = inactive_pred.begin(); inner_it!= inactive_pred.end(); inner_it++)
-                {
-                    if (*inner_it== *it)
-                    {
-                        corr_inactive.shed_rows(counter,counter);
-                    }
-                    counter++;
-                }
-                inactive_pred.remove(*it);
-                count_inactive_pred--;
             }
+
+            // Remove the new predictors from the inactive predictors in one pass
+            std::vector<bool> is_new(p, false);
+            for (it = new_pred.begin(); it!= new_pred.end(); it++)
+            {
+                is_new[*it] = true;
+            }
+            inactive_pred.remove_if([&](int index) { return is_new[index]; });
+            count_inactive_pred -= new_pred.size();
+            corr_inactive = corr_predictors.elem(int_list_to_uvec(inactive_pred));
         }
         // Calculate sign-vector
         counter = 0;
@@ -694,30 +1681,73 @@ void tlars_cpp::execute_lars_step(int T_stop, bool early_stop)
         A = Gi1.t() * sign_vec;
         A = sqrt(1/A);
         w = (A*Gi1.t()).t();
-        mod_X_matrix.resize(n,count_active_pred);
-        counter=0;
-        for (it = active_pred.begin(); it!= active_pred.end(); it++)
+        arma::uvec active_ind = int_list_to_uvec(active_pred);
+        arma::vec gram_u;
+        if (use_gram || use_cache)
         {
-            mod_X_matrix.col(counter) = X.col(*it);
-            counter++;
+            // Inner products of all predictors with the equiangular vector (columns of the symmetric Gram matrix
+            // or of the cached cross-products)
+            const arma::mat &cross = use_gram ? gram : xtx_cache;
+            arma::uvec cross_ind = use_gram ? active_ind : cache_indices(active_ind);
+            gram_u.set_size(p);
+            parallel_columns(p, count_active_pred, [&](int block, int first_col, int last_col)
+            {
+                arma::vec block_u = arma::zeros<arma::vec>(last_col - first_col);
+                for (arma::uword active_index = 0; active_index < cross_ind.n_elem; active_index++)
+                {
+                    block_u += w(active_index)*cross.col(cross_ind(active_index)).subvec(first_col, last_col-1);
+                }
+                gram_u.subvec(first_col, last_col-1) = block_u;
+            });
+        }
+        if (!use_gram)
+        {
+            mod_X_matrix.set_size(residuals.n_elem,count_active_pred);
+            counter=0;
+            for (it = active_pred.begin(); it!= active_pred.end(); it++)
+            {
+                mod_X_matrix.col(counter) = predictor_col(*it);
+                counter++;
+            }
+            u = mod_X_matrix*w;
         }
-        u = mod_X_matrix*w;
         if(count_active_pred >= effective_n || count_active_pred >= p - count_ignored_pred)
             gamhat = corr_max_inactive/A(0,0);
-        else
+        else if (sketch_rows == 0 || !sketch_step_size(corr_max_inactive, A(0,0)))
         {
-            mod_X_matrix.resize(n,count_inactive_pred);
-            counter = 0;
-            for (it = inactive_pred.begin(); it!= inactive_pred.end(); it++)
+            if (sketch_rows > 0 && !corr_exact)
             {
-                mod_X_matrix.col(counter) = X.col(*it);
-                counter++;
+                // The sketch could not certify the step size: use the exact correlations of all predictors
+                corr_predictors = predictor_tdot(residuals);
+                corr_exact = true;
+                corr_inactive = corr_predictors.elem(int_list_to_uvec(inactive_pred));
+            }
+            if (use_gram || use_cache)
+            {
+                a = gram_u.elem(int_list_to_uvec(inactive_pred));
             }
-            a = (u.t()*mod_X_matrix).t();
-            gamhat1 = (corr_max_inactive - corr_inactive)/(A(0,0) - a);
-            gamhat2 = (corr_max_inactive + corr_inactive)/(A(0,0) + a);
-            max_gam1 = gamhat1.max();
-            max_gam2 = gamhat2.max();
+            else
+            {
+                a = predictor_tdot(u).elem(int_list_to_uvec(inactive_pred));
+            }
+            // Candidate step sizes and their maxima (combined block by block in block order)
+            gamhat1.set_size(count_inactive_pred);
+            gamhat2.set_size(count_inactive_pred);
+            std::vector<double> block_max1(n_threads, -arma::datum::inf);
+            std::vector<double> block_max2(n_threads, -arma::datum::inf);
+            double A_step = A(0,0);
+            parallel_columns(count_inactive_pred, 1, [&](int block, int first_col, int last_col)
+            {
+                for (int index = first_col; index < last_col; index++)
+                {
+                    gamhat1(index) = (corr_max_inactive - corr_inactive(index))/(A_step - a(index));
+                    gamhat2(index) = (corr_max_inactive + corr_inactive(index))/(A_step + a(index));
+                    if (gamhat1(index) > block_max1[block]) block_max1[block] = gamhat1(index);
+                    if (gamhat2(index) > block_max2[block]) block_max2[block] = gamhat2(index);
+                }
+            });
+            max_gam1 = *std::max_element(block_max1.begin(), block_max1.end());
+            max_gam2 = *std::max_element(block_max2.begin(), block_max2.end());
             if (max_gam1 >= max_gam2 && max_gam1>=0)
             {
                 gamhat = max_gam1;
@@ -734,17 +1764,23 @@ void tlars_cpp::execute_lars_step(int T_stop, bool early_stop)
                 }
                 break;
             }
-            for(i=0; i<count_inactive_pred; i++)
+            // Smallest positive step size (the minimum does not depend on the order of the blocks)
+            std::vector<double> block_min(n_threads, gamhat);
+            parallel_columns(count_inactive_pred, 1, [&](int block, int first_col, int last_col)
             {
-                if(gamhat1(i)<gamhat && gamhat1(i)>=machine_prec)
-                {
-                    gamhat=gamhat1(i);
-                }
-                if(gamhat2(i)<gamhat && gamhat2(i)>=machine_prec)
+                for (int index = first_col; index < last_col; index++)
                 {
-                    gamhat=gamhat2(i);
+                    if(gamhat1(index)<block_min[block] && gamhat1(index)>=machine_prec)
+                    {
+                        block_min[block]=gamhat1(index);
+                    }
+                    if(gamhat2(index)<block_min[block] && gamhat2(index)>=machine_prec)
+                    {
+                        block_min[block]=gamhat2(index);
+                    }
                 }
-            }
+            });
+            gamhat = *std::min_element(block_min.begin(), block_min.end());
         }
         next_beta = beta_state.back();
         // check if variables need to be removed
@@ -768,11 +1804,30 @@ void tlars_cpp::execute_lars_step(int T_stop, bool early_stop)
                 }
             }
         }
-        residuals = residuals - gamhat*u;
-        corr_predictors = (residuals.t() * X).t();
-        gamrat.push_back(gamhat*A(0,0)/corr_max_inactive);
-        gamhat_list.push_back(gamhat);
-        counter=0;
+        if (use_gram)
+        {
+            corr_predictors = corr_predictors - gamhat*gram_u;
+        }
+        else
+        {
+            residuals = residuals - gamhat*u;
+            if (use_cache)
+            {
+                corr_predictors = corr_predictors - gamhat*gram_u;
+            }
+            else if (sketch_rows > 0)
+            {
+                // The correlations are approximated from the sketch at the beginning of the next step
+                corr_exact = false;
+            }
+            else
+            {
+                corr_predictors = predictor_tdot(residuals);
+            }
+        }
+        gamrat.push_back(gamhat*A(0,0)/corr_max_inactive);
+        gamhat_list.push_back(gamhat);
+        counter=0;
         for(it = active_pred.begin(); it!= active_pred.end(); it++)
         {
             next_beta[*it] = next_beta[*it] + gamhat*w(counter);
@@ -810,44 +1865,757 @@ void tlars_cpp::execute_lars_step(int T_stop, bool early_stop)
         }
         beta_state.push_back(next_beta);
         k++;
+        record_delta();
 
 
         // Calculate some outputs
-        RSS_next = 0;
-        for(j=0; j<n; j++)
+        if (use_gram)
+        {
+            RSS_next = gram_rss();
+        }
+        else
         {
-            RSS_next = RSS_next + pow(residuals(j),2);
+            RSS_next = dot(weighted(residuals), residuals);
         }
         RSS.push_back(RSS_next);
         R2_next = 1 - RSS_next/ssy;
         R2.push_back(R2_next);
+        record_history();
     }
 }
 
+/** Adds new rows to the data and recomputes the solution path on all rows
+ *
+ * The means and norms of the predictors (and the cross-products of objects created from sufficient statistics) are
+ * updated with the new rows, and the solution path is recomputed from the first step with the same stopping rule as
+ * execute_lars_step(). When observations are added, the solution path usually selects (almost) the same predictors in
+ * (almost) the same order. Therefore, the cross-products of all predictors with the predictors of the previous solution
+ * path are computed in advance with a single matrix-matrix product, and every step obtains the correlations with the
+ * residuals and the equiangular vector from them instead of two passes over X. Every step still checks the
+ * correlations and step sizes of all predictors, so the path equals the one of a fit from scratch: from the first step
+ * where the order differs from the previous one, the cross-products of newly entering predictors are computed when
+ * they enter.
+ *
+ * @param X_new Predictor matrix of the new rows (including dummies).
+ * @param y_new Response of the new rows.
+ * @param T_stop Number of included dummies after which the recomputed solution path is stopped.
+ * @param early_stop Logical. If TRUE, then the solution path is stopped after T_stop dummies have been included.
+ */
+void tlars_cpp::update_rows(arma::mat X_new, arma::vec y_new, int T_stop, bool early_stop)
+{
+    if (use_view || shared_cols > 0)
+    {
+        throw std::invalid_argument("Rows cannot be added to objects on a shared predictor matrix.");
+    }
+    if (sketch_rows > 0)
+    {
+        throw std::invalid_argument("Rows cannot be added in the sketch mode. Disable it with set_sketch(0) first.");
+    }
+    if ((int) X_new.n_cols != p || X_new.n_rows != y_new.n_elem)
+    {
+        throw std::invalid_argument("'X_new' must have p columns and as many rows as 'y_new'.");
+    }
+
+    // Predictors of the previous solution path in the order of their first entry
+    std::list<int> old_actions = actions;
+    std::vector<int> seed_cols;
+    std::vector<bool> seen(p, false);
+    for (it = old_actions.begin(); it != old_actions.end(); ++it)
+    {
+        int col_index = std::abs(*it) - 1;
+        if (!seen[col_index])
+        {
+            seen[col_index] = true;
+            seed_cols.push_back(col_index);
+        }
+    }
+
+    update_stats.clear();
+    update_stats["rows"] = X_new.n_rows;
+    update_stats["cached_columns"] = 0;
+    update_stats["computed_columns"] = 0;
+    if (use_gram)
+    {
+        update_gram_statistics(X_new, y_new);
+    }
+    else
+    {
+        update_row_statistics(X_new, y_new);
+        std::vector<int> cache_cols;
+        for (int col_index : seed_cols)
+        {
+            if (!ignored_pred[col_index])
+            {
+                cache_cols.push_back(col_index);
+            }
+        }
+        cache_col.assign(p, -1);
+        xtx_cache.set_size(p, 0);
+        cache_cross_products(cache_cols);
+        update_stats["cached_columns"] = cache_cols.size();
+        use_cache = true;
+    }
+
+    try
+    {
+        execute_lars_step(T_stop, early_stop);
+    }
+    catch (...)
+    {
+        use_cache = false;
+        xtx_cache.reset();
+        cache_col.clear();
+        throw;
+    }
+    if (use_cache)
+    {
+        use_cache = false;
+        xtx_cache.reset();
+        cache_col.clear();
+        // Replace the correlations that were updated step by step by the exact ones
+        corr_predictors = predictor_tdot(residuals);
+    }
+
+    // Number of leading actions that did not change
+    long long matched_actions = 0;
+    std::list<int>::iterator old_it = old_actions.begin();
+    for (it = actions.begin(); it != actions.end() && old_it != old_actions.end() && *it == *old_it; ++it, ++old_it)
+    {
+        matched_actions++;
+    }
+    update_stats["matched_actions"] = matched_actions;
+}
+
+/** Stores the lambda-value of the current step and grows the lambda vector if necessary
+ *
+ * @param value Lambda-value of step k.
+ */
+void tlars_cpp::store_lambda(double value)
+{
+    arma::uword index = k - lambda_start;
+    if (index >= lambda.n_elem)
+    {
+        arma::uword capacity = std::max<arma::uword>(2*lambda.n_elem, 64);
+        lambda.resize(std::max<arma::uword>(index + 1, std::min<arma::uword>(capacity, max_steps - lambda_start)));
+    }
+    lambda(index) = value;
+}
+
+/** Appends the non-zero coefficients of the current step to the log of get_checkpoint_delta()
+ *
+ * Only the active predictors can have non-zero coefficients, so the cost depends on the size of the active set.
+ * Nothing is recorded before the first call of get_checkpoint_delta().
+ */
+void tlars_cpp::record_delta()
+{
+    if (delta_first_step < 0)
+    {
+        return;
+    }
+    std::vector<int> indices;
+    for (it = active_pred.begin(); it != active_pred.end(); ++it)
+    {
+        if (next_beta[*it] != 0)
+        {
+            indices.push_back(*it);
+        }
+    }
+    std::sort(indices.begin(), indices.end());
+    std::vector<double> values(indices.size());
+    for (std::size_t index = 0; index < indices.size(); index++)
+    {
+        values[index] = next_beta[indices[index]];
+    }
+    delta_indices.push_back(indices);
+    delta_values.push_back(values);
+}
+
+/** Discards the parts of the solution path that are not kept according to history
+ *
+ * With history = "knots_only" all but the last coefficient vector are stored as their non-zero entries. With
+ * history = "last" only the last coefficient vector, RSS, R2, gamrat, gamhat and lambda are kept.
+ */
+void tlars_cpp::record_history()
+{
+    if (history == "full")
+    {
+        return;
+    }
+    while (beta_state.size() > 1)
+    {
+        if (history == "knots_only")
+        {
+            std::vector<int> indices;
+            std::vector<double> values;
+            const std::vector<double> &state = beta_state.front();
+            for (int col_index = 0; col_index < p; col_index++)
+            {
+                if (state[col_index] != 0)
+                {
+                    indices.push_back(col_index);
+                    values.push_back(state[col_index]);
+                }
+            }
+            knot_indices.push_back(indices);
+            knot_values.push_back(values);
+        }
+        beta_state.pop_front();
+    }
+    if (history == "last")
+    {
+        knot_indices.clear();
+        knot_values.clear();
+        while (RSS.size() > 1) RSS.pop_front();
+        while (R2.size() > 1) R2.pop_front();
+        while (gamrat.size() > 1) gamrat.pop_front();
+        while (gamhat_list.size() > 1) gamhat_list.pop_front();
+        if (k - lambda_start > 1)
+        {
+            lambda = arma::vec{lambda(k - 1 - lambda_start)};
+            lambda_start = k - 1;
+        }
+    }
+}
+
+/** Applies the row sketch to a vector
+ *
+ * @param v Vector with one entry per (used) row.
+ *
+ * @return Sketched vector with one entry per row of the sketch.
+ */
+arma::vec tlars_cpp::sketch_vector(const arma::vec &v)
+{
+    arma::vec output = arma::zeros<arma::vec>(sketch_rows);
+    for (arma::uword row_index = 0; row_index < v.n_elem; row_index++)
+    {
+        output(sketch_bucket(row_index)) += sketch_sign(row_index)*v(row_index);
+    }
+    return output;
+}
+
+/** Computes the inner product of a predictor with a vector
+ *
+ * @param col_index Index of the predictor.
+ * @param v Vector with one entry per (used) row (already weighted by the row multiplicities).
+ *
+ * @return Inner product.
+ */
+double tlars_cpp::predictor_dot(int col_index, const arma::vec &v)
+{
+    if (!use_view && shared_cols == 0)
+    {
+        return arma::dot(X.col(col_index), v);
+    }
+    return arma::dot(predictor_col(col_index), v);
+}
+
+/** Approximates the correlations with the residuals from the sketch and computes the candidates exactly
+ *
+ * The correlations of the active predictors and of all inactive predictors whose correlation may be the maximum are
+ * computed exactly; the correlations of the remaining predictors are set to zero (they cannot enter in this step).
+ * If there are more than sketch_max_verified candidates, all correlations are computed exactly.
+ */
+void tlars_cpp::sketch_correlations()
+{
+    arma::vec weighted_residuals = weighted(residuals);
+    sketch_corr = sketch_X.t()*sketch_vector(weighted_residuals);
+    sketch_corr_err = sketch_confidence*std::sqrt(2.0/sketch_rows)*arma::norm(weighted_residuals);
+
+    // Lower bound of the maximum absolute correlation over the inactive predictors
+    double max_lower = 0;
+    for (it = inactive_pred.begin(); it != inactive_pred.end(); ++it)
+    {
+        max_lower = std::max(max_lower, std::abs(sketch_corr(*it)) - sketch_corr_err*sketch_col_norms(*it));
+    }
+    std::vector<int> candidates;
+    for (it = inactive_pred.begin(); it != inactive_pred.end(); ++it)
+    {
+        if (std::abs(sketch_corr(*it)) + sketch_corr_err*sketch_col_norms(*it) >= max_lower)
+        {
+            candidates.push_back(*it);
+        }
+    }
+    if ((int) candidates.size() > sketch_max_verified)
+    {
+        corr_predictors = predictor_tdot(residuals);
+        corr_exact = true;
+        sketch_stats["entry_fallbacks"]++;
+        return;
+    }
+
+    corr_predictors.zeros();
+    std::fill(corr_known.begin(), corr_known.end(), false);
+    for (std::size_t index = 0; index < candidates.size(); index++)
+    {
+        corr_predictors(candidates[index]) = predictor_dot(candidates[index], weighted_residuals);
+        corr_known[candidates[index]] = true;
+    }
+    for (it = active_pred.begin(); it != active_pred.end(); ++it)
+    {
+        corr_predictors(*it) = predictor_dot(*it, weighted_residuals);
+    }
+    sketch_stats["verified_columns"] += candidates.size() + count_active_pred;
+}
+
+/** Computes a lower bound of the positive values of a ratio of two intervals
+ *
+ * @param num_lower Lower end of the numerator interval.
+ * @param num_upper Upper end of the numerator interval.
+ * @param den_lower Lower end of the denominator interval.
+ * @param den_upper Upper end of the denominator interval.
+ *
+ * @return Lower bound of the positive values of num/den (infinity if the ratio cannot be positive).
+ */
+static double ratio_lower_bound(double num_lower, double num_upper, double den_lower, double den_upper)
+{
+    if (den_lower > 0)
+    {
+        if (num_upper < 0) return arma::datum::inf;
+        return num_lower > 0 ? num_lower/den_upper : 0;
+    }
+    if (den_upper < 0)
+    {
+        if (num_lower > 0) return arma::datum::inf;
+        return num_upper < 0 ? num_upper/den_lower : 0;
+    }
+    return 0;
+}
+
+/** Computes the step size from the sketch and verifies it exactly
+ *
+ * Lower bounds of the step sizes of all inactive predictors are derived from the sketched correlations with the
+ * residuals and the equiangular vector. The predictors are verified exactly in the order of their lower bounds until
+ * the smallest verified step size is below all remaining lower bounds.
+ *
+ * @param corr_max_inactive Maximum absolute correlation of the inactive predictors.
+ * @param A_step Normalization constant of the equiangular vector.
+ *
+ * @return TRUE if the step size (stored in gamhat) was certified, FALSE if exact passes are required.
+ */
+bool tlars_cpp::sketch_step_size(double corr_max_inactive, double A_step)
+{
+    arma::vec weighted_u = weighted(u);
+    arma::vec sketch_a = sketch_X.t()*sketch_vector(weighted_u);
+    double a_err = sketch_confidence*std::sqrt(2.0/sketch_rows)*arma::norm(weighted_u);
+
+    std::vector<std::pair<double, int>> bounds;
+    bounds.reserve(count_inactive_pred);
+    for (it = inactive_pred.begin(); it != inactive_pred.end(); ++it)
+    {
+        bool known = corr_exact || corr_known[*it];
+        double corr_value = known ? corr_predictors(*it) : sketch_corr(*it);
+        double corr_err = known ? 0 : sketch_corr_err*sketch_col_norms(*it);
+        double a_value = sketch_a(*it);
+        double a_width = a_err*sketch_col_norms(*it);
+        double bound = std::min(ratio_lower_bound(corr_max_inactive - corr_value - corr_err, corr_max_inactive - corr_value + corr_err,
+                                                  A_step - a_value - a_width, A_step - a_value + a_width),
+                                ratio_lower_bound(corr_max_inactive + corr_value - corr_err, corr_max_inactive + corr_value + corr_err,
+                                                  A_step + a_value - a_width, A_step + a_value + a_width));
+        if (bound < arma::datum::inf)
+        {
+            bounds.push_back(std::make_pair(bound, *it));
+        }
+    }
+    std::sort(bounds.begin(), bounds.end());
+
+    arma::vec weighted_residuals;
+    double best = arma::datum::inf;
+    int verified = 0;
+    for (std::size_t index = 0; index < bounds.size() && bounds[index].first < best; index++)
+    {
+        if (verified >= sketch_max_verified)
+        {
+            sketch_stats["verified_columns"] += verified;
+            sketch_stats["step_fallbacks"]++;
+            return false;
+        }
+        int col_index = bounds[index].second;
+        double corr_value;
+        if (corr_exact || corr_known[col_index])
+        {
+            corr_value = corr_predictors(col_index);
+        }
+        else
+        {
+            if (weighted_residuals.n_elem == 0) weighted_residuals = weighted(residuals);
+            corr_value = predictor_dot(col_index, weighted_residuals);
+        }
+        double a_value = predictor_dot(col_index, weighted_u);
+        double step1 = (corr_max_inactive - corr_value)/(A_step - a_value);
+        double step2 = (corr_max_inactive + corr_value)/(A_step + a_value);
+        if (step1 >= machine_prec && step1 < best) best = step1;
+        if (step2 >= machine_prec && step2 < best) best = step2;
+        verified++;
+    }
+    sketch_stats["verified_columns"] += verified;
+    if (best == arma::datum::inf)
+    {
+        sketch_stats["step_fallbacks"]++;
+        return false;
+    }
+    gamhat = best;
+    sketch_stats["sketched_steps"]++;
+    return true;
+}
+
+/** Computes the inner products of a new predictor with itself and with all active predictors
+ *
+ * @param new_index Index of the predictor to be added.
+ * @param xtx Output: squared norm of the new predictor.
+ * @param Xtx Output: inner products of the new predictor with the active predictors (in the order of active_pred).
+ */
+void tlars_cpp::cross_products(int new_index, double &xtx, arma::vec &Xtx)
+{
+    if (use_gram)
+    {
+        xtx = gram(new_index, new_index);
+        Xtx = gram.submat(int_list_to_uvec(active_pred), arma::uvec{(arma::uword) new_index});
+        return;
+    }
+    if (use_cache)
+    {
+        if (cache_col[new_index] < 0)
+        {
+            // The predictor was not active before the update of the rows
+            cache_cross_products({new_index});
+            update_stats["computed_columns"]++;
+        }
+        xtx = xtx_cache(new_index, cache_col[new_index]);
+        Xtx = xtx_cache.submat(int_list_to_uvec(active_pred), arma::uvec{(arma::uword) cache_col[new_index]});
+        return;
+    }
+    arma::vec new_X = predictor_col(new_index);
+    arma::mat oldX(new_X.n_elem,count_active_pred);
+    int counter = 0;
+    // Create oldX which is the predictor matrix X of only the active predictors
+    for (std::list<int>::iterator inner_it = active_pred.begin(); inner_it!= active_pred.end(); inner_it++)
+    {
+        oldX.col(counter) = predictor_col(*inner_it);
+        counter++;
+    }
+    arma::vec weighted_new_X = weighted(new_X);
+    xtx = dot(weighted_new_X, new_X);
+    Xtx = (weighted_new_X.t() * oldX).t();
+}
+
+/** Computes the inner products of all predictors with some predictors and appends them to the cached cross-products
+ *
+ * The cross-products are computed with one matrix-matrix product per block of predictors.
+ *
+ * @param cols Indices of the predictors.
+ */
+void tlars_cpp::cache_cross_products(const std::vector<int> &cols)
+{
+    if (cols.empty())
+    {
+        return;
+    }
+    arma::mat cols_X(X.n_rows, cols.size());
+    for (std::size_t index = 0; index < cols.size(); index++)
+    {
+        cols_X.col(index) = X.col(cols[index]);
+    }
+    arma::uword first_cache_col = xtx_cache.n_cols;
+    xtx_cache.resize(p, first_cache_col + cols.size());
+    parallel_columns(p, X.n_rows*cols.size(), [&](int block, int first_col, int last_col)
+    {
+        // Use the memory of the columns of the block without copying them
+        const arma::mat block_X(const_cast<double*>(X.colptr(first_col)), X.n_rows, last_col - first_col, false, true);
+        xtx_cache.submat(first_col, first_cache_col, last_col-1, xtx_cache.n_cols-1) = block_X.t() * cols_X;
+    });
+    for (std::size_t index = 0; index < cols.size(); index++)
+    {
+        cache_col[cols[index]] = first_cache_col + index;
+    }
+}
+
+/** Returns the columns of predictors in the cached cross-products
+ *
+ * @param col_indices Indices of the predictors (all of them must be cached).
+ *
+ * @return Columns of the predictors in xtx_cache.
+ */
+arma::uvec tlars_cpp::cache_indices(const arma::uvec &col_indices)
+{
+    arma::uvec output(col_indices.n_elem);
+    for (arma::uword index = 0; index < col_indices.n_elem; index++)
+    {
+        output(index) = cache_col[col_indices(index)];
+    }
+    return output;
+}
+
+/** Computes the inner products of several new predictors with each other and with all active predictors
+ *
+ * The active and the new predictors are gathered once and multiplied with two matrix-matrix products.
+ *
+ * @param new_indices Indices of the predictors to be added.
+ * @param xtx Output: inner products of the new predictors with each other.
+ * @param Xtx Output: inner products of the active predictors (rows, in the order of active_pred) with the new predictors.
+ */
+void tlars_cpp::cross_products_block(const arma::uvec &new_indices, arma::mat &xtx, arma::mat &Xtx)
+{
+    arma::uvec active_ind = int_list_to_uvec(active_pred);
+    if (use_gram)
+    {
+        xtx = gram.submat(new_indices, new_indices);
+        Xtx = gram.submat(active_ind, new_indices);
+        return;
+    }
+    if (use_cache)
+    {
+        std::vector<int> missing;
+        for (arma::uword index = 0; index < new_indices.n_elem; index++)
+        {
+            if (cache_col[new_indices(index)] < 0)
+            {
+                missing.push_back(new_indices(index));
+            }
+        }
+        // Predictors that were not active before the update of the rows
+        cache_cross_products(missing);
+        update_stats["computed_columns"] += missing.size();
+        arma::uvec new_cache_ind = cache_indices(new_indices);
+        xtx = xtx_cache.submat(new_indices, new_cache_ind);
+        Xtx = xtx_cache.submat(active_ind, new_cache_ind);
+        return;
+    }
+    arma::mat new_X(residuals.n_elem, new_indices.n_elem);
+    for (arma::uword index = 0; index < new_indices.n_elem; index++)
+    {
+        new_X.col(index) = predictor_col(new_indices(index));
+    }
+    arma::mat old_X(residuals.n_elem, active_ind.n_elem);
+    for (arma::uword index = 0; index < active_ind.n_elem; index++)
+    {
+        old_X.col(index) = predictor_col(active_ind(index));
+    }
+    arma::mat weighted_new_X = new_X;
+    if (use_view && !unit_weights)
+    {
+        weighted_new_X.each_col() %= row_weights;
+    }
+    xtx = weighted_new_X.t() * new_X;
+    Xtx = old_X.t() * weighted_new_X;
+}
+
+/** Computes the inner products of all predictors with a vector
+ *
+ * For objects on a shared predictor matrix, the products are computed with an indexed kernel that only
+ * touches the used rows, weights every row by its multiplicity and applies centering and scaling on the fly.
+ * The predictors are split into contiguous blocks that are processed by n_threads threads.
+ *
+ * @param v Vector with one entry per (used) row.
+ *
+ * @return Vector X'v with one entry per predictor.
+ */
+arma::vec tlars_cpp::predictor_tdot(const arma::vec &v)
+{
+    const arma::mat &base_X = use_view ? *shared_X : X;
+    arma::vec output(p);
+    if (!use_view)
+    {
+        parallel_columns(p, base_X.n_rows, [&](int block, int first_col, int last_col)
+        {
+            // Use the memory of the columns of the block without copying them (the columns before shared_cols are
+            // read from the shared block)
+            int split_col = std::min(std::max(first_col, shared_cols), last_col);
+            if (first_col < split_col)
+            {
+                const arma::mat block_X(const_cast<double*>(shared_block->colptr(first_col)), base_X.n_rows, split_col - first_col, false, true);
+                output.subvec(first_col, split_col-1) = (v.t() * block_X).t();
+            }
+            if (split_col < last_col)
+            {
+                const arma::mat block_X(const_cast<double*>(base_X.colptr(split_col - shared_cols)), base_X.n_rows, last_col - split_col, false, true);
+                output.subvec(split_col, last_col-1) = (v.t() * block_X).t();
+            }
+        });
+        return output;
+    }
+    arma::vec weighted_v = weighted(v);
+    double sum_v = arma::accu(weighted_v);
+    arma::uword num_rows = rows.n_elem;
+    if (all_rows || 4*num_rows >= base_X.n_rows)
+    {
+        // Dense subsets: scatter v into a vector over all rows and let BLAS stream X once
+        arma::vec full_v;
+        if (all_rows)
+        {
+            full_v = weighted_v;
+        }
+        else
+        {
+            full_v = arma::zeros<arma::vec>(base_X.n_rows);
+            full_v.elem(rows) = weighted_v;
+        }
+        parallel_columns(p, base_X.n_rows, [&](int block, int first_col, int last_col)
+        {
+            // Use the memory of the columns of the block without copying them
+            const arma::mat block_X(const_cast<double*>(base_X.colptr(first_col)), base_X.n_rows, last_col - first_col, false, true);
+            output.subvec(first_col, last_col-1) = (full_v.t() * block_X).t();
+        });
+    }
+    else
+    {
+        // Sparse subsets: gather the used rows of every column
+        parallel_columns(p, num_rows, [&](int block, int first_col, int last_col)
+        {
+            for (int col_index = first_col; col_index < last_col; col_index++)
+            {
+                const double *col_ptr = base_X.colptr(col_index);
+                double sum = 0;
+                for (arma::uword row_index = 0; row_index < num_rows; row_index++)
+                {
+                    sum += col_ptr[rows(row_index)] * weighted_v(row_index);
+                }
+                output(col_index) = sum;
+            }
+        });
+    }
+    return (output - col_center*sum_v)/col_scale;
+}
+
+/** Processes contiguous blocks of columns in parallel
+ *
+ * The columns 0, ..., num_cols-1 are split into at most n_threads contiguous blocks of (almost) equal size. The
+ * blocks only depend on num_cols, work_per_col and n_threads, so reductions that combine per-block results in
+ * block order are deterministic. Problems that are too small to benefit from threads run in the calling thread.
+ *
+ * @param num_cols Number of columns.
+ * @param work_per_col Approximate number of floating point operations per column.
+ * @param body Function that is called with the index of the block and its first and one-past-last column.
+ *
+ * @return Number of blocks.
+ */
+int tlars_cpp::parallel_columns(int num_cols, double work_per_col, const std::function<void(int, int, int)> &body)
+{
+    const double min_work_per_thread = 32768;
+    int num_blocks = (int) std::min<double>(n_threads, std::max(1.0, num_cols*work_per_col/min_work_per_thread));
+    num_blocks = std::max(1, std::min(num_blocks, num_cols));
+    if (num_blocks == 1)
+    {
+        body(0, 0, num_cols);
+        return num_blocks;
+    }
+
+    std::exception_ptr error;
+    std::mutex error_mutex;
+    auto worker = [&](int block)
+    {
+        try
+        {
+            body(block, (int) ((long long) num_cols*block/num_blocks), (int) ((long long) num_cols*(block+1)/num_blocks));
+        }
+        catch (...)
+        {
+            std::lock_guard<std::mutex> lock(error_mutex);
+            if (!error)
+            {
+                error = std::current_exception();
+            }
+        }
+    };
+
+    std::vector<std::thread> threads;
+    for (int block = 1; block < num_blocks; block++)
+    {
+        threads.emplace_back(worker, block);
+    }
+    worker(0);
+    for (std::thread &thread : threads)
+    {
+        thread.join();
+    }
+    if (error)
+    {
+        std::rethrow_exception(error);
+    }
+    return num_blocks;
+}
+
+/** Returns a (centered and standardized) predictor
+ *
+ * @param col_index Index of the predictor.
+ *
+ * @return Predictor with one entry per (used) row.
+ */
+arma::vec tlars_cpp::predictor_col(int col_index)
+{
+    if (!use_view)
+    {
+        return col_index < shared_cols ? shared_block->col(col_index) : X.col(col_index - shared_cols);
+    }
+    if (all_rows)
+    {
+        return (shared_X->col(col_index) - col_center(col_index))/col_scale(col_index);
+    }
+    arma::vec x_col = shared_X->col(col_index);
+    return (x_col.elem(rows) - col_center(col_index))/col_scale(col_index);
+}
+
+/** Multiplies a vector with the row multiplicities
+ *
+ * @param v Vector with one entry per (used) row.
+ *
+ * @return v weighted by the multiplicity of every row.
+ */
+arma::vec tlars_cpp::weighted(const arma::vec &v)
+{
+    if (!use_view || unit_weights)
+    {
+        return v;
+    }
+    return row_weights % v;
+}
+
+/** Repeats every entry of a vector according to the multiplicity of its row
+ *
+ * @param v Vector with one entry per (used) row.
+ *
+ * @return Vector with one entry per observation.
+ */
+arma::vec tlars_cpp::expand_rows(const arma::vec &v)
+{
+    if (unit_weights || v.n_elem != rows.n_elem)
+    {
+        return v;
+    }
+    arma::vec output(n);
+    arma::uword index = 0;
+    for (arma::uword row_index = 0; row_index < rows.n_elem; row_index++)
+    {
+        for (int rep = 0; rep < (int) row_weights(row_index); rep++)
+        {
+            output(index) = v(row_index);
+            index++;
+        }
+    }
+    return output;
+}
+
 /** Add a predictor to the Cholesky-decomposition of the active data
  *
- * @param new_X Predictor to be added.
- * @param old_X Matrix containing all active predictors.
+ * @param xtx Squared norm of the predictor to be added.
+ * @param Xtx Inner products of the predictor to be added with all active predictors.
  */
-void tlars_cpp::update_decomp(arma::mat new_X, arma::mat old_X)
+void tlars_cpp::update_decomp(double xtx, arma::vec Xtx)
 {
-    double xtx=0;
     double norm_xnew;
     int dim = active_data_decomp.n_cols;
     int j;
-    for(j=0; j<n; j++)
-    {
-        xtx = xtx + pow(new_X(j),2);
-    }
     norm_xnew= sqrt(xtx);
     if(active_data_rank == 0)
     {
-        active_data_rank = 1;
-        active_data_decomp(0,0) = norm_xnew;
+        // Check for machine singularity (a zero pivot would break all later triangular solves)
+        if(xtx > machine_prec)
+        {
+            active_data_rank = 1;
+            active_data_decomp(0,0) = norm_xnew;
+        }
     }
     else
     {
-        arma::vec Xtx = (new_X.t() * old_X).t();
         arma::vec r;
         r = solve_lower_triangular(active_data_decomp.t(), Xtx);
         double rpp = pow(norm_xnew, 2);
@@ -872,6 +2640,84 @@ void tlars_cpp::update_decomp(arma::mat new_X, arma::mat old_X)
 
 }
 
+/** Adds several new predictors to the Cholesky decomposition at once
+ *
+ * With the factor R of the active predictors, the factor of the extended set is [R S; 0 R22] with S = R'^(-1) X_A'X_new
+ * (one triangular solve for all new predictors) and R22 the factor of the Schur complement X_new'X_new - S'S. The
+ * Schur complement is factorized column by column in the order of new_indices: a new predictor whose squared pivot is
+ * not larger than machine_prec (the rule of update_decomp()) or than the rounding error of the block, i.e.,
+ * (number of predictors)*epsilon times its squared norm, depends linearly on the active and the previous new
+ * predictors and is left out. The rule also applies to the first predictor of an empty model, so no pivot of the
+ * factor is zero.
+ *
+ * @param new_pred Indices of the predictors to be added.
+ *
+ * @return TRUE for every new predictor that was added and FALSE for linearly dependent ones.
+ */
+std::vector<bool> tlars_cpp::update_decomp_block(const std::list<int> &new_pred)
+{
+    arma::uvec new_indices = int_list_to_uvec(new_pred);
+    int num_new = new_indices.n_elem;
+    arma::mat xtx, Xtx;
+    cross_products_block(new_indices, xtx, Xtx);
+
+    arma::mat S;
+    arma::mat schur = xtx;
+    if (active_data_rank > 0)
+    {
+        S = arma::solve(arma::trimatl(active_data_decomp.t()), Xtx);
+        schur = schur - S.t()*S;
+    }
+
+    // Factorize the Schur complement and check the rank of every new predictor
+    std::vector<bool> independent(num_new, false);
+    arma::uvec added(num_new);
+    arma::mat R22(num_new, num_new, arma::fill::zeros);
+    int num_added = 0;
+    for (int col_index = 0; col_index < num_new; col_index++)
+    {
+        arma::vec r;
+        double rpp = schur(col_index, col_index);
+        if (num_added > 0)
+        {
+            arma::uvec prev = added.head(num_added);
+            r = arma::solve(arma::trimatl(R22.submat(0, 0, num_added-1, num_added-1).t()), schur.submat(prev, arma::uvec{(arma::uword) col_index}));
+            rpp = rpp - dot(r, r);
+        }
+        // Check for machine singularity
+        double tolerance = (active_data_rank + num_new)*std::numeric_limits<double>::epsilon()*xtx(col_index, col_index);
+        if (rpp <= std::max(machine_prec, tolerance))
+        {
+            continue;
+        }
+        if (num_added > 0)
+        {
+            R22.submat(0, num_added, num_added-1, num_added) = r;
+        }
+        R22(num_added, num_added) = sqrt(rpp);
+        added(num_added) = col_index;
+        independent[col_index] = true;
+        num_added++;
+    }
+    if (num_added == 0)
+    {
+        return independent;
+    }
+
+    // Assemble the extended factor
+    int dim = active_data_rank;
+    arma::mat decomp(dim + num_added, dim + num_added, arma::fill::zeros);
+    if (dim > 0)
+    {
+        decomp.submat(0, 0, dim-1, dim-1) = active_data_decomp.submat(0, 0, dim-1, dim-1);
+        decomp.submat(0, dim, dim-1, dim + num_added-1) = S.cols(added.head(num_added));
+    }
+    decomp.submat(dim, dim, dim + num_added-1, dim + num_added-1) = R22.submat(0, 0, num_added-1, num_added-1);
+    active_data_decomp = decomp;
+    active_data_rank = dim + num_added;
+    return independent;
+}
+
 /** Remove a variable from the Cholesky decomposition
  *
  * @param removal_index Index of the variable to be removed.
@@ -1039,3 +2885,40 @@ arma::vec tlars_cpp::int_list_to_vector(std::list<int> int_list)
     }
     return output;
 }
+
+/** Converts a std::list<int> into an arma::uvec of indices
+ *
+ * @param int_list A std::list<int>.
+ *
+ * @return Transformed list of type arma::uvec.
+ */
+arma::uvec tlars_cpp::int_list_to_uvec(std::list<int> int_list)
+{
+    arma::uvec output(int_list.size());
+    arma::uword index = 0;
+    for (std::list<int>::iterator list_it = int_list.begin(); list_it!= int_list.end(); list_it++)
+    {
+        output(index) = *list_it;
+        index++;
+    }
+    return output;
+}
+
+/** Computes the residual sum of squares of the current beta from the Gram matrix
+ *
+ * RSS = y'y - 2 beta'X'y + beta'X'X beta, evaluated on the active predictors only.
+ *
+ * @return RSS
+ */
+double tlars_cpp::gram_rss()
+{
+    arma::uvec active_ind = int_list_to_uvec(active_pred);
+    arma::vec beta_active(active_ind.n_elem);
+    for (arma::uword index = 0; index < active_ind.n_elem; index++)
+    {
+        beta_active(index) = beta_state.back()[active_ind(index)];
+    }
+    double rss = ssy - 2*dot(beta_active, gram_xty.elem(active_ind))
+                 + as_scalar(beta_active.t() * gram.submat(active_ind, active_ind) * beta_active);
+    return std::max(rss, 0.0);
+}
@@ -5,11 +5,15 @@
 
 #include <vector>
 #include <list>
+#include <map>
 #include <string>
+#include <memory>
+#include <functional>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <pybind11/numpy.h>
 #include "carma_helper.h"
+#include "tlars_design.h"
 
 namespace py = pybind11;
 
@@ -24,14 +28,21 @@ public:
 
     // Constructors
     tlars_cpp(arma::mat X, arma::vec y, bool verbose, bool intercept, bool standardize, int num_dummies, std::string type);
+    tlars_cpp(arma::mat XtX, arma::vec Xty, double yty, int n, arma::vec col_sums, double y_sum, bool verbose, bool intercept, bool standardize, int num_dummies, std::string type);
+    tlars_cpp(std::shared_ptr<const arma::mat> shared_X, arma::vec y, arma::uvec rows, arma::vec row_weights, bool verbose, bool intercept, bool standardize, int num_dummies, std::string type);
+    tlars_cpp(std::shared_ptr<const prepared_design> design, arma::vec y, bool verbose, int num_dummies, std::string type);
+    tlars_cpp(std::shared_ptr<const prepared_design> design, arma::mat own_X, arma::vec y, bool verbose, std::string type);
     tlars_cpp(py::dict lars_state);
 
     // Methods
-    void execute_lars_step(int T_stop, bool early_stop);
+    void execute_lars_step(int T_stop, bool early_stop, int num_steps = -1);
+    void update_rows(arma::mat X_new, arma::vec y_new, int T_stop, bool early_stop);
+    void set_shared_block(std::shared_ptr<const arma::mat> block, const double *own_data);
 
     // Output Getters
     std::vector<double> get_beta();
     std::list<std::vector<double>> get_beta_path();
+    arma::mat get_beta_path_columns(arma::uvec cols);
     int get_num_active();
     int get_num_active_dummies();
     int get_num_dummies();
@@ -45,7 +56,17 @@ public:
     double get_mean_y();
     arma::vec get_norm_X();
     arma::vec get_mean_X();
-    py::dict get_all();
+    py::dict get_all(bool include_shared = true);
+    std::list<int> get_active_pred();
+    int get_n_threads();
+    void set_n_threads(int n_threads);
+    std::string get_history();
+    void set_history(std::string history);
+    std::map<std::string, std::size_t> get_memory_usage();
+    py::dict get_checkpoint_delta(int since_step, int since_action, int since_ignored = -1);
+    void set_sketch(int rows, double confidence, int max_verified, int seed);
+    std::map<std::string, long long> get_sketch_stats();
+    std::map<std::string, long long> get_update_stats();
 
     // State variables
     arma::mat X;
@@ -62,15 +83,43 @@ private:
 
     // Methods
     void initialize_values();
+    void initialize_values(arma::vec Xty, double yty, arma::vec col_sums, double y_sum);
+    void initialize_values(arma::vec y_full, std::shared_ptr<const prepared_design> design);
+    void initialize_values(std::shared_ptr<const prepared_design> design);
     void initialize_values(py::dict lars_state);
-    void update_decomp(arma::mat new_X, arma::mat old_X);
+    void initialize_path();
+    void reset_path();
+    void update_row_statistics(const arma::mat &X_new, const arma::vec &y_new);
+    void update_gram_statistics(const arma::mat &X_new, const arma::vec &y_new);
+    void cache_cross_products(const std::vector<int> &cols);
+    arma::uvec cache_indices(const arma::uvec &col_indices);
+    arma::vec stored_scale();
+    void drop_ignored_pred();
+    arma::vec predictor_tdot(const arma::vec &v);
+    int parallel_columns(int num_cols, double work_per_col, const std::function<void(int, int, int)> &body);
+    arma::vec predictor_col(int col_index);
+    double predictor_dot(int col_index, const arma::vec &v);
+    arma::vec sketch_vector(const arma::vec &v);
+    void sketch_correlations();
+    bool sketch_step_size(double corr_max_inactive, double A_step);
+    arma::vec weighted(const arma::vec &v);
+    arma::vec expand_rows(const arma::vec &v);
+    void cross_products(int new_index, double &xtx, arma::vec &Xtx);
+    void cross_products_block(const arma::uvec &new_indices, arma::mat &xtx, arma::mat &Xtx);
+    void update_decomp(double xtx, arma::vec Xtx);
+    std::vector<bool> update_decomp_block(const std::list<int> &new_pred);
     void remove_var_from_decomp(int removal_index);
     arma::vec solve_upper_triangular(arma::mat upperT_X, arma::vec vec_b);
     arma::vec solve_lower_triangular(arma::mat lowerT_X, arma::vec vec_b);
     arma::mat cholesky_decomp(arma::mat square_matrix);
     arma::vec double_list_to_vector(std::list<double> double_list);
     arma::vec int_list_to_vector(std::list<int> int_list);
+    arma::uvec int_list_to_uvec(std::list<int> int_list);
+    double gram_rss();
     void update_df();
+    void store_lambda(double value);
+    void record_history();
+    void record_delta();
 
     // State variables
     int n;
@@ -134,6 +183,45 @@ private:
     double machine_prec;
     std::list<int> actions;
     std::list<int> df;
+    bool use_gram;
+    arma::mat gram;
+    arma::vec gram_xty;
+    bool use_view;
+    std::shared_ptr<const arma::mat> shared_X;
+    arma::uvec rows;
+    arma::vec row_weights;
+    bool all_rows;
+    bool unit_weights;
+    arma::vec col_center;
+    arma::vec col_scale;
+    int n_threads = 1;
+    std::string history = "full";
+    int lambda_start = 0;
+    std::list<std::vector<int>> knot_indices;
+    std::list<std::vector<double>> knot_values;
+    int delta_first_step = -1;
+    std::list<std::vector<int>> delta_indices;
+    std::list<std::vector<double>> delta_values;
+    int delta_ignored_base = -1;
+    std::vector<int> delta_ignored;
+    int sketch_rows = 0;
+    double sketch_confidence = 4;
+    int sketch_max_verified = 1;
+    arma::mat sketch_X;
+    arma::uvec sketch_bucket;
+    arma::vec sketch_sign;
+    arma::vec sketch_col_norms;
+    arma::vec sketch_corr;
+    double sketch_corr_err = 0;
+    std::vector<bool> corr_known;
+    bool corr_exact = true;
+    std::map<std::string, long long> sketch_stats;
+    std::shared_ptr<const arma::mat> shared_block;
+    int shared_cols = 0;
+    bool use_cache = false;
+    arma::mat xtx_cache;
+    std::vector<int> cache_col;
+    std::map<std::string, long long> update_stats;
 };
 
 #endif /* tlars_cpp_h */
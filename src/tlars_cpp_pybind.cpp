@@ -3,26 +3,82 @@
 #include <pybind11/numpy.h>
 #include "carma_helper.h"
 #include "tlars_cpp.h"
+#include "tlars_batch.h"
+#include "tlars_design.h"
+#include "tlars_threads.h"
 
 namespace py = pybind11;
 
 PYBIND11_MODULE(tlars_cpp, m) {
     m.doc() = "Python bindings for the tlars C++ implementation";
 
+    py::class_<prepared_design, std::shared_ptr<prepared_design>>(m, "prepared_design")
+        // Constructors
+        .def(py::init([](py::array_t<double> X, bool intercept, bool standardize) {
+            return std::make_shared<prepared_design>(carma::arr_to_mat(X, true), intercept, standardize);
+        }), py::arg("X"), py::arg("intercept"), py::arg("standardize"))
+
+        // Properties
+        .def_property_readonly("n_rows", [](prepared_design& self) { return self.X->n_rows; })
+        .def_property_readonly("n_cols", [](prepared_design& self) { return self.X->n_cols; })
+        .def_property_readonly("mean_x", [](prepared_design& self) { return carma::col_to_arr(self.mean_x, true); })
+        .def_property_readonly("norm_x", [](prepared_design& self) { return carma::col_to_arr(self.norm_x, true); })
+        .def_readonly("ignored_pred", &prepared_design::ignored_pred)
+        .def_readonly("count_ignored_pred", &prepared_design::count_ignored_pred)
+        .def_readonly("intercept", &prepared_design::intercept)
+        .def_readonly("standardize", &prepared_design::standardize)
+        .def_property_readonly("X", [](std::shared_ptr<prepared_design> self) {
+            // Read-only view of the preprocessed predictors that keeps the design alive
+            const arma::mat &X = *self->X;
+            std::vector<py::ssize_t> shape = {(py::ssize_t) X.n_rows, (py::ssize_t) X.n_cols};
+            std::vector<py::ssize_t> strides = {(py::ssize_t) sizeof(double), (py::ssize_t) (sizeof(double)*X.n_rows)};
+            py::array_t<double> view(shape, strides, X.memptr(), py::cast(self));
+            py::detail::array_proxy(view.ptr())->flags &= ~py::detail::npy_api::NPY_ARRAY_WRITEABLE_;
+            return view;
+        });
+
     py::class_<tlars_cpp>(m, "tlars_cpp")
         // Constructors
         .def(py::init([](py::array_t<double> X, py::array_t<double> y, bool verbose, bool intercept, bool standardize, int num_dummies, std::string type) {
             return new tlars_cpp(carma::arr_to_mat(X), carma::arr_to_col(y), verbose, intercept, standardize, num_dummies, type);
         }), py::arg("X"), py::arg("y"), py::arg("verbose"), py::arg("intercept"), py::arg("standardize"), py::arg("num_dummies"), py::arg("type"))
         
+        .def(py::init([](std::shared_ptr<prepared_design> design, py::array_t<double> y, bool verbose, int num_dummies, std::string type) {
+            return new tlars_cpp(design, carma::arr_to_col(y), verbose, num_dummies, type);
+        }), py::arg("design"), py::arg("y"), py::arg("verbose"), py::arg("num_dummies"), py::arg("type"))
+
+        .def(py::init([](std::shared_ptr<prepared_design> design, py::array_t<double> own_X, py::array_t<double> y, bool verbose, std::string type) {
+            return new tlars_cpp(design, carma::arr_to_mat(own_X, true), carma::arr_to_col(y, true), verbose, type);
+        }), py::arg("design"), py::arg("own_X"), py::arg("y"), py::arg("verbose"), py::arg("type"))
+
         .def(py::init<py::dict>())
 
+        .def_static("from_gram", [](py::array_t<double> XtX, py::array_t<double> Xty, double yty, int n, py::array_t<double> col_sums, double y_sum, bool verbose, bool intercept, bool standardize, int num_dummies, std::string type) {
+            return new tlars_cpp(carma::arr_to_mat(XtX), carma::arr_to_col(Xty), yty, n, carma::arr_to_col(col_sums), y_sum, verbose, intercept, standardize, num_dummies, type);
+        }, py::arg("XtX"), py::arg("Xty"), py::arg("yty"), py::arg("n"), py::arg("col_sums"), py::arg("y_sum"), py::arg("verbose"), py::arg("intercept"), py::arg("standardize"), py::arg("num_dummies"), py::arg("type"))
+
         // Methods
-        .def("execute_lars_step", &tlars_cpp::execute_lars_step)
+        .def("execute_lars_step", &tlars_cpp::execute_lars_step, py::arg("T_stop"), py::arg("early_stop"), py::arg("num_steps") = -1,
+             py::call_guard<py::gil_scoped_release>())
+        .def("set_shared_block", [](tlars_cpp& self, std::shared_ptr<prepared_design> design, py::array_t<double, py::array::f_style | py::array::forcecast> own_X) {
+            if (own_X.ndim() != 2 || (arma::uword) own_X.shape(0) != design->X->n_rows
+                || (arma::uword) own_X.shape(1) + design->X->n_cols != self.get_norm_X().n_elem)
+            {
+                throw std::invalid_argument("'own_X' must contain the predictors of the object after the ones of the design.");
+            }
+            self.set_shared_block(design->X, own_X.data());
+        }, py::arg("design"), py::arg("own_X"))
+        .def("update_rows", [](tlars_cpp& self, py::array_t<double> X_new, py::array_t<double> y_new, int T_stop, bool early_stop) {
+            arma::mat X_mat = carma::arr_to_mat(X_new, true);
+            arma::vec y_vec = carma::arr_to_col(y_new, true);
+            py::gil_scoped_release release;
+            self.update_rows(X_mat, y_vec, T_stop, early_stop);
+        }, py::arg("X_new"), py::arg("y_new"), py::arg("T_stop"), py::arg("early_stop"))
 
         // Output Getters
         .def("get_beta", &tlars_cpp::get_beta)
         .def("get_beta_path", &tlars_cpp::get_beta_path)
+        .def("get_beta_path_columns", [](tlars_cpp& self, py::array_t<arma::uword> cols) { return carma::mat_to_arr(self.get_beta_path_columns(carma::arr_to_col(cols))); })
         .def("get_num_active", &tlars_cpp::get_num_active)
         .def("get_num_active_dummies", &tlars_cpp::get_num_active_dummies)
         .def("get_num_dummies", &tlars_cpp::get_num_dummies)
@@ -36,20 +92,94 @@ PYBIND11_MODULE(tlars_cpp, m) {
         .def("get_norm_X", [](tlars_cpp& self) { return carma::col_to_arr(self.get_norm_X()); })
         .def("get_mean_X", [](tlars_cpp& self) { return carma::col_to_arr(self.get_mean_X()); })
         .def("get_mean_y", &tlars_cpp::get_mean_y)
-        .def("get_all", &tlars_cpp::get_all)
+        .def("get_all", &tlars_cpp::get_all, py::arg("include_shared") = true)
+        .def("get_memory_usage", &tlars_cpp::get_memory_usage)
+        .def("get_checkpoint_delta", &tlars_cpp::get_checkpoint_delta, py::arg("since_step"), py::arg("since_action"), py::arg("since_ignored") = -1)
+        .def("set_sketch", &tlars_cpp::set_sketch, py::arg("rows"), py::arg("confidence"), py::arg("max_verified"), py::arg("seed"))
+        .def("get_sketch_stats", &tlars_cpp::get_sketch_stats)
+        .def("get_update_stats", &tlars_cpp::get_update_stats)
 
         // Properties
         .def_property("X", 
-            [](tlars_cpp& self) { return carma::mat_to_arr(self.X); },
+            [](tlars_cpp& self) { return carma::mat_to_arr(self.X, true); },
             [](tlars_cpp& self, py::array_t<double> X) { self.X = carma::arr_to_mat(X); }
         )
         .def_property("y",
-            [](tlars_cpp& self) { return carma::col_to_arr(self.y); },
+            [](tlars_cpp& self) { return carma::col_to_arr(self.y, true); },
             [](tlars_cpp& self, py::array_t<double> y) { self.y = carma::arr_to_col(y); }
         )
         .def_readwrite("verbose", &tlars_cpp::verbose)
         .def_readwrite("intercept", &tlars_cpp::intercept)
         .def_readwrite("standardize", &tlars_cpp::standardize)
         .def_readwrite("num_dummies", &tlars_cpp::num_dummies)
-        .def_readwrite("type", &tlars_cpp::type);
+        .def_readwrite("type", &tlars_cpp::type)
+        .def_property("n_threads", &tlars_cpp::get_n_threads, &tlars_cpp::set_n_threads)
+        .def_property("history", &tlars_cpp::get_history, &tlars_cpp::set_history);
+
+    // Batch functions
+    m.def("subsample_selection_counts", [](py::array_t<double> X, py::array_t<double> y, py::array_t<arma::uword> rows, py::array_t<double> row_weights, py::array_t<arma::uword> offsets,
+                                           int T_stop, bool early_stop, bool intercept, bool standardize, int num_dummies, std::string type, int n_threads) {
+        std::shared_ptr<const arma::mat> shared_X = std::make_shared<const arma::mat>(carma::arr_to_mat(X));
+        arma::vec y_vec = carma::arr_to_col(y);
+        arma::uvec rows_vec = carma::arr_to_col(rows);
+        arma::vec weights_vec = carma::arr_to_col(row_weights);
+        arma::uvec offsets_vec = carma::arr_to_col(offsets);
+        arma::uvec counts;
+        {
+            py::gil_scoped_release release;
+            counts = subsample_selection_counts(shared_X, y_vec, rows_vec, weights_vec, offsets_vec, T_stop, early_stop, intercept, standardize, num_dummies, type, n_threads);
+        }
+        return carma::col_to_arr(counts);
+    }, py::arg("X"), py::arg("y"), py::arg("rows"), py::arg("row_weights"), py::arg("offsets"), py::arg("T_stop"), py::arg("early_stop"),
+       py::arg("intercept"), py::arg("standardize"), py::arg("num_dummies"), py::arg("type"), py::arg("n_threads"));
+
+    m.def("continue_experiments", [](std::vector<tlars_cpp*> models, int T_stop, int n_threads, bool early_stop) {
+        arma::umat snapshot;
+        {
+            py::gil_scoped_release release;
+            snapshot = continue_experiments(models, T_stop, n_threads, early_stop);
+        }
+        return carma::mat_to_arr(snapshot);
+    }, py::arg("models"), py::arg("T_stop"), py::arg("n_threads"), py::arg("early_stop") = true);
+    m.def("restore_experiments", [](py::list states, py::object shared_block, py::list own_blocks, int n_threads) {
+        // The states are converted while holding the GIL, the predictors are copied in parallel without it
+        std::shared_ptr<const arma::mat> block = std::make_shared<const arma::mat>();
+        if (!shared_block.is_none())
+        {
+            py::array_t<double> block_arr = shared_block.cast<py::array_t<double>>();
+            block = std::make_shared<const arma::mat>(carma::arr_to_mat(block_arr, true));
+        }
+        std::vector<std::unique_ptr<tlars_cpp>> restored;
+        std::vector<py::array_t<double, py::array::f_style | py::array::forcecast>> blocks;
+        std::vector<tlars_cpp*> models;
+        std::vector<const double*> own_data;
+        for (std::size_t index = 0; index < states.size(); index++)
+        {
+            restored.emplace_back(new tlars_cpp(states[index].cast<py::dict>()));
+            if (!own_blocks[index].is_none())
+            {
+                blocks.push_back(own_blocks[index].cast<py::array_t<double, py::array::f_style | py::array::forcecast>>());
+                models.push_back(restored.back().get());
+                own_data.push_back(blocks.back().data());
+            }
+        }
+        {
+            py::gil_scoped_release release;
+            attach_shared_block(models, block, own_data, n_threads);
+        }
+        py::list result;
+        for (std::unique_ptr<tlars_cpp> &model : restored)
+        {
+            result.append(py::cast(model.release(), py::return_value_policy::take_ownership));
+        }
+        return result;
+    }, py::arg("states"), py::arg("shared_block"), py::arg("own_blocks"), py::arg("n_threads"));
+    m.def("occurrence_counts", [](std::vector<tlars_cpp*> models, int T_max) {
+        return carma::mat_to_arr(occurrence_counts(models, T_max));
+    }, py::arg("models"), py::arg("T_max"));
+
+    // Thread control of the BLAS library
+    m.def("blas_threading_library", &blas_threading_library);
+    m.def("blas_get_num_threads", &blas_get_num_threads);
+    m.def("blas_set_num_threads", &blas_set_num_threads, py::arg("n_threads"));
 } 
\ No newline at end of file
@@ -0,0 +1,84 @@
+//  tlars_design.cpp
+
+#include "tlars_design.h"
+#include <limits>
+
+
+
+// Constructors
+
+/** Constructor for a new prepared_design-object
+ *
+ * Centers (if intercept is TRUE) and standardizes (if standardize is TRUE) the predictor matrix once.
+ *
+ * @param X Real valued Predictor matrix.
+ * @param intercept Logical. If TRUE an intercept is included.
+ * @param standardize Logical. If TRUE the predictors are standardized.
+ */
+prepared_design::prepared_design(arma::mat X, bool intercept, bool standardize)
+{
+    this->intercept = intercept;
+    this->standardize = standardize;
+    count_ignored_pred = preprocess(X, intercept, standardize, mean_x, norm_x, ignored_pred);
+    this->X = std::make_shared<const arma::mat>(std::move(X));
+}
+
+
+
+// Methods
+
+/** Centers and standardizes a predictor matrix in place
+ *
+ * If intercept is TRUE, the column means are removed. If standardize is TRUE, every column is scaled to unit norm,
+ * except for columns whose norm is below the threshold epsilon: these predictors are marked as ignored and
+ * left unscaled.
+ *
+ * @param X Predictor matrix that is modified in place.
+ * @param intercept Logical. If TRUE the column means are removed.
+ * @param standardize Logical. If TRUE the columns are scaled to unit norm.
+ * @param mean_x Output: column means of X.
+ * @param norm_x Output: column norms of the (centered) X.
+ * @param ignored_pred Output: TRUE for predictors with (numerically) zero variance.
+ *
+ * @return Number of ignored predictors.
+ */
+int prepared_design::preprocess(arma::mat &X, bool intercept, bool standardize, arma::vec &mean_x, arma::vec &norm_x, std::vector<bool> &ignored_pred)
+{
+    int n = X.n_rows;
+    int p = X.n_cols;
+    double machine_prec = std::numeric_limits<float>::denorm_min();
+
+    // if intercept is true, remove the mean in the data X
+    mean_x = arma::mean(X, 0).t();
+    if (intercept)
+    {
+        X.each_row() -= mean_x.t();
+    }
+
+    // If standardize is true:
+    // 1. If the variance of the signal is below the threshold epsilon, the predictor is ignored.
+    // 2. The signal is standardized.
+    int count_ignored_pred = 0;
+    ignored_pred = std::vector<bool>(p, false);
+    norm_x = arma::ones<arma::vec>(p);
+    if (standardize)
+    {
+        arma::rowvec scale = arma::ones<arma::rowvec>(p);
+        for (int i = 0; i < p; i++)
+        {
+            norm_x(i) = sqrt(arma::dot(X.col(i), X.col(i)));
+            if (norm_x(i)/sqrt(n) < machine_prec)
+            {
+                norm_x(i) = machine_prec*sqrt(n);
+                ignored_pred[i] = true;
+                count_ignored_pred++;
+            }
+            else
+            {
+                scale(i) = norm_x(i);
+            }
+        }
+        X.each_row() /= scale;
+    }
+    return count_ignored_pred;
+}
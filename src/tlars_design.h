@@ -0,0 +1,37 @@
+// tlars_design.h
+
+#ifndef tlars_design_H
+#define tlars_design_H
+
+#include <vector>
+#include <memory>
+#include "carma_helper.h"
+
+/**
+ * Class that holds a preprocessed (centered and standardized) predictor matrix.
+ *
+ * The preprocessing is carried out once and the matrix is shared read-only by all tlars_cpp objects that are
+ * created from the same prepared_design, e.g., for different responses or in different threads.
+ */
+
+class prepared_design
+{
+public:
+
+    // Constructors
+    prepared_design(arma::mat X, bool intercept, bool standardize);
+
+    // Methods
+    static int preprocess(arma::mat &X, bool intercept, bool standardize, arma::vec &mean_x, arma::vec &norm_x, std::vector<bool> &ignored_pred);
+
+    // State variables
+    std::shared_ptr<const arma::mat> X;
+    bool intercept;
+    bool standardize;
+    arma::vec mean_x;
+    arma::vec norm_x;
+    std::vector<bool> ignored_pred;
+    int count_ignored_pred;
+};
+
+#endif /* tlars_design_h */
@@ -0,0 +1,83 @@
+//  tlars_threads.cpp
+
+#include "tlars_threads.h"
+
+// The BLAS library is only known at link time (OpenBLAS and MKL are the common builds). Their thread controls are
+// declared as weak symbols, which resolve to null if the linked BLAS library does not provide them.
+#if defined(__GNUC__) || defined(__clang__)
+#define TLARS_WEAK_BLAS_SYMBOLS
+extern "C"
+{
+    void openblas_set_num_threads(int num_threads) __attribute__((weak));
+    int openblas_get_num_threads(void) __attribute__((weak));
+    void MKL_Set_Num_Threads(int num_threads) __attribute__((weak));
+    int MKL_Get_Max_Threads(void) __attribute__((weak));
+}
+#endif
+
+
+
+/** Returns the name of the BLAS library whose threads can be controlled
+ *
+ * @return "openblas", "mkl" or an empty string if the threads of the linked BLAS library cannot be controlled.
+ */
+std::string blas_threading_library()
+{
+#ifdef TLARS_WEAK_BLAS_SYMBOLS
+    if (openblas_set_num_threads && openblas_get_num_threads)
+    {
+        return "openblas";
+    }
+    if (MKL_Set_Num_Threads && MKL_Get_Max_Threads)
+    {
+        return "mkl";
+    }
+#endif
+    return "";
+}
+
+/** Returns the number of threads of the BLAS library
+ *
+ * @return Number of threads or -1 if the threads of the linked BLAS library cannot be controlled.
+ */
+int blas_get_num_threads()
+{
+#ifdef TLARS_WEAK_BLAS_SYMBOLS
+    std::string library = blas_threading_library();
+    if (library == "openblas")
+    {
+        return openblas_get_num_threads();
+    }
+    if (library == "mkl")
+    {
+        return MKL_Get_Max_Threads();
+    }
+#endif
+    return -1;
+}
+
+/** Sets the number of threads of the BLAS library
+ *
+ * The setting is global for the process, i.e., it also applies to other modules using the same BLAS library.
+ *
+ * @param n_threads Number of threads.
+ *
+ * @return False if the threads of the linked BLAS library cannot be controlled.
+ */
+bool blas_set_num_threads(int n_threads)
+{
+#ifdef TLARS_WEAK_BLAS_SYMBOLS
+    std::string library = blas_threading_library();
+    if (library == "openblas")
+    {
+        openblas_set_num_threads(n_threads);
+        return true;
+    }
+    if (library == "mkl")
+    {
+        MKL_Set_Num_Threads(n_threads);
+        return true;
+    }
+#endif
+    return false;
+}
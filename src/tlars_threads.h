@@ -0,0 +1,17 @@
+// tlars_threads.h
+
+#ifndef tlars_threads_H
+#define tlars_threads_H
+
+#include <string>
+
+/**
+ * Functions that control the threads of the BLAS library used by Armadillo.
+ *
+ */
+
+std::string blas_threading_library();
+int blas_get_num_threads();
+bool blas_set_num_threads(int n_threads);
+
+#endif /* tlars_threads_h */
@@ -0,0 +1,144 @@
+import pytest
+import numpy as np
+from tlars import TLARS, subsample_selection_counts, restore_batch, load_batch
+
+@pytest.fixture
+def subsample_data():
+    """Generate data with dummies and a set of subsamples and bootstrap samples."""
+    n = 80
+    p = 40
+    num_dummies = 40
+    rng = np.random.default_rng(3)
+    X = np.hstack([rng.standard_normal((n, p)) + 1, rng.standard_normal((n, num_dummies))])
+    y = X[:, :4] @ np.array([2.0, 2.0, -2.0, 1.5]) + rng.standard_normal(n)
+    subsamples = [rng.choice(n, n // 2, replace=False) for _ in range(12)]
+    bootstraps = [rng.choice(n, n, replace=True) for _ in range(12)]
+    return {'X': X, 'y': y, 'num_dummies': num_dummies,
+            'subsamples': subsamples, 'bootstraps': bootstraps}
+
+def _sequential_counts(X, y, row_sets, **kwargs):
+    """Count the active predictors of fits on copies of the subsamples."""
+    counts = np.zeros(X.shape[1], dtype=int)
+    for rows in row_sets:
+        model = TLARS(X[rows], y[rows], num_dummies=kwargs['num_dummies'],
+                      intercept=kwargs['intercept'], type=kwargs['type'])
+        model.fit(T_stop=kwargs['T_stop'], early_stop=True)
+        active = set()
+        for action in model.actions_:
+            if action > 0:
+                active.add(action - 1)
+            else:
+                active.discard(-action - 1)
+        counts[list(active)] += 1
+    return counts
+
+@pytest.mark.parametrize("intercept", [False, True])
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+@pytest.mark.parametrize("samples", ['subsamples', 'bootstraps'])
+def test_counts_match_sequential_fits(subsample_data, intercept, type, samples):
+    """Test that the batch reproduces fits on fancy-indexed copies of X."""
+    kwargs = {'T_stop': 3, 'num_dummies': subsample_data['num_dummies'],
+              'intercept': intercept, 'type': type}
+    X, y, row_sets = subsample_data['X'], subsample_data['y'], subsample_data[samples]
+
+    counts = subsample_selection_counts(X, y, row_sets=row_sets, n_threads=2, **kwargs)
+
+    assert counts.shape == (X.shape[1],)
+    assert np.array_equal(counts, _sequential_counts(X, y, row_sets, **kwargs))
+
+def test_weights_match_row_sets(subsample_data):
+    """Test that bootstrap weights and repeated row indices give the same counts."""
+    X, y = subsample_data['X'], subsample_data['y']
+    weights = np.zeros((len(subsample_data['bootstraps']), X.shape[0]))
+    for b, rows in enumerate(subsample_data['bootstraps']):
+        np.add.at(weights[b], rows, 1)
+
+    from_weights = subsample_selection_counts(X, y, weights=weights, T_stop=2,
+                                              num_dummies=subsample_data['num_dummies'])
+    from_rows = subsample_selection_counts(X, y, row_sets=subsample_data['bootstraps'], T_stop=2,
+                                           num_dummies=subsample_data['num_dummies'])
+
+    assert np.array_equal(from_weights, from_rows)
+
+def test_subsample_validation(subsample_data):
+    """Test validation of the subsample specification."""
+    X, y = subsample_data['X'], subsample_data['y']
+    num_dummies = subsample_data['num_dummies']
+
+    with pytest.raises(ValueError):
+        subsample_selection_counts(X, y, T_stop=1, num_dummies=num_dummies)
+    with pytest.raises(ValueError):
+        subsample_selection_counts(X, y, row_sets=[np.array([0, X.shape[0]])], T_stop=1, num_dummies=num_dummies)
+    with pytest.raises(ValueError):
+        subsample_selection_counts(X, y, weights=-np.ones((2, X.shape[0])), T_stop=1, num_dummies=num_dummies)
+    with pytest.raises(ValueError):
+        subsample_selection_counts(X, y, row_sets=subsample_data['subsamples'], T_stop=0, num_dummies=num_dummies)
+
+@pytest.fixture
+def experiment_states():
+    """Generate the states of random experiments with the same original predictors."""
+    n = 60
+    p = 30
+    num_dummies = 30
+    rng = np.random.default_rng(5)
+    X = rng.standard_normal((n, p))
+    y = X[:, :3] @ np.array([2.0, -2.0, 1.5]) + rng.standard_normal(n)
+    models = [TLARS(np.hstack([X, rng.standard_normal((n, num_dummies))]), y, num_dummies=num_dummies, type=type)
+              for type in ['lar', 'lasso', 'lar', 'lasso']]
+    for model in models:
+        model.fit(T_stop=1)
+    return [model.get_all() for model in models]
+
+def test_restore_batch_matches_single_restores(experiment_states, tmp_path):
+    """Test that the models of a batch continue like models restored one by one."""
+    single = [TLARS(lars_state=state) for state in experiment_states]
+    batch = restore_batch(experiment_states, n_threads=2)
+    assert len(batch) == len(single)
+
+    # The original predictors are held once
+    usage = batch[0].memory_usage()
+    assert usage['shared_X'] == 60*30*8
+    assert usage['X'] == 60*30*8
+
+    batch.execute_lars_step(T_stop=3)
+    for model in single:
+        model.fit(T_stop=3)
+    for restored, model in zip(batch, single):
+        assert restored.actions_ == model.actions_
+        assert np.allclose(restored.coef_path_, model.coef_path_)
+        assert np.array_equal(restored.get_all()['l2']['X'], model.get_all()['l2']['X'])
+
+    # The container holds the original predictors once and restores the same models
+    batch.save(tmp_path / "batch.tlars")
+    loaded = load_batch(tmp_path / "batch.tlars")
+    assert loaded[0].memory_usage()['shared_X'] == 60*30*8
+    loaded.execute_lars_step(T_stop=5)
+    for model in single:
+        model.fit(T_stop=5)
+    for restored, model in zip(loaded, single):
+        assert restored.actions_ == model.actions_
+        assert np.allclose(restored.coef_, model.coef_)
+
+def test_restore_batch_different_predictors(experiment_states):
+    """Test that states with different original predictors are restored without sharing."""
+    state = TLARS(lars_state=experiment_states[0]).get_all()
+    state['l2']['X'][0, 0] += 1
+    batch = restore_batch([experiment_states[1], state])
+    assert batch[0].memory_usage()['shared_X'] == 0
+    assert np.array_equal(batch[1].get_all()['l2']['X'], state['l2']['X'])
+
+def test_restore_batch_validation(experiment_states, tmp_path):
+    """Test the validation of the states and files."""
+    with pytest.raises(ValueError):
+        restore_batch([])
+    with pytest.raises(ValueError):
+        restore_batch([experiment_states[0]['l1']])
+    with pytest.raises(ValueError):
+        restore_batch(experiment_states).execute_lars_step(T_stop=31)
+    with pytest.raises(ValueError):
+        restore_batch(experiment_states)[0].update_rows(np.zeros((1, 60)), np.zeros(1))
+
+    path = tmp_path / "other.pkl"
+    path.write_bytes(b"\x80\x04K\x01.")
+    with pytest.raises(ValueError):
+        load_batch(path)
@@ -0,0 +1,120 @@
+import os
+import time
+import pytest
+import numpy as np
+from tlars import TLARS, FitCache
+
+@pytest.fixture
+def cache_data():
+    """Generate data with dummies for cached fits."""
+    n = 50
+    p = 60
+    num_dummies = 60
+    rng = np.random.default_rng(21)
+    X = rng.standard_normal((n, p + num_dummies))
+    y = X[:, :3] @ np.array([2.0, -1.5, 1.0]) + rng.standard_normal(n)
+    return {'X': X, 'y': y, 'num_dummies': num_dummies}
+
+def test_cache_hit(cache_data, tmp_path):
+    """Test that an identical fit is loaded from the cache."""
+    X, y, num_dummies = cache_data['X'], cache_data['y'], cache_data['num_dummies']
+    cache = FitCache(str(tmp_path))
+    first = cache.fit(X, y, T_stop=3, num_dummies=num_dummies)
+    second = cache.fit(X.copy(), y.copy(), T_stop=3, num_dummies=num_dummies)
+    assert (cache.hits, cache.resumed, cache.misses) == (1, 0, 1)
+    assert second.actions_ == first.actions_
+    assert np.allclose(second.coef_, first.coef_)
+
+    # Different fit parameters are different entries
+    cache.fit(X, y, T_stop=3, num_dummies=num_dummies, type='lasso')
+    assert cache.misses == 2
+
+def test_cache_resumes_deepest_state(cache_data, tmp_path):
+    """Test that a larger T_stop continues the deepest cached state."""
+    X, y, num_dummies = cache_data['X'], cache_data['y'], cache_data['num_dummies']
+    cache = FitCache(str(tmp_path))
+    cache.fit(X, y, T_stop=2, num_dummies=num_dummies)
+    cache.fit(X, y, T_stop=4, num_dummies=num_dummies)
+    model = cache.fit(X, y, T_stop=6, num_dummies=num_dummies)
+    assert (cache.hits, cache.resumed, cache.misses) == (0, 2, 1)
+
+    direct = TLARS(X, y, num_dummies=num_dummies)
+    direct.fit(T_stop=6)
+    assert model.actions_ == direct.actions_
+    assert np.allclose(model.coef_path_, direct.coef_path_)
+    assert np.allclose(model.rss_, direct.rss_)
+
+def test_fingerprint(cache_data, tmp_path):
+    """Test that the fingerprint depends on the data and the parameters."""
+    X, y = cache_data['X'], cache_data['y']
+    cache = FitCache(str(tmp_path), num_blocks=4, block_size=8)
+    key = cache.fingerprint(X, y, type='lar')
+    assert cache.fingerprint(X.copy(), y, type='lar') == key
+    assert cache.fingerprint(X, y, type='lasso') != key
+    assert cache.fingerprint(X, y + 1, type='lar') != key
+
+    # The same values in another memory layout have the same key
+    assert cache.fingerprint(np.asfortranarray(X), y, type='lar') == key
+
+    # Changes in the hashed rows and columns are detected outside the hashed blocks
+    X_changed = X.copy()
+    X_changed[X.shape[0] - 1, X.shape[1] // 3] += 1.0
+    assert cache.fingerprint(X_changed, y, type='lar') != key
+    X_changed = X.copy()
+    X_changed[X.shape[0] // 2, X.shape[1] - 1] += 1.0
+    assert cache.fingerprint(X_changed, y, type='lar') != key
+
+    # Other changes are only detected by the full hash
+    X_changed = X.copy()
+    X_changed[X.shape[0] // 2, X.shape[1] // 3] += 1.0
+    assert cache.fingerprint(X_changed, y, type='lar') == key
+    full = FitCache(str(tmp_path), full_hash=True)
+    assert full.fingerprint(X_changed, y, type='lar') != full.fingerprint(np.asfortranarray(X), y, type='lar')
+    assert full.fingerprint(X, y, type='lar') == full.fingerprint(np.asfortranarray(X), y, type='lar')
+
+def test_cache_eviction(cache_data, tmp_path):
+    """Test that the least recently used entries are evicted."""
+    X, y, num_dummies = cache_data['X'], cache_data['y'], cache_data['num_dummies']
+    cache = FitCache(str(tmp_path))
+    cache.fit(X, y, T_stop=1, num_dummies=num_dummies)
+    cache.max_bytes = int(2.5 * cache.size_bytes)
+    cache.fit(X, y, T_stop=1, num_dummies=num_dummies, type='lasso')
+
+    # Age both entries, then use the first one again so the lasso entry is the least recently used one
+    for path in tmp_path.iterdir():
+        os.utime(path, (time.time() - 60, time.time() - 60))
+    cache.fit(X, y, T_stop=1, num_dummies=num_dummies)
+    cache.fit(X, y, T_stop=1, num_dummies=num_dummies, intercept=True)
+    assert len(os.listdir(tmp_path)) == 2
+    assert cache.size_bytes <= cache.max_bytes
+
+    cache.fit(X, y, T_stop=1, num_dummies=num_dummies)
+    cache.fit(X, y, T_stop=1, num_dummies=num_dummies, type='lasso')
+    assert (cache.hits, cache.misses) == (2, 4)
+
+    cache.clear()
+    assert cache.size_bytes == 0
+
+def test_cache_validation(tmp_path):
+    """Test invalid arguments."""
+    with pytest.raises(ValueError):
+        FitCache(str(tmp_path), max_bytes=-1)
+    cache = FitCache(str(tmp_path))
+    with pytest.raises(ValueError):
+        cache.fit(np.ones((5, 4)), np.ones(5), T_stop=1, num_dummies=2, unknown=True)
+
+def test_cache_files_exclude_predictors(tmp_path):
+    """Test that the cache files do not contain the predictor matrix and that the states are restored on X."""
+    rng = np.random.default_rng(22)
+    X = rng.standard_normal((400, 200))
+    y = X[:, :3] @ np.array([2.0, -1.5, 1.0]) + rng.standard_normal(400)
+    cache = FitCache(str(tmp_path))
+    cache.fit(X, y, T_stop=2, num_dummies=100, history='last')
+    assert cache.size_bytes < X.nbytes / 10
+
+    model = cache.fit(np.asfortranarray(X), y, T_stop=4, num_dummies=100, history='last')
+    assert cache.resumed == 1
+    direct = TLARS(X, y, num_dummies=100).fit(T_stop=4)
+    assert model.actions_ == direct.actions_
+    assert np.allclose(model.coef_, direct.coef_)
+    assert np.allclose(model.get_all()['l2']['X'], direct.get_all()['l2']['X'])
@@ -0,0 +1,113 @@
+import os
+import pytest
+import numpy as np
+from tlars import TLARS, CheckpointWriter, load_checkpoint
+
+@pytest.fixture
+def checkpoint_data():
+    """Generate data with dummies for checkpointed fits."""
+    n = 60
+    p = 40
+    num_dummies = 40
+    rng = np.random.default_rng(3)
+    X = rng.standard_normal((n, p + num_dummies))
+    y = X[:, :4] @ np.array([2.0, -1.5, 1.0, 3.0]) + rng.standard_normal(n)
+    return {'X': X, 'y': y, 'num_dummies': num_dummies}
+
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+@pytest.mark.parametrize("history", ['full', 'knots_only', 'last'])
+def test_checkpoint_resume(checkpoint_data, tmp_path, type, history):
+    """Test that a run restored from a checkpoint continues like an uninterrupted run."""
+    X, y, num_dummies = checkpoint_data['X'], checkpoint_data['y'], checkpoint_data['num_dummies']
+    path = str(tmp_path / "run.ckpt")
+    reference = TLARS(X, y, num_dummies=num_dummies, type=type, history=history)
+    reference.fit(T_stop=6)
+
+    model = TLARS(X, y, num_dummies=num_dummies, type=type, history=history)
+    CheckpointWriter(model, path).fit(T_stop=3, every=2)
+    restored = load_checkpoint(path)
+    assert restored.actions_ == model.actions_
+    assert np.allclose(restored.coef_, model.coef_)
+    assert np.allclose(restored.rss_, model.rss_)
+
+    CheckpointWriter(restored, path).fit(T_stop=6)
+    restored = load_checkpoint(path)
+    assert restored.actions_ == reference.actions_
+    assert np.allclose(restored.coef_path_, reference.coef_path_)
+    assert np.allclose(restored.rss_, reference.rss_)
+    assert np.allclose(restored.lambda_, reference.lambda_)
+
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+@pytest.mark.parametrize("history", ['full', 'last'])
+def test_checkpoint_delta_log(checkpoint_data, type, history):
+    """Test that the deltas recorded during the steps equal the stored solution path."""
+    X, y, num_dummies = checkpoint_data['X'], checkpoint_data['y'], checkpoint_data['num_dummies']
+    model = TLARS(X, y, num_dummies=num_dummies, type=type, history=history)
+    norm_x = np.ravel(model._model.get_norm_X())
+    start = model._model.get_checkpoint_delta(2**30, 2**30)
+    unlogged = model._model.get_checkpoint_delta(0, 0)
+    assert unlogged['ignored'] == [] and unlogged['count_ignored'] == start['count_ignored']
+
+    since_step, since_action, since_ignored = 0, 0, start['count_ignored']
+    for _ in range(4):
+        model._model.execute_lars_step(num_dummies, False, 3)
+        delta = model._model.get_checkpoint_delta(since_step, since_action, since_ignored)
+        assert delta['k'] == since_step + 3
+        assert delta['first_step'] == (since_step + 1 if history == 'full' else delta['k'])
+        stored = np.atleast_2d(model.coef_path_)[-len(delta['beta_indices']):]
+        for indices, values, beta in zip(delta['beta_indices'], delta['beta_values'], stored):
+            assert indices == np.flatnonzero(beta).tolist()
+            assert np.allclose(np.asarray(values)/norm_x[indices], beta[indices])
+        assert delta['ignored'] == []
+        since_step, since_action, since_ignored = delta['k'], since_action + len(delta['actions']), delta['count_ignored']
+
+    # A request that does not continue from the previous one scans the stored path
+    delta = model._model.get_checkpoint_delta(0, 0)
+    assert len(delta['beta_indices']) == min(delta['k'], len(np.atleast_2d(model.coef_path_)))
+
+def test_checkpoint_size_and_truncation(checkpoint_data, tmp_path):
+    """Test that checkpoints do not store X again and that a partially written record is ignored."""
+    X, y, num_dummies = checkpoint_data['X'], checkpoint_data['y'], checkpoint_data['num_dummies']
+    path = str(tmp_path / "run.ckpt")
+    model = TLARS(X, y, num_dummies=num_dummies)
+    writer = CheckpointWriter(model, path)
+    sizes = []
+    for _ in range(10):
+        model._model.execute_lars_step(num_dummies, False, 1)
+        sizes.append(writer.checkpoint())
+    assert writer.checkpoint() == 0
+    assert max(sizes) < X.nbytes / 10
+
+    # Simulate a worker that was preempted while writing the last checkpoint
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 10)
+    restored = load_checkpoint(path)
+    assert len(restored.rss_) == 10
+    CheckpointWriter(restored, path).fit(early_stop=False)
+
+    reference = TLARS(X, y, num_dummies=num_dummies)
+    reference._model.execute_lars_step(num_dummies, False)
+    restored = load_checkpoint(path)
+    assert restored.actions_ == reference.actions_
+    assert np.allclose(restored.coef_path_, reference.coef_path_)
+
+def test_checkpoint_from_gram(checkpoint_data, tmp_path):
+    """Test checkpoints of a model created from sufficient statistics."""
+    X, y, num_dummies = checkpoint_data['X'], checkpoint_data['y'], checkpoint_data['num_dummies']
+    path = str(tmp_path / "run.ckpt")
+    statistics = dict(XtX=X.T @ X, Xty=X.T @ y, yty=y @ y, n=len(y), col_sums=X.sum(axis=0), y_sum=y.sum())
+    reference = TLARS.from_gram(**statistics, num_dummies=num_dummies).fit(T_stop=4)
+    CheckpointWriter(TLARS.from_gram(**statistics, num_dummies=num_dummies), path).fit(T_stop=2)
+    restored = load_checkpoint(path)
+    CheckpointWriter(restored, path).fit(T_stop=4)
+    assert load_checkpoint(path).actions_ == reference.actions_
+
+def test_checkpoint_mismatch(checkpoint_data, tmp_path):
+    """Test that a model that does not match the checkpoint file is rejected."""
+    X, y, num_dummies = checkpoint_data['X'], checkpoint_data['y'], checkpoint_data['num_dummies']
+    path = str(tmp_path / "run.ckpt")
+    CheckpointWriter(TLARS(X, y, num_dummies=num_dummies), path).fit(T_stop=2)
+    with pytest.raises(ValueError):
+        CheckpointWriter(TLARS(X, y, num_dummies=num_dummies), path)
+    with pytest.raises(ValueError):
+        CheckpointWriter(load_checkpoint(path), path).fit(T_stop=1, every=0)
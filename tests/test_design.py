@@ -0,0 +1,91 @@
+import pytest
+import numpy as np
+from tlars import TLARS, PreparedDesign
+
+@pytest.fixture
+def design_data():
+    """Generate data with dummies, a constant column and two responses."""
+    n = 60
+    p = 30
+    num_dummies = 30
+    rng = np.random.default_rng(11)
+    X = np.hstack([rng.standard_normal((n, p)) + 1, rng.standard_normal((n, num_dummies))])
+    X[:, 5] = 3.0
+    y1 = X[:, :3] @ np.array([2.0, -2.0, 3.0]) + rng.standard_normal(n)
+    y2 = X[:, 10:13] @ np.array([1.5, 2.5, -3.0]) + rng.standard_normal(n)
+    return {'X': X, 'y1': y1, 'y2': y2, 'num_dummies': num_dummies}
+
+@pytest.mark.parametrize("intercept", [False, True])
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+def test_design_matches_dense_fit(design_data, intercept, type):
+    """Test that a model on a prepared design reproduces the model on X."""
+    X, num_dummies = design_data['X'], design_data['num_dummies']
+    design = PreparedDesign(X, intercept=intercept)
+
+    for y in (design_data['y1'], design_data['y2']):
+        dense = TLARS(X, y, intercept=intercept, num_dummies=num_dummies, type=type)
+        dense.fit(T_stop=4, early_stop=True)
+        shared = TLARS(design, y, num_dummies=num_dummies, type=type)
+        shared.fit(T_stop=4, early_stop=True)
+
+        assert shared.actions_ == dense.actions_
+        assert np.allclose(shared.coef_, dense.coef_)
+        assert np.allclose(shared.rss_, dense.rss_)
+
+def test_design_statistics(design_data):
+    """Test the preprocessing statistics exposed by the design."""
+    X = design_data['X']
+    design = PreparedDesign(X, intercept=True)
+
+    assert design.shape == X.shape
+    assert np.allclose(np.ravel(design.mean_x), X.mean(axis=0))
+    assert np.flatnonzero(design.ignored_pred).tolist() == [5]
+
+def test_design_state_restarts(design_data):
+    """Test that a model on a prepared design can be warm re-started."""
+    design = PreparedDesign(design_data['X'])
+    model = TLARS(design, design_data['y1'], num_dummies=design_data['num_dummies'])
+    model.fit(T_stop=2, early_stop=True)
+
+    restored = TLARS(lars_state=model.get_all())
+    restored.fit(T_stop=4, early_stop=True)
+    model.fit(T_stop=4, early_stop=True)
+
+    assert restored.actions_ == model.actions_
+    assert np.allclose(restored.coef_, model.coef_)
+
+@pytest.mark.parametrize("intercept", [False, True])
+def test_design_with_own_dummies(design_data, intercept):
+    """Test that a model on a design followed by its own dummies reproduces the model on the concatenated X."""
+    X, y, num_dummies = design_data['X'], design_data['y1'], design_data['num_dummies']
+    original, dummies = X[:, :-num_dummies], X[:, -num_dummies:]
+    design = PreparedDesign(original, intercept=intercept)
+
+    model = TLARS.from_design(design, y, dummies, type='lasso').fit(T_stop=4)
+    dense = TLARS(X, y, intercept=intercept, num_dummies=num_dummies, type='lasso').fit(T_stop=4)
+    assert model.actions_ == dense.actions_
+    assert np.allclose(model.coef_path_, dense.coef_path_)
+    assert np.allclose(np.ravel(model._model.get_norm_X()), np.ravel(dense._model.get_norm_X()))
+
+    # Only the dummies are stored by the model
+    usage = model._model.get_memory_usage()
+    assert usage['X'] == 8*dummies.size
+    assert usage['shared_X'] == 8*original.size
+    with pytest.raises(ValueError):
+        TLARS.from_design(design, y, dummies[:-1])
+    with pytest.raises(ValueError):
+        TLARS.from_design(X, y, dummies)
+
+def test_design_validation(design_data):
+    """Test validation of the design and of the response length."""
+    X = design_data['X']
+    design = PreparedDesign(X)
+
+    with pytest.raises(ValueError):
+        PreparedDesign(X[:, 0])
+    with pytest.raises(ValueError):
+        PreparedDesign(np.full((3, 2), np.nan))
+    with pytest.raises(ValueError):
+        TLARS(design, design_data['y1'][:-1], num_dummies=design_data['num_dummies'])
+    with pytest.raises(ValueError):
+        TLARS(design, design_data['y1'], num_dummies=X.shape[1] + 1)
@@ -0,0 +1,113 @@
+import pytest
+import numpy as np
+from collections import deque
+from tlars import TLARS, LocalTransport, run_experiments
+from tlars.distributed import Transport, _ExperimentWorker
+
+@pytest.fixture
+def experiment_data(tmp_path):
+    """Generate data saved to disk for the workers."""
+    n = 50
+    p = 30
+    rng = np.random.default_rng(5)
+    X = rng.standard_normal((n, p))
+    y = X[:, :3] @ np.array([2.0, -1.0, 1.5]) + rng.standard_normal(n)
+    X_path = str(tmp_path / "X.npy")
+    np.save(X_path, X)
+    return {'X': X, 'y': y, 'X_path': X_path}
+
+def direct_actions(X, y, seed, T_stop, num_dummies):
+    """Fit an experiment directly."""
+    dummies = np.random.default_rng(seed).standard_normal((X.shape[0], num_dummies))
+    return TLARS(np.hstack([X, dummies]), y, num_dummies=num_dummies).fit(T_stop=T_stop).actions_
+
+class FlakyTransport(Transport):
+    """In-process transport whose first worker fails after shipping one checkpoint."""
+
+    def __init__(self, num_workers):
+        self.num_workers = num_workers
+
+    def start(self, config):
+        self.alive = {worker_id: _ExperimentWorker(config) for worker_id in range(self.num_workers)}
+        self.inbox = deque()
+        self.shipped = 0
+
+    def workers(self):
+        return list(self.alive)
+
+    def send(self, worker_id, message):
+        messages = []
+        self.alive[worker_id].run(message[1], messages.append)
+        if worker_id == 0 and len(messages) > 2:
+            messages = messages[:1] + [None]
+            del self.alive[worker_id]
+        self.shipped += sum(message is not None and message[0] == 'progress' for message in messages)
+        self.inbox.extend((worker_id, message) for message in messages)
+
+    def recv(self):
+        return self.inbox.popleft()
+
+    def close(self):
+        pass
+
+def test_failed_experiment_resumes(experiment_data):
+    """Test that the experiment of a failed worker is resumed from its last checkpoint."""
+    X, y, X_path = experiment_data['X'], experiment_data['y'], experiment_data['X_path']
+    transport = FlakyTransport(2)
+    results = run_experiments(X_path, y, seeds=[1, 2, 3], T_stop=3, num_dummies=30, transport=transport)
+    assert [result['seed'] for result in results] == [1, 2, 3]
+    assert [result['resumed'] for result in results] == [1, 0, 0]
+    # The resumed experiment only computed the dummies after the shipped checkpoint
+    assert transport.shipped == 3*3
+    for result in results:
+        assert result['actions'] == direct_actions(X, y, result['seed'], 3, 30)
+        assert np.all(result['active'] < X.shape[1])
+
+def test_local_transport(experiment_data):
+    """Test worker subprocesses, including a worker that is killed during an experiment."""
+    X, y, X_path = experiment_data['X'], experiment_data['y'], experiment_data['X_path']
+
+    class KillingTransport(LocalTransport):
+        killed = False
+
+        def recv(self):
+            worker_id, message = super().recv()
+            if message is not None and message[0] == 'progress' and not self.killed:
+                self.killed = True
+                self._processes[worker_id].kill()
+            return worker_id, message
+
+    results = run_experiments(X_path, y, seeds=[1, 2, 3, 4], T_stop=3, num_dummies=30,
+                              transport=KillingTransport(2))
+    assert sum(result['resumed'] for result in results) == 1
+    for result in results:
+        assert result['actions'] == direct_actions(X, y, result['seed'], 3, 30)
+
+def test_local_transport_start_failure(experiment_data, tmp_path):
+    """Test that workers failing during start-up raise a RuntimeError and do not leak processes."""
+    y = experiment_data['y']
+    transport = LocalTransport(2)
+    with pytest.raises(RuntimeError):
+        run_experiments(str(tmp_path / "missing.npy"), y, seeds=[1], T_stop=1, num_dummies=30, transport=transport)
+    assert transport.workers() == []
+    assert transport._processes == {}
+
+def test_transport_interface():
+    """Test that a transport must implement the complete interface."""
+
+    class PartialTransport(Transport):
+        def start(self, config):
+            pass
+
+    with pytest.raises(TypeError):
+        PartialTransport()
+
+def test_run_experiments_validation(experiment_data):
+    """Test invalid arguments."""
+    X, y, X_path = experiment_data['X'], experiment_data['y'], experiment_data['X_path']
+    with pytest.raises(ValueError):
+        run_experiments(X, y, seeds=[1], T_stop=1, num_dummies=30, transport=FlakyTransport(1))
+    with pytest.raises(ValueError):
+        run_experiments(X_path, y, seeds=[1], T_stop=31, num_dummies=30, transport=FlakyTransport(1))
+    with pytest.raises(ValueError):
+        LocalTransport(num_workers=0)
@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+from tlars import TLARS, GramAccumulator
+
+@pytest.fixture
+def dummy_data():
+    """Generate data with dummies and a non-zero mean."""
+    n = 60
+    p = 40
+    num_dummies = 40
+    rng = np.random.default_rng(7)
+    X = rng.standard_normal((n, p)) + 2
+    y = X[:, :3] @ np.array([3.0, -2.0, 4.0]) + 0.5 * rng.standard_normal(n)
+    XD = np.hstack([X, rng.standard_normal((n, num_dummies))])
+    return {'X': XD, 'y': y, 'num_dummies': num_dummies}
+
+@pytest.mark.parametrize("intercept", [False, True])
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+def test_from_gram_matches_dense_fit(dummy_data, intercept, type):
+    """Test that a fit from sufficient statistics reproduces the fit on the data."""
+    X, y, num_dummies = dummy_data['X'], dummy_data['y'], dummy_data['num_dummies']
+
+    dense = TLARS(X, y, intercept=intercept, num_dummies=num_dummies, type=type)
+    dense.fit(T_stop=5, early_stop=True)
+
+    gram = TLARS.from_gram(X.T @ X, X.T @ y, y @ y, X.shape[0], col_sums=X.sum(axis=0),
+                           y_sum=y.sum(), intercept=intercept, num_dummies=num_dummies, type=type)
+    gram.fit(T_stop=5, early_stop=True)
+
+    assert gram.actions_ == dense.actions_
+    assert np.allclose(gram.coef_, dense.coef_)
+    assert np.allclose(gram.rss_, dense.rss_)
+
+def test_gram_state_restarts(dummy_data):
+    """Test that a model created from sufficient statistics can be warm re-started."""
+    X, y, num_dummies = dummy_data['X'], dummy_data['y'], dummy_data['num_dummies']
+    model = TLARS.from_gram(X.T @ X, X.T @ y, y @ y, X.shape[0], num_dummies=num_dummies)
+    model.fit(T_stop=2, early_stop=True)
+
+    restored = TLARS(lars_state=model.get_all())
+    restored.fit(T_stop=4, early_stop=True)
+    model.fit(T_stop=4, early_stop=True)
+
+    assert restored.actions_ == model.actions_
+    assert np.allclose(restored.coef_, model.coef_)
+
+def test_accumulator_matches_full_statistics(dummy_data):
+    """Test that chunked accumulation equals the statistics of the full data."""
+    X, y = dummy_data['X'], dummy_data['y']
+    chunks = ((X[i:i + 7], y[i:i + 7]) for i in range(0, X.shape[0], 7))
+    stats = GramAccumulator.from_chunks(chunks).statistics()
+
+    assert stats['n'] == X.shape[0]
+    assert np.allclose(stats['XtX'], X.T @ X)
+    assert np.allclose(stats['Xty'], X.T @ y)
+    assert np.isclose(stats['yty'], y @ y)
+    assert np.allclose(stats['col_sums'], X.sum(axis=0))
+    assert np.isclose(stats['y_sum'], y.sum())
+
+    acc = GramAccumulator(chunk_size=9).update(X, y)
+    assert np.allclose(acc.statistics()['XtX'], stats['XtX'])
+
+    model = acc.to_tlars(intercept=True, num_dummies=dummy_data['num_dummies'])
+    model.fit(T_stop=3, early_stop=True)
+    assert model.n_active_dummies_ == 3
+
+def test_from_gram_validation(dummy_data):
+    """Test validation of the sufficient statistics."""
+    X, y = dummy_data['X'], dummy_data['y']
+    XtX, Xty = X.T @ X, X.T @ y
+
+    with pytest.raises(ValueError):
+        TLARS.from_gram(XtX[:, :-1], Xty, y @ y, X.shape[0])
+    with pytest.raises(ValueError):
+        TLARS.from_gram(XtX, Xty[:-1], y @ y, X.shape[0])
+    with pytest.raises(ValueError):
+        TLARS.from_gram(XtX, Xty, y @ y, X.shape[0], intercept=True)
+    with pytest.raises(ValueError):
+        GramAccumulator().statistics()
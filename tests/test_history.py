@@ -0,0 +1,86 @@
+import pytest
+import numpy as np
+from tlars import TLARS
+
+@pytest.fixture
+def path_data():
+    """Generate data with dummies for long solution paths."""
+    n = 60
+    p = 80
+    num_dummies = 80
+    rng = np.random.default_rng(9)
+    X = rng.standard_normal((n, p + num_dummies))
+    y = X[:, :4] @ np.array([2.0, -1.5, 1.0, 3.0]) + rng.standard_normal(n)
+    return {'X': X, 'y': y, 'num_dummies': num_dummies}
+
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+def test_history_modes_agree(path_data, type):
+    """Test that the bounded histories report the same results as the full history."""
+    X, y, num_dummies = path_data['X'], path_data['y'], path_data['num_dummies']
+    models = {}
+    for history in ['full', 'knots_only', 'last']:
+        models[history] = TLARS(X, y, num_dummies=num_dummies, type=type, history=history)
+        models[history].fit(T_stop=10, early_stop=True)
+    full, knots, last = models['full'], models['knots_only'], models['last']
+
+    assert knots.actions_ == full.actions_ == last.actions_
+    assert np.allclose(knots.coef_path_, full.coef_path_)
+    assert np.allclose(knots.rss_, full.rss_)
+    assert np.allclose(knots.lambda_, full.lambda_)
+
+    assert np.allclose(last.coef_, full.coef_)
+    assert len(last.coef_path_) == len(last.rss_) == len(last.lambda_) == 1
+    assert np.isclose(last.rss_[-1], full.rss_[-1])
+    assert np.isclose(last.lambda_[-1], full.lambda_[len(full.rss_) - 2])
+    assert np.isclose(last.cp_[-1], full.cp_[len(full.rss_) - 1])
+
+    assert full.memory_usage()['path'] > knots.memory_usage()['path'] > last.memory_usage()['path']
+
+def test_last_history_is_bounded(path_data):
+    """Test that the stored path does not grow with the number of steps."""
+    model = TLARS(path_data['X'], path_data['y'], num_dummies=path_data['num_dummies'], history='last')
+    model.fit(T_stop=2, early_stop=True)
+    early = model.memory_usage()['path']
+    model.fit(T_stop=path_data['num_dummies'], early_stop=True)
+
+    assert model.memory_usage()['path'] <= early + 1024
+
+@pytest.mark.parametrize("history", ['knots_only', 'last'])
+def test_history_state_restarts(path_data, history):
+    """Test that a model with a bounded history can be warm re-started."""
+    model = TLARS(path_data['X'], path_data['y'], num_dummies=path_data['num_dummies'], history=history)
+    model.fit(T_stop=3, early_stop=True)
+
+    restored = TLARS(lars_state=model.get_all())
+    assert restored.history == history
+    restored.fit(T_stop=6, early_stop=True)
+    model.fit(T_stop=6, early_stop=True)
+
+    assert restored.actions_ == model.actions_
+    assert np.allclose(restored.coef_path_, model.coef_path_)
+
+def test_switch_history(path_data):
+    """Test switching between history modes of a fitted model."""
+    model = TLARS(path_data['X'], path_data['y'], num_dummies=path_data['num_dummies'])
+    model.fit(T_stop=4, early_stop=True)
+    full_path = model.coef_path_
+
+    model.history = 'knots_only'
+    assert np.allclose(model.coef_path_, full_path)
+    model.history = 'full'
+    assert np.allclose(model.coef_path_, full_path)
+    model.history = 'last'
+    assert np.allclose(model.coef_path_, full_path[-1:])
+
+    with pytest.raises(ValueError):
+        model.history = 'none'
+
+def test_memory_usage_components(path_data):
+    """Test the components reported by memory_usage."""
+    X = path_data['X']
+    model = TLARS(X, path_data['y'], num_dummies=path_data['num_dummies'])
+    usage = model.memory_usage()
+
+    assert set(usage) == {'X', 'shared_X', 'factor', 'path', 'scratch', 'total'}
+    assert usage['X'] == X.nbytes
+    assert usage['total'] == usage['X'] + usage['factor'] + usage['path'] + usage['scratch']
@@ -0,0 +1,67 @@
+import pytest
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from tlars import TLARS
+
+@pytest.fixture
+def fitted_wide_model():
+    """Fit a LARS model on data with many predictors."""
+    n = 50
+    p = 500
+    rng = np.random.default_rng(2)
+    X = rng.standard_normal((n, 2 * p))
+    y = X[:, :3] @ np.array([3.0, -2.0, 2.0]) + rng.standard_normal(n)
+    model = TLARS(X, y, num_dummies=p)
+    return model.fit(T_stop=4, early_stop=True)
+
+def _path_collections(ax):
+    """Get the LineCollections that hold solution paths (not the vertical lines)."""
+    return [c for c in ax.collections if isinstance(c, LineCollection) and c.get_transform() == ax.transData]
+
+def test_plot_draws_entered_variables_only(fitted_wide_model):
+    """Test that the plot draws one collection per group with the entered variables only."""
+    fig, ax = fitted_wide_model.plot()
+    entered = {abs(a) for a in fitted_wide_model.actions_}
+
+    assert len(ax.lines) == 0
+    paths = _path_collections(ax)
+    assert len(paths) == 2
+    assert sum(len(c.get_segments()) for c in paths) == len(entered)
+    plt.close(fig)
+
+def test_plot_decimates_dummies(fitted_wide_model):
+    """Test that the number of drawn dummy paths is limited by max_dummies."""
+    fig, ax = fitted_wide_model.plot(max_dummies=1)
+    paths = _path_collections(ax)
+
+    assert len(paths[1].get_segments()) == 1
+    plt.close(fig)
+
+def test_plot_knots_only_history(fitted_wide_model):
+    """Test that the plot uses the same paths for a model that stores knots only."""
+    fig, ax = fitted_wide_model.plot()
+    full_segments = [s for c in _path_collections(ax) for s in c.get_segments()]
+    plt.close(fig)
+
+    fitted_wide_model.history = 'knots_only'
+    fig, ax = fitted_wide_model.plot()
+    knot_segments = [s for c in _path_collections(ax) for s in c.get_segments()]
+    plt.close(fig)
+
+    assert all(np.allclose(a, b) for a, b in zip(full_segments, knot_segments))
+
+def test_plot_validation(fitted_wide_model):
+    """Test that unfitted models are rejected and numpy integers are accepted for max_dummies."""
+    rng = np.random.default_rng(3)
+    unfitted = TLARS(rng.standard_normal((20, 10)), rng.standard_normal(20), num_dummies=5)
+    with pytest.raises(ValueError, match="fit"):
+        unfitted.plot()
+
+    fig, ax = fitted_wide_model.plot(max_dummies=np.int64(1))
+    assert len(_path_collections(ax)[1].get_segments()) == 1
+    plt.close(fig)
+    with pytest.raises(ValueError):
+        fitted_wide_model.plot(max_dummies=1.5)
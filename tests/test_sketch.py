@@ -0,0 +1,71 @@
+import pytest
+import numpy as np
+from tlars import TLARS
+
+@pytest.fixture
+def tall_data():
+    """Generate tall data with strong signals."""
+    n = 4000
+    p = 150
+    num_dummies = 150
+    rng = np.random.default_rng(1)
+    X = rng.standard_normal((n, p + num_dummies))
+    beta = np.zeros(p)
+    beta[:8] = rng.uniform(1, 2, 8)
+    y = X[:, :p] @ beta + rng.standard_normal(n)
+    return {'X': X, 'y': y, 'num_dummies': num_dummies}
+
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+def test_sketch_matches_exact(tall_data, type):
+    """Test that the sketch mode gives the exact solution path."""
+    X, y, num_dummies = tall_data['X'], tall_data['y'], tall_data['num_dummies']
+    exact = TLARS(X, y, num_dummies=num_dummies, type=type).fit(T_stop=2)
+    model = TLARS(X, y, num_dummies=num_dummies, type=type).set_sketch(400, confidence=3.0)
+    model.fit(T_stop=2)
+
+    assert model.actions_ == exact.actions_
+    assert np.allclose(model.coef_path_, exact.coef_path_)
+    assert np.allclose(model.rss_, exact.rss_)
+    assert np.allclose(model.lambda_, exact.lambda_)
+
+    stats = model.sketch_stats()
+    assert stats['rows'] == 400
+    assert stats['sketched_steps'] > 0
+    assert stats['sketched_steps'] + stats['step_fallbacks'] >= len(model.rss_) - 2
+    assert model.memory_usage()['scratch'] > 400*X.shape[1]*8
+
+def test_sketch_fallback(tall_data):
+    """Test that ambiguous shortlists fall back to exact passes."""
+    X, y, num_dummies = tall_data['X'], tall_data['y'], tall_data['num_dummies']
+    exact = TLARS(X, y, num_dummies=num_dummies).fit(T_stop=3)
+    model = TLARS(X, y, num_dummies=num_dummies).set_sketch(16, max_verified=1)
+    model.fit(T_stop=3)
+    assert model.actions_ == exact.actions_
+    assert np.allclose(model.coef_, exact.coef_)
+    stats = model.sketch_stats()
+    assert stats['entry_fallbacks'] > 0 and stats['step_fallbacks'] > 0
+
+def test_sketch_state_and_disable(tall_data):
+    """Test that the stored state contains the exact correlations and that the sketch can be disabled."""
+    X, y, num_dummies = tall_data['X'], tall_data['y'], tall_data['num_dummies']
+    model = TLARS(X, y, num_dummies=num_dummies).set_sketch(400, confidence=3.0)
+    model.fit(T_stop=1)
+    restored = TLARS(lars_state=model.get_all())
+    model.set_sketch(0)
+    assert model.sketch_stats()['rows'] == 0
+
+    exact = TLARS(X, y, num_dummies=num_dummies).fit(T_stop=3)
+    assert restored.fit(T_stop=3).actions_ == exact.actions_
+    assert model.fit(T_stop=3).actions_ == exact.actions_
+
+def test_sketch_validation(tall_data):
+    """Test invalid arguments."""
+    X, y, num_dummies = tall_data['X'], tall_data['y'], tall_data['num_dummies']
+    model = TLARS(X, y, num_dummies=num_dummies)
+    with pytest.raises(ValueError):
+        model.set_sketch(-1)
+    with pytest.raises(ValueError):
+        model.set_sketch(100, confidence=0)
+    gram_model = TLARS.from_gram(X.T @ X, X.T @ y, y @ y, len(y), num_dummies=num_dummies)
+    with pytest.raises(ValueError):
+        gram_model.set_sketch(100)
@@ -0,0 +1,87 @@
+import pytest
+import numpy as np
+import tlars
+from tlars import TLARS, PreparedDesign
+
+@pytest.fixture
+def wide_data():
+    """Generate wide data so that the predictors are split into several blocks."""
+    n = 30
+    p = 70000
+    rng = np.random.default_rng(5)
+    X = rng.standard_normal((n, p))
+    y = X[:, :3] @ np.array([3.0, 2.0, -2.0]) + rng.standard_normal(n)
+    return {'X': X, 'y': y, 'num_dummies': p // 2}
+
+@pytest.mark.parametrize("source", ['dense', 'design', 'gram'])
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+def test_threads_reproduce_single_thread(wide_data, source, type):
+    """Test that a multithreaded fit gives the same path as a single-threaded fit."""
+    X, y, num_dummies = wide_data['X'], wide_data['y'], wide_data['num_dummies']
+    if source == 'gram':
+        X = X[:, :4000]
+        num_dummies = 2000
+
+    def fitted(n_threads):
+        if source == 'gram':
+            model = TLARS.from_gram(X.T @ X, X.T @ y, y @ y, X.shape[0], num_dummies=num_dummies,
+                                    type=type, n_threads=n_threads)
+        else:
+            design = PreparedDesign(X) if source == 'design' else X
+            model = TLARS(design, y, num_dummies=num_dummies, type=type, n_threads=n_threads)
+        return model.fit(T_stop=4, early_stop=True)
+
+    single, multi = fitted(1), fitted(4)
+
+    assert multi.n_threads == 4
+    assert multi.actions_ == single.actions_
+    assert np.array_equal(multi.coef_, single.coef_)
+    assert np.array_equal(multi.lambda_, single.lambda_)
+
+def test_n_threads_validation(wide_data):
+    """Test the validation of the number of threads."""
+    model = TLARS(wide_data['X'][:, :10].copy(), wide_data['y'], num_dummies=5, n_threads=None)
+    assert model.n_threads >= 1
+
+    with pytest.raises(ValueError):
+        model.n_threads = 0
+
+def test_set_num_threads_context(wide_data):
+    """Test that the thread budget is the default of n_threads and is restored on exit."""
+    budget = tlars.get_num_threads()
+    X = wide_data['X'][:, :10].copy()
+
+    with tlars.set_num_threads(3):
+        assert tlars.get_num_threads() == 3
+        assert TLARS(X, wide_data['y'], num_dummies=5, n_threads=None).n_threads == 3
+
+    assert tlars.get_num_threads() == budget
+
+    with tlars.set_num_threads(np.int64(2)):
+        assert tlars.get_num_threads() == 2
+        assert type(tlars.get_num_threads()) is int
+
+    with pytest.raises(ValueError):
+        tlars.set_num_threads(0)
+    with pytest.raises(ValueError):
+        tlars.set_num_threads(2.0)
+
+def test_blas_threads_are_limited_during_fits(wide_data):
+    """Test that the BLAS threads are split between concurrently running fits."""
+    if tlars.thread_info()['blas_library'] is None:
+        pytest.skip("The threads of the linked BLAS library cannot be controlled.")
+    from tlars import threads
+
+    before = tlars.thread_info()['blas_num_threads']
+    with tlars.set_num_threads(8):
+        with threads._parallel_region(2):
+            assert tlars.thread_info()['blas_num_threads'] == 4
+            with threads._parallel_region(4):
+                assert tlars.thread_info()['blas_num_threads'] == 1
+            assert tlars.thread_info()['blas_num_threads'] == 4
+        with tlars.set_num_threads(8, blas_threads=2):
+            assert tlars.thread_info()['blas_num_threads'] == 2
+            with threads._parallel_region(4):
+                assert tlars.thread_info()['blas_num_threads'] == 2
+
+    assert tlars.thread_info()['blas_num_threads'] == before
@@ -0,0 +1,93 @@
+import warnings
+import pytest
+import numpy as np
+from tlars import TLARS
+
+@pytest.fixture
+def tie_data():
+    """Generate data where several predictors have exactly the same correlation with the response."""
+    n = 60
+    rng = np.random.default_rng(3)
+    block = np.repeat(np.eye(6), n // 6, axis=0)
+    X = np.hstack([block, 0.25*rng.integers(-1, 2, (n, 10))])
+    y = block @ np.array([3., 3., 3., 1., 0., 0.]) + np.tile([1., -1.], n // 2)
+    return {'X': X, 'y': y}
+
+def _fit(X, y, type, use_gram):
+    """Fit the entire solution path without standardization (which would break the exact ties)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        if use_gram:
+            model = TLARS.from_gram(X.T @ X, X.T @ y, y @ y, X.shape[0], X.sum(axis=0), y.sum(),
+                                    standardize=False, type=type)
+        else:
+            model = TLARS(X, y, standardize=False, type=type)
+    model._model.execute_lars_step(1, False)
+    return model
+
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+@pytest.mark.parametrize("use_gram", [False, True])
+def test_tied_predictors_enter_together(tie_data, type, use_gram):
+    """Test that tied predictors enter in the same step with a valid Cholesky factor."""
+    X, y = tie_data['X'], tie_data['y']
+    model = _fit(X, y, type, use_gram)
+
+    assert model.actions_[:3] == [1, 2, 3]
+    assert np.count_nonzero(model.coef_path_[1]) == 3
+    assert np.allclose(model.coef_path_[1][:3], 2)
+    assert len(model.rss_) < len(model.actions_)
+
+    state = model.get_all()
+    active = state['l1']['active_pred']
+    R = np.asarray(state['l2']['active_data_decomp'])
+    assert state['l2']['active_data_rank'] == len(active)
+    assert np.allclose(R, np.triu(R))
+    assert np.allclose(R.T @ R, X[:, active].T @ X[:, active])
+
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+def test_tied_predictors_gram_matches_data(tie_data, type):
+    """Test that the entry of tied predictors is the same for the data and the Gram matrix."""
+    X, y = tie_data['X'], tie_data['y']
+    model = _fit(X, y, type, False)
+    gram_model = _fit(X, y, type, True)
+
+    assert model.actions_ == gram_model.actions_
+    assert np.allclose(model.coef_path_, gram_model.coef_path_)
+    assert np.allclose(model.rss_, gram_model.rss_)
+
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+def test_tied_entry_matches_sequential_entry(tie_data, type):
+    """Test that the block entry of tied predictors gives the path of entering them one after another."""
+    X, y = tie_data['X'], tie_data['y']
+    model = _fit(X, y, type, False)
+    # A tiny perturbation breaks the ties, so the predictors enter in separate (very short) steps
+    perturbed = _fit(X, y + 1e-9*np.random.default_rng(0).standard_normal(len(y)), type, False)
+
+    assert len(perturbed.rss_) > len(model.rss_)
+    assert sorted(perturbed.actions_) == sorted(model.actions_)
+    path = np.asarray(model.coef_path_)
+    sequential_path = np.asarray(perturbed.coef_path_)
+    distance = np.abs(path[:, None, :] - sequential_path[None, :, :]).max(axis=2)
+    assert np.all(distance.min(axis=1) < 1e-6)
+
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+@pytest.mark.parametrize("use_gram", [False, True])
+@pytest.mark.parametrize("dependent", ['duplicate', 'combination'])
+def test_dependent_tied_predictor_is_ignored(tie_data, type, use_gram, dependent):
+    """Test that a tied predictor that depends linearly on the other tied predictors is ignored."""
+    X, y = tie_data['X'], tie_data['y']
+    if dependent == 'duplicate':
+        extra = X[:, 1]
+    else:
+        extra = (X[:, 0] + X[:, 1])/2
+    X = np.column_stack([X, extra])
+    model = _fit(X, y, type, use_gram)
+
+    state = model.get_all()
+    active = state['l1']['active_pred']
+    R = np.asarray(state['l2']['active_data_decomp'])
+    assert np.flatnonzero(state['l1']['ignored_pred']).tolist() == [X.shape[1] - 1]
+    assert X.shape[1] not in model.actions_
+    assert state['l2']['active_data_rank'] == len(active) == X.shape[1] - 1
+    assert np.all(np.isfinite(R))
+    assert np.allclose(R.T @ R, X[:, active].T @ X[:, active])
@@ -0,0 +1,74 @@
+import pytest
+import numpy as np
+from tlars import TLARS, relative_occurrences, trex_calibrate
+
+@pytest.fixture
+def trex_data():
+    """Generate sparse linear data and a set of random experiments."""
+    n = 100
+    p = 60
+    rng = np.random.default_rng(4)
+    X = rng.standard_normal((n, p))
+    beta = np.zeros(p)
+    beta[:5] = 3.0
+    y = X @ beta + rng.standard_normal(n)
+    dummies = [rng.standard_normal((n, p)) for _ in range(6)]
+    return {'X': X, 'y': y, 'dummies': dummies, 'support': beta != 0}
+
+def _active_originals(model, p):
+    """Get the mask of the active original predictors of a fitted model."""
+    active = np.zeros(p, dtype=bool)
+    for action in model.actions_:
+        if abs(action) <= p:
+            active[abs(action) - 1] = action > 0
+    return active
+
+def test_relative_occurrences_match_refits(trex_data):
+    """Test that replaying one fit per experiment equals refitting every experiment for every T."""
+    X, y = trex_data['X'], trex_data['y']
+    p = X.shape[1]
+    T_max = 4
+
+    models = [TLARS(np.hstack([X, D]), y, num_dummies=p).fit(T_stop=T_max) for D in trex_data['dummies']]
+    phi = relative_occurrences(models, T_max)
+
+    assert phi.shape == (T_max, p)
+    for T in range(1, T_max + 1):
+        refits = [TLARS(np.hstack([X, D]), y, num_dummies=p).fit(T_stop=T) for D in trex_data['dummies']]
+        expected = np.mean([_active_originals(model, p) for model in refits], axis=0)
+        assert np.allclose(phi[T - 1], expected)
+
+def test_trex_calibrate_selects_support(trex_data):
+    """Test that the calibration driver selects the true support on easy data."""
+    result = trex_calibrate(trex_data['X'], trex_data['y'], tFDR=0.2, K=10, L_factor=1, seed=0)
+
+    assert result['selected'][trex_data['support']].all()
+    assert result['fdp_hat'].shape == (result['phi'].shape[0], len(result['V']))
+    T_index = result['T_stop'] - 1
+    v_index = np.flatnonzero(np.isclose(result['V'], result['v_thresh']))[0]
+    assert result['fdp_hat'][T_index, v_index] <= 0.2
+    assert result['num_selected'][T_index, v_index] == result['selected'].sum()
+
+def test_trex_validation(trex_data):
+    """Test validation of the calibration parameters."""
+    X, y = trex_data['X'], trex_data['y']
+
+    with pytest.raises(ValueError):
+        trex_calibrate(X, y, tFDR=1.5)
+    with pytest.raises(ValueError):
+        trex_calibrate(X, y, K=1)
+    with pytest.raises(ValueError):
+        trex_calibrate(X, y[:-1])
+    with pytest.raises(ValueError):
+        relative_occurrences([])
+
+def test_fdp_hat_is_clipped():
+    """Test that the FDP estimate stays in [0, 1] when the deflated relative occurrences leave [0, 1]."""
+    from tlars.trex import _fdp_hat
+
+    phi = np.zeros((2, 10))
+    phi[:, 0] = [0.1, 1.0]
+    fdp_hat = _fdp_hat(phi, 10, 10, np.array([0.5, 0.9]))
+
+    assert np.all((fdp_hat >= 0) & (fdp_hat <= 1))
+    assert np.allclose(fdp_hat, 1.0)
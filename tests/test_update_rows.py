@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+from tlars import TLARS, PreparedDesign
+
+@pytest.fixture
+def batch_data():
+    """Generate data whose rows arrive in two batches."""
+    n = 240
+    p = 80
+    num_dummies = 80
+    rng = np.random.default_rng(7)
+    X = rng.standard_normal((n, p + num_dummies))*rng.uniform(0.5, 3, p + num_dummies) + rng.uniform(-2, 2, p + num_dummies)
+    beta = np.zeros(p + num_dummies)
+    beta[:6] = rng.uniform(1, 2, 6)
+    y = X @ beta + rng.standard_normal(n)
+    return {'X': X, 'y': y, 'num_dummies': num_dummies, 'n_old': 200}
+
+@pytest.mark.parametrize("type", ['lar', 'lasso'])
+@pytest.mark.parametrize("intercept", [False, True])
+def test_update_rows_matches_refit(batch_data, type, intercept):
+    """Test that adding rows gives the same model as a fit on all rows."""
+    X, y, num_dummies, n_old = batch_data['X'], batch_data['y'], batch_data['num_dummies'], batch_data['n_old']
+    model = TLARS(X[:n_old].copy(), y[:n_old].copy(), intercept=intercept, num_dummies=num_dummies, type=type)
+    model.fit(T_stop=3)
+    model.update_rows(X[n_old:], y[n_old:])
+    refit = TLARS(X, y, intercept=intercept, num_dummies=num_dummies, type=type).fit(T_stop=3)
+
+    assert model.actions_ == refit.actions_
+    assert np.allclose(model.coef_path_, refit.coef_path_)
+    assert np.allclose(model.rss_, refit.rss_)
+    assert np.allclose(model.lambda_, refit.lambda_)
+    assert np.allclose(model._model.get_norm_X(), refit._model.get_norm_X())
+    assert np.allclose(model._model.get_mean_X(), refit._model.get_mean_X())
+
+    stats = model.update_stats()
+    assert stats['rows'] == X.shape[0] - n_old
+    assert stats['cached_columns'] > 0
+    assert 0 <= stats['matched_actions'] <= len(model.actions_)
+
+    # The updated model continues like the refitted one
+    model.fit(T_stop=5)
+    refit.fit(T_stop=5)
+    assert model.actions_ == refit.actions_
+    assert np.allclose(model.coef_, refit.coef_)
+
+def test_update_rows_gram(batch_data):
+    """Test that adding rows to a model created from sufficient statistics updates the cross-products."""
+    X, y, num_dummies, n_old = batch_data['X'], batch_data['y'], batch_data['num_dummies'], batch_data['n_old']
+    X_old, y_old = X[:n_old], y[:n_old]
+    model = TLARS.from_gram(X_old.T @ X_old, X_old.T @ y_old, y_old @ y_old, n_old, X_old.sum(axis=0), y_old.sum(),
+                            intercept=True, num_dummies=num_dummies).fit(T_stop=2)
+    model.update_rows(X[n_old:], y[n_old:])
+    refit = TLARS(X, y, intercept=True, num_dummies=num_dummies).fit(T_stop=model.n_active_dummies_)
+
+    assert model.actions_ == refit.actions_
+    assert np.allclose(model.coef_, refit.coef_)
+
+def test_update_rows_unfitted(batch_data):
+    """Test that the rows of an unfitted model are only added."""
+    X, y, num_dummies, n_old = batch_data['X'], batch_data['y'], batch_data['num_dummies'], batch_data['n_old']
+    model = TLARS(X[:n_old].copy(), y[:n_old].copy(), num_dummies=num_dummies)
+    model.update_rows(X[n_old:], y[n_old:])
+    assert model.actions_ == []
+
+    model.fit(T_stop=2)
+    refit = TLARS(X, y, num_dummies=num_dummies).fit(T_stop=2)
+    assert model.actions_ == refit.actions_
+    assert np.allclose(model.coef_, refit.coef_)
+
+def test_update_rows_validation(batch_data):
+    """Test the validation of the new rows."""
+    X, y, num_dummies, n_old = batch_data['X'], batch_data['y'], batch_data['num_dummies'], batch_data['n_old']
+    model = TLARS(X[:n_old].copy(), y[:n_old].copy(), num_dummies=num_dummies).fit(T_stop=1)
+
+    with pytest.raises(ValueError):
+        model.update_rows(X[n_old:, :-1], y[n_old:])
+    with pytest.raises(ValueError):
+        model.update_rows(X[n_old:], y[n_old + 1:])
+    with pytest.raises(ValueError):
+        model.update_rows(X[n_old:], y[n_old:], T_stop=0)
+    X_nan = X[n_old:].copy()
+    X_nan[0, 0] = np.nan
+    with pytest.raises(ValueError):
+        model.update_rows(X_nan, y[n_old:])
+
+    model.set_sketch(50)
+    with pytest.raises(ValueError):
+        model.update_rows(X[n_old:], y[n_old:])
+
+    shared = TLARS(PreparedDesign(X[:n_old].copy()), y[:n_old].copy(), num_dummies=num_dummies)
+    with pytest.raises(ValueError):
+        shared.update_rows(X[n_old:], y[n_old:])
@@ -1,4 +1,12 @@
 from .tlars_cpp import tlars_cpp
+from .gram import GramAccumulator
+from .batch import subsample_selection_counts, restore_batch, load_batch, TLARSBatch
+from .design import PreparedDesign
+from .threads import set_num_threads, get_num_threads, thread_info, _parallel_region
+from .trex import relative_occurrences, trex_calibrate
+from .cache import FitCache
+from .checkpoint import CheckpointWriter, load_checkpoint
+from .distributed import run_experiments, LocalTransport, SocketTransport
 import numpy as np
 import time
 from typing import Optional, List, Dict, Union, Any, Tuple
@@ -9,16 +17,18 @@ class TLARS:
     
     Parameters
     ----------
-    X : numpy.ndarray
-        Real valued predictor matrix.
+    X : numpy.ndarray or PreparedDesign
+        Real valued predictor matrix. A PreparedDesign is shared with the model without copying
+        or re-standardizing it; its intercept and standardize settings are used.
     y : numpy.ndarray
         Response vector.
     verbose : bool, default=False
         If True, progress in computations is shown.
     intercept : bool, default=False
-        If True, an intercept is included.
+        If True, an intercept is included. Ignored if X is a PreparedDesign.
     standardize : bool, default=True
-        If True, the predictors are standardized and the response is centered.
+        If True, the predictors are standardized and the response is centered. Ignored if X is
+        a PreparedDesign.
     num_dummies : int, default=0
         Number of dummies that are appended to the predictor matrix.
     type : str, default='lar'
@@ -31,35 +41,49 @@ class TLARS:
     info : bool, default=False
         If True and object is not recreated from previous T-LARS state, then information about 
         the created object is printed.
+    n_threads : int or None, default=1
+        Number of threads used within every T-LARS step. The predictors are split into blocks
+        whose inner products with the residuals and candidate step sizes are computed in parallel,
+        which pays off for very wide X. If None, the thread budget (see set_num_threads) is used.
+    history : str, optional
+        Part of the solution path that is stored: 'full' (default) keeps the coefficient vectors of
+        all steps, 'knots_only' keeps only the non-zero coefficients of every step and 'last' keeps
+        only what is needed to continue the path and report the final results (coef_, the last
+        RSS, R2 and lambda), so that long runs use bounded memory. If None, 'full' is used for new
+        objects and the stored setting for objects recreated from lars_state.
     """
     
     def __init__(self, X=None, y=None, verbose=False, intercept=False, standardize=True, 
-                 num_dummies=0, type='lar', lars_state=None, info=False):
+                 num_dummies=0, type='lar', lars_state=None, info=False, n_threads=1, history=None):
         # If a previous state is provided, use it to initialize
         if lars_state is not None:
             if not isinstance(lars_state, dict) or len(lars_state) != 4:
                 raise ValueError("'lars_state' must be a dictionary containing the state variables "
                                "of a TLARS object. It must be obtained via model.get_all().")
             self._model = tlars_cpp(lars_state)
+            self.n_threads = n_threads
+            if history is not None:
+                self.history = history
         else:
             # Input validation
             if X is None or y is None:
                 raise ValueError("X and y must be provided when not initializing from lars_state")
                 
-            if not isinstance(X, np.ndarray):
-                raise ValueError("'X' must be a numpy array.")
+            if not isinstance(X, (np.ndarray, PreparedDesign)):
+                raise ValueError("'X' must be a numpy array or a PreparedDesign.")
                 
             if not isinstance(y, (np.ndarray, list)):
                 raise ValueError("'y' must be a numpy array or list.")
                 
-            if np.isnan(X).any():
+            if isinstance(X, np.ndarray) and np.isnan(X).any():
                 raise ValueError("'X' contains NaN values. Please remove or impute them before proceeding.")
                 
             if np.isnan(y).any():
                 raise ValueError("'y' contains NaN values. Please remove or impute them before proceeding.")
                 
             # Convert inputs to numpy arrays if they aren't already
-            X = np.asarray(X, dtype=np.float64)
+            if isinstance(X, np.ndarray):
+                X = np.asarray(X, dtype=np.float64)
             y = np.asarray(y, dtype=np.float64)
             
             # Ensure y is a vector
@@ -69,19 +93,17 @@ class TLARS:
             if X.shape[0] != len(y):
                 raise ValueError("Number of rows in X does not match length of y.")
                 
-            if not isinstance(num_dummies, int) or num_dummies < 0 or num_dummies > X.shape[1]:
-                raise ValueError("'num_dummies' must be an integer >= 0 and <= the number of columns in X.")
-                
-            if not standardize:
-                import warnings
-                warnings.warn("'standardize' should be True for the T-LARS algorithm. "
-                            "Since you set standardize=False, we hope you have a good reason for doing that!")
-                
-            if type not in ['lar', 'lasso']:
-                raise ValueError("'type' must be one of 'lar', 'lasso'.")
-            
             # Create the C++ object
-            self._model = tlars_cpp(X, y, verbose, intercept, standardize, num_dummies, type)
+            if isinstance(X, PreparedDesign):
+                # The standardize warning was already emitted when the design was prepared
+                _check_options(num_dummies, X.shape[1], True, type)
+                self._model = tlars_cpp(X._design, y, verbose, num_dummies, type)
+            else:
+                _check_options(num_dummies, X.shape[1], standardize, type)
+                self._model = tlars_cpp(X, y, verbose, intercept, standardize, num_dummies, type)
+            self.n_threads = n_threads
+            if history is not None:
+                self.history = history
             
             # Print information if requested
             if info:
@@ -89,6 +111,133 @@ class TLARS:
                 print(f"\t\t The first p = {X.shape[1] - num_dummies} predictors are the original predictors and")
                 print(f"\t\t the last num_dummies = {num_dummies} predictors are dummies")
     
+    @classmethod
+    def from_gram(cls, XtX, Xty, yty, n, col_sums=None, y_sum=None, verbose=False, intercept=False,
+                  standardize=True, num_dummies=0, type='lar', info=False, n_threads=1, history='full'):
+        """
+        Create a TLARS model from sufficient statistics instead of the data.
+        
+        The LARS recursion only needs inner products between the predictors and the
+        response, so the model can be built from the (uncentered) cross-products of the
+        data. Memory is O(p^2), independent of the number of observations. The statistics
+        of a data set that does not fit into memory can be collected with a GramAccumulator.
+        
+        Parameters
+        ----------
+        XtX : numpy.ndarray
+            Uncentered cross-product matrix X'X of shape (p, p).
+        Xty : numpy.ndarray
+            Uncentered cross-product vector X'y of length p.
+        yty : float
+            Uncentered sum of squares y'y of the response.
+        n : int
+            Number of observations.
+        col_sums : numpy.ndarray, optional
+            Column sums of X. Required if intercept=True.
+        y_sum : float, optional
+            Sum of the response y. Required if intercept=True.
+        verbose, intercept, standardize, num_dummies, type, info, n_threads, history
+            See TLARS.
+            
+        Returns
+        -------
+        TLARS
+            A TLARS object that can be fitted like one created from X and y.
+        """
+        XtX = np.asarray(XtX, dtype=np.float64)
+        Xty = np.asarray(Xty, dtype=np.float64).ravel()
+        
+        if XtX.ndim != 2 or XtX.shape[0] != XtX.shape[1]:
+            raise ValueError("'XtX' must be a square matrix.")
+            
+        p = XtX.shape[1]
+        if len(Xty) != p:
+            raise ValueError("Length of 'Xty' does not match the dimension of 'XtX'.")
+            
+        if not isinstance(n, (int, np.integer)) or n < 2:
+            raise ValueError("'n' must be an integer >= 2.")
+            
+        if intercept and (col_sums is None or y_sum is None):
+            raise ValueError("'col_sums' and 'y_sum' must be provided when intercept=True.")
+            
+        col_sums = np.zeros(p) if col_sums is None else np.asarray(col_sums, dtype=np.float64).ravel()
+        y_sum = 0.0 if y_sum is None else float(y_sum)
+        if len(col_sums) != p:
+            raise ValueError("Length of 'col_sums' does not match the dimension of 'XtX'.")
+            
+        if np.isnan(XtX).any() or np.isnan(Xty).any() or np.isnan(col_sums).any() or np.isnan(yty):
+            raise ValueError("The sufficient statistics contain NaN values.")
+            
+        _check_options(num_dummies, p, standardize, type)
+        
+        model = cls.__new__(cls)
+        model._model = tlars_cpp.from_gram(XtX, Xty, float(yty), int(n), col_sums, y_sum,
+                                           verbose, intercept, standardize, num_dummies, type)
+        model.n_threads = n_threads
+        model.history = history
+        
+        # Print information if requested
+        if info:
+            print(f"Created a TLARS object from sufficient statistics of n = {n} observations...")
+            print(f"\t\t The first p = {p - num_dummies} predictors are the original predictors and")
+            print(f"\t\t the last num_dummies = {num_dummies} predictors are dummies")
+            
+        return model
+    
+    @classmethod
+    def from_design(cls, design, y, dummies, verbose=False, type='lar', info=False, n_threads=1, history='full'):
+        """
+        Create a TLARS model on a prepared design followed by its own dummies.
+
+        The preprocessed predictors of the design are read by all models created from it without
+        copying them; only the dummies are centered, standardized (like the design) and stored by
+        the model. This is the layout of the random experiments of the T-Rex selector, where every
+        experiment appends different dummies to the same original predictors.
+
+        Parameters
+        ----------
+        design : PreparedDesign
+            Original predictors (its intercept and standardize settings are used).
+        y : numpy.ndarray
+            Response vector.
+        dummies : numpy.ndarray
+            Dummies of shape (n, num_dummies) that follow the predictors of the design.
+        verbose, type, info, n_threads, history
+            See TLARS.
+
+        Returns
+        -------
+        TLARS
+            A TLARS object that can be fitted like one created from the concatenated predictors.
+        """
+        if not isinstance(design, PreparedDesign):
+            raise ValueError("'design' must be a PreparedDesign.")
+        if not isinstance(dummies, np.ndarray) or dummies.ndim != 2:
+            raise ValueError("'dummies' must be a 2-dimensional numpy array.")
+        if np.isnan(dummies).any():
+            raise ValueError("'dummies' contains NaN values. Please remove or impute them before proceeding.")
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if np.isnan(y).any():
+            raise ValueError("'y' contains NaN values. Please remove or impute them before proceeding.")
+        if dummies.shape[0] != design.shape[0] or len(y) != design.shape[0]:
+            raise ValueError("Number of rows in 'dummies' and length of 'y' must match the design.")
+
+        num_dummies = dummies.shape[1]
+        _check_options(num_dummies, design.shape[1] + num_dummies, True, type)
+
+        model = cls.__new__(cls)
+        model._model = tlars_cpp(design._design, np.asarray(dummies, dtype=np.float64), y, verbose, type)
+        model.n_threads = n_threads
+        model.history = history
+
+        # Print information if requested
+        if info:
+            print(f"Created a TLARS object on a prepared design...")
+            print(f"\t\t The first p = {design.shape[1]} predictors are the original predictors and")
+            print(f"\t\t the last num_dummies = {num_dummies} predictors are dummies")
+
+        return model
+
     def fit(self, T_stop=None, early_stop=True, info=False):
         """
         Fit the TLARS model.
@@ -108,6 +257,14 @@ class TLARS:
         -------
         self : object
             Returns self.
+
+        Notes
+        -----
+        The steps run without holding the GIL, so other Python threads continue while a model is
+        fitted. A single model must not be used from several threads at once: calling any method
+        or property of the model (e.g., get_all(), coef_path_, or setting X and y) while fit() or
+        update_rows() is running on it in another thread is a data race with undefined behaviour.
+        Use one model per thread, or guard a shared model with a lock.
         """
         # Set default T_stop to number of dummies if not provided
         if T_stop is None:
@@ -127,7 +284,8 @@ class TLARS:
             
             # Execute and time T-LARS step
             start_time = time.time()
-            self._model.execute_lars_step(T_stop, early_stop)
+            with _parallel_region(self.n_threads):
+                self._model.execute_lars_step(T_stop, early_stop)
             elapsed = time.time() - start_time
             
             # Print information about the executed T-LARS step
@@ -142,7 +300,8 @@ class TLARS:
                 print(f"\t\t\t - Time elapsed: {elapsed:.4f} sec.")
         else:
             # Execute T-LARS step without info
-            self._model.execute_lars_step(T_stop, early_stop)
+            with _parallel_region(self.n_threads):
+                self._model.execute_lars_step(T_stop, early_stop)
             
         return self
     
@@ -150,10 +309,14 @@ class TLARS:
              include_dummies=True, show_actions=True, 
              col_selected="black", col_dummies="red",
              ls_selected="-", ls_dummies="--",
-             legend_pos="best", figsize=(10, 6)):
+             legend_pos="best", figsize=(10, 6), max_dummies=None):
         """
         Plot the T-LARS solution path.
         
+        Only the predictors that entered the model at some step are drawn (the paths of all other
+        predictors are zero). The paths of every group are drawn as a single LineCollection, so
+        plotting stays fast for thousands of predictors.
+        
         Parameters
         ----------
         xlabel : str, default="# Included dummies"
@@ -176,6 +339,10 @@ class TLARS:
             Legend position.
         figsize : tuple, default=(10, 6)
             Figure size.
+        max_dummies : int, optional
+            Maximum number of dummy paths that are drawn. If more dummies entered the model, an
+            evenly spaced subset (in order of entry) is drawn on top of a shaded band spanning the
+            paths of all included dummies.
             
         Returns
         -------
@@ -186,6 +353,7 @@ class TLARS:
         """
         try:
             import matplotlib.pyplot as plt
+            from matplotlib.collections import LineCollection
         except ImportError:
             raise ImportError(
                 "matplotlib is required for plotting. "
@@ -196,63 +364,91 @@ class TLARS:
         method_type = self._model.type
         if method_type != "lar":
             raise ValueError("Plot is only generated for LARS, not Lasso! Set type='lar' when creating a TLARS object.")
+            
+        if max_dummies is not None and (not isinstance(max_dummies, (int, np.integer)) or max_dummies < 0):
+            raise ValueError("'max_dummies' must be an integer >= 0 or None.")
         
         # Retrieve data to be plotted
         T_stop = self._model.get_num_active_dummies()
         num_dummies = self._model.get_num_dummies()
-        var_select_path = self._model.get_actions()
-        beta_path = np.array(self._model.get_beta_path())
+        var_select_path = np.asarray(self._model.get_actions(), dtype=np.int64)
+        if not np.any(var_select_path > 0):
+            raise ValueError("No predictor has entered the model yet. Call fit() before plotting the solution path.")
         
         # Number of original variables (without dummies)
-        p = beta_path.shape[1] - num_dummies
+        p = len(self._model.get_norm_X()) - num_dummies
+        
+        # Paths of the predictors that entered the model (in order of entry), built in one array
+        entered = var_select_path[var_select_path > 0] - 1
+        entered = entered[np.sort(np.unique(entered, return_index=True)[1])]
+        beta_path = np.asarray(self._model.get_beta_path_columns(entered.astype(np.uint64)))
+        beta_path = beta_path.reshape(-1, len(entered))
+        steps = np.arange(beta_path.shape[0], dtype=np.float64)
+        
+        def path_segments(columns):
+            # Array of shape (number of paths, number of steps, 2) for a LineCollection
+            segments = np.empty((columns.sum(), len(steps), 2))
+            segments[:, :, 0] = steps
+            segments[:, :, 1] = beta_path[:, columns].T
+            return segments
+        
+        def vertical_lines(positions, **kwargs):
+            # Lines spanning the full height of the axes (one artist for all positions)
+            segments = [[(x, 0), (x, 1)] for x in positions]
+            ax.add_collection(LineCollection(segments, transform=ax.get_xaxis_transform(), **kwargs),
+                              autolim=False)
         
         # Create plot
         fig, ax = plt.subplots(figsize=figsize)
         
         # Generate solution path plot of active variables
-        dummies_path = [i+1 for i, v in enumerate(var_select_path) if v > p]
+        dummies_path = np.flatnonzero(var_select_path > p) + 1
         dummies_path_labels = range(1, T_stop+1)
         
         # Plot original variables
-        for i in range(p):
-            ax.plot(beta_path[:, i], color=col_selected, linestyle=ls_selected)
+        is_dummy = entered >= p
+        ax.add_collection(LineCollection(path_segments(~is_dummy), colors=col_selected, linestyles=ls_selected))
         
         # Set x-axis ticks to match included dummies
         ax.set_xticks(dummies_path)
         ax.set_xticklabels(dummies_path_labels)
         
         # Add vertical lines for included dummies
-        for dummy_pos in dummies_path:
-            ax.axvline(x=dummy_pos, color=col_dummies, linestyle='-', linewidth=1.3, alpha=0.5)
+        vertical_lines(dummies_path, colors=col_dummies, linestyles='-', linewidth=1.3, alpha=0.5)
         
         # Add dummies solution path to plot
         if include_dummies:
-            for i in range(p, p + num_dummies):
-                ax.plot(beta_path[:, i], color=col_dummies, linestyle=ls_dummies)
+            dummy_columns = np.flatnonzero(is_dummy)
+            if max_dummies is not None and len(dummy_columns) > max_dummies:
+                # Summarize all dummies by a band and decimate the drawn paths
+                dummy_paths = beta_path[:, dummy_columns]
+                ax.fill_between(steps, dummy_paths.min(axis=1), dummy_paths.max(axis=1),
+                                color=col_dummies, alpha=0.15, linewidth=0)
+                dummy_columns = dummy_columns[np.linspace(0, len(dummy_columns) - 1, max_dummies).astype(int)]
+            drawn = np.zeros(len(entered), dtype=bool)
+            drawn[dummy_columns] = True
+            ax.add_collection(LineCollection(path_segments(drawn), colors=col_dummies, linestyles=ls_dummies))
+        
+        ax.autoscale_view()
         
         # Add markers for actions
         if show_actions:
             ax2 = ax.twiny()
             
             # Get positions of actions
-            var_select_path_positions = range(1, len(var_select_path) + 1)
+            var_select_path_positions = np.arange(1, len(var_select_path) + 1)
             
             # Convert dummy indices to 'D'
-            var_select_path_labels = []
-            for v in var_select_path:
-                if v > p:
-                    var_select_path_labels.append('D')
-                else:
-                    var_select_path_labels.append(str(v))
+            var_select_path_labels = np.where(var_select_path > p, 'D', var_select_path.astype(str))
             
             # Set ticks for action markers
+            ax2.set_xlim(ax.get_xlim())
             ax2.set_xticks(var_select_path_positions)
             ax2.set_xticklabels(var_select_path_labels)
             ax2.set_xlabel("Index of selected variables (D indicates an included dummy)")
             
             # Add vertical lines for actions
-            for action_pos in var_select_path_positions:
-                ax.axvline(x=action_pos, color='gray', linestyle=':', alpha=0.5)
+            vertical_lines(var_select_path_positions, colors='gray', linestyles=':', alpha=0.5)
         
         # Add legend if showing both variable types
         if include_dummies:
@@ -282,6 +478,211 @@ class TLARS:
         """
         return self._model.get_all()
     
+    @property
+    def n_threads(self):
+        """
+        Get the number of threads used within every T-LARS step.
+        
+        Returns
+        -------
+        int
+            The number of threads.
+        """
+        return self._model.n_threads
+    
+    @n_threads.setter
+    def n_threads(self, n_threads):
+        """
+        Set the number of threads used within every T-LARS step.
+        
+        Parameters
+        ----------
+        n_threads : int or None
+            Number of threads. If None, the thread budget (see set_num_threads) is used.
+        """
+        if n_threads is None:
+            n_threads = get_num_threads()
+        if not isinstance(n_threads, (int, np.integer)) or n_threads < 1:
+            raise ValueError("'n_threads' must be an integer >= 1 or None.")
+        self._model.n_threads = int(n_threads)
+    
+    @property
+    def history(self):
+        """
+        Get the part of the solution path that is stored.
+        
+        Returns
+        -------
+        str
+            One of 'full', 'knots_only' or 'last'.
+        """
+        return self._model.history
+    
+    @history.setter
+    def history(self, history):
+        """
+        Set the part of the solution path that is stored. Switching to a smaller history
+        discards the stored path immediately.
+        
+        Parameters
+        ----------
+        history : str
+            One of 'full', 'knots_only' or 'last'.
+        """
+        if history not in ['full', 'knots_only', 'last']:
+            raise ValueError("'history' must be one of 'full', 'knots_only', 'last'.")
+        self._model.history = history
+    
+    def memory_usage(self):
+        """
+        Get the memory held by the model.
+        
+        Returns
+        -------
+        dict
+            Bytes per component: 'X' (owned predictor matrix or Gram matrix), 'shared_X'
+            (predictor matrix of a PreparedDesign that is shared with other models), 'factor'
+            (Cholesky factor of the active predictors), 'path' (stored solution path), 'scratch'
+            (working vectors of the T-LARS steps) and 'total' (sum of the owned components,
+            i.e., without 'shared_X').
+        """
+        usage = dict(self._model.get_memory_usage())
+        usage['total'] = sum(v for key, v in usage.items() if key != 'shared_X')
+        return usage
+
+    def set_sketch(self, rows, confidence=4.0, max_verified=None, seed=0):
+        """
+        Enable the approximate correlations of a row sketch for very tall X.
+
+        A CountSketch of X with the given number of rows is computed once. In every step, the
+        correlations of all predictors with the residuals and the equiangular vector are
+        approximated from the sketch instead of passing over X. The approximations only
+        shortlist the entering predictors and the step size: all shortlisted predictors are
+        computed exactly on the full data. If more than max_verified predictors would have to be
+        verified (e.g., because many correlations are close), the step falls back to exact passes
+        over X. The error bounds of the approximations are `confidence` standard deviations of
+        the sketched inner products. A predictor whose sketched inner product falls outside of its
+        bounds is not verified, so the solution path is only exact with high probability: by
+        Chebyshev's inequality, the bounds of a predictor fail with probability at most
+        1/confidence**2 per step (much less in practice, since the errors are approximately
+        Gaussian). Disable the sketch mode where an exact path is required. See sketch_stats()
+        for how often the fallbacks happened.
+
+        Parameters
+        ----------
+        rows : int
+            Number of rows of the sketch (0 disables the sketch mode). Should be much smaller
+            than n.
+        confidence : float, default=4.0
+            Width of the error bounds in standard deviations of the sketched inner products.
+        max_verified : int, optional
+            Maximum number of predictors verified exactly per step. Defaults to max(64, p // 20).
+        seed : int, default=0
+            Seed of the sketch.
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        if not isinstance(rows, (int, np.integer)) or rows < 0:
+            raise ValueError("'rows' must be an integer >= 0.")
+        if max_verified is None:
+            max_verified = max(64, len(self._model.get_norm_X()) // 20)
+        self._model.set_sketch(int(rows), float(confidence), int(max_verified), int(seed))
+        return self
+
+    def sketch_stats(self):
+        """
+        Get statistics of the sketch mode (see set_sketch()).
+
+        Returns
+        -------
+        dict
+            Dictionary with the number of rows of the sketch ('rows'), the number of steps whose
+            step size was certified by the sketch ('sketched_steps'), the number of steps that
+            required exact passes over X to find the entering predictors ('entry_fallbacks') or
+            the step size ('step_fallbacks'), and the number of predictors whose correlations were
+            computed exactly ('verified_columns').
+        """
+        stats = {'rows': 0, 'sketched_steps': 0, 'entry_fallbacks': 0, 'step_fallbacks': 0, 'verified_columns': 0}
+        stats.update(self._model.get_sketch_stats())
+        return stats
+
+    def update_rows(self, X_new, y_new, T_stop=None, early_stop=True):
+        """
+        Add new observations and refit the model on all observations.
+
+        The means and norms of the predictors (or the sufficient statistics of a model created
+        with from_gram()) are updated with the new rows instead of being recomputed, and the
+        solution path is recomputed from the first step. The cross-products of all predictors
+        with the predictors of the previous solution path are computed in advance with a single
+        matrix-matrix product, so every step that selects predictors of the previous path avoids
+        passing over X. All predictors are still checked in every step, i.e., the result equals
+        a fit from scratch on the concatenated data. See update_stats() for how much of the
+        previous path was reused.
+
+        Parameters
+        ----------
+        X_new : numpy.ndarray
+            Predictor matrix of the new observations (including the dummies).
+        y_new : numpy.ndarray
+            Response of the new observations.
+        T_stop : int, optional
+            See fit(). Defaults to the number of included dummies before the update. If the model
+            was not fitted before, only the data is updated.
+        early_stop : bool, default=True
+            See fit().
+
+        Returns
+        -------
+        self : object
+            Returns self.
+
+        Notes
+        -----
+        Like fit(), the refit runs without holding the GIL; the model must not be used from
+        another thread while it runs (see fit()).
+        """
+        if not isinstance(X_new, np.ndarray):
+            raise ValueError("'X_new' must be a numpy array.")
+        X_new = np.asarray(X_new, dtype=np.float64)
+        y_new = np.asarray(y_new, dtype=np.float64).ravel()
+        p = len(self._model.get_norm_X())
+        if X_new.ndim != 2 or X_new.shape[1] != p:
+            raise ValueError(f"'X_new' must be a matrix with {p} columns.")
+        if X_new.shape[0] != len(y_new):
+            raise ValueError("Number of rows in X_new does not match length of y_new.")
+        if np.isnan(X_new).any() or np.isnan(y_new).any():
+            raise ValueError("'X_new' or 'y_new' contains NaN values. Please remove or impute them before proceeding.")
+
+        num_dummies = self._model.num_dummies
+        if T_stop is None:
+            T_stop = self._model.get_num_active_dummies() if self._model.get_actions() else 0
+        elif not (1 <= T_stop <= num_dummies):
+            raise ValueError(f"Value of 'T_stop' not valid. 'T_stop' must be an integer from 1 to {num_dummies}.")
+
+        with _parallel_region(self.n_threads):
+            self._model.update_rows(X_new, y_new, int(T_stop), early_stop)
+        return self
+
+    def update_stats(self):
+        """
+        Get statistics of the last update_rows() call.
+
+        Returns
+        -------
+        dict
+            Dictionary with the number of added rows ('rows'), the number of predictors of the
+            previous solution path whose cross-products were computed in advance
+            ('cached_columns'), the number of predictors that entered although they were not
+            active before the update ('computed_columns') and the number of leading actions that
+            did not change ('matched_actions').
+        """
+        stats = {'rows': 0, 'cached_columns': 0, 'computed_columns': 0, 'matched_actions': 0}
+        stats.update(self._model.get_update_stats())
+        return stats
+
     @property
     def coef_(self):
         """
@@ -448,6 +849,32 @@ class TLARS:
                 f"\t - Number of included dummies: {self.n_active_dummies_}\n"
                 f"\t - Selected variables: {selected_var_str}")
 
+def _check_options(num_dummies, num_cols, standardize, type):
+    """
+    Validate the options shared by all TLARS constructors.
+    
+    Parameters
+    ----------
+    num_dummies : int
+        Number of dummies that are appended to the predictor matrix.
+    num_cols : int
+        Total number of predictors (including dummies).
+    standardize : bool
+        Whether the predictors are standardized.
+    type : str
+        Type of used algorithm.
+    """
+    if not isinstance(num_dummies, int) or num_dummies < 0 or num_dummies > num_cols:
+        raise ValueError("'num_dummies' must be an integer >= 0 and <= the number of columns in X.")
+        
+    if not standardize:
+        import warnings
+        warnings.warn("'standardize' should be True for the T-LARS algorithm. "
+                    "Since you set standardize=False, we hope you have a good reason for doing that!")
+        
+    if type not in ['lar', 'lasso']:
+        raise ValueError("'type' must be one of 'lar', 'lasso'.")
+
 # Generate Gaussian data similar to the R package example
 def generate_gaussian_data(n=50, p=100, seed=789):
     """
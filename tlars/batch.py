@@ -0,0 +1,323 @@
+import pickle
+import numpy as np
+from .tlars_cpp import subsample_selection_counts as _subsample_selection_counts
+from .tlars_cpp import restore_experiments as _restore_experiments
+from .tlars_cpp import continue_experiments as _continue_experiments
+from .threads import _parallel_region, _split_threads
+
+
+def subsample_selection_counts(X, y, row_sets=None, weights=None, T_stop=None, early_stop=True,
+                               intercept=False, standardize=True, num_dummies=0, type='lar',
+                               n_threads=None):
+    """
+    Run T-LARS on many row subsamples of the same data and count the selected variables.
+
+    This is the building block of stability selection and bootstrap experiments. X is passed
+    to the C++ backend once and every subsample is fitted on a view of its rows (no fancy-indexed
+    copy of X per subsample); centering and standardization are computed for the rows of each
+    subsample. The fits run in parallel and only the p-length vector of selection counts is
+    returned.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        Real valued predictor matrix (including dummies).
+    y : numpy.ndarray
+        Response vector.
+    row_sets : numpy.ndarray or list, optional
+        Row indices of the subsamples, either a 2-d integer array with one subsample per row or a
+        list of 1-d integer arrays. Repeated indices (bootstrap samples) enter the fit repeatedly.
+    weights : numpy.ndarray, optional
+        Alternative to row_sets: 2-d array of shape (number of subsamples, n) with the non-negative
+        integer multiplicity of every row in every subsample (e.g., bootstrap counts).
+    T_stop : int, optional
+        Number of included dummies after which each fit is stopped. Defaults to num_dummies.
+    early_stop : bool, default=True
+        If True, the fits are stopped after T_stop dummies have been included.
+    intercept, standardize, num_dummies, type
+        See TLARS.
+    n_threads : int, optional
+        Total number of threads. Defaults to the thread budget (see set_num_threads). The fits
+        run in parallel on up to n_threads threads and the BLAS library gets the remaining share
+        of the budget.
+
+    Returns
+    -------
+    numpy.ndarray
+        Number of subsamples in which each of the X.shape[1] predictors is active when the
+        forward selection process terminates. Divide by the number of subsamples to obtain
+        selection frequencies.
+    """
+    from . import _check_options
+
+    if not isinstance(X, np.ndarray):
+        raise ValueError("'X' must be a numpy array.")
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64).ravel()
+    if X.ndim != 2 or X.shape[0] != len(y):
+        raise ValueError("Number of rows in X does not match length of y.")
+    if np.isnan(X).any() or np.isnan(y).any():
+        raise ValueError("'X' or 'y' contains NaN values. Please remove or impute them before proceeding.")
+
+    _check_options(num_dummies, X.shape[1], standardize, type)
+
+    if T_stop is None:
+        T_stop = num_dummies
+    if not (1 <= T_stop <= num_dummies):
+        raise ValueError(f"Value of 'T_stop' not valid. 'T_stop' must be an integer from 1 to {num_dummies}.")
+
+    rows, row_weights, offsets = _compress_subsamples(X.shape[0], row_sets, weights)
+
+    n_threads = _split_threads(len(offsets) - 1, n_threads)
+
+    with _parallel_region(n_threads):
+        counts = _subsample_selection_counts(X, y, rows, row_weights, offsets, T_stop, early_stop,
+                                             intercept, standardize, num_dummies, type, int(n_threads))
+    return np.asarray(counts, dtype=np.int64).ravel()
+
+
+def _compress_subsamples(n, row_sets, weights):
+    """
+    Convert subsamples into the compressed (rows, row_weights, offsets) representation.
+
+    Parameters
+    ----------
+    n : int
+        Number of rows of X.
+    row_sets : numpy.ndarray or list or None
+        Row indices of the subsamples.
+    weights : numpy.ndarray or None
+        Multiplicities of the rows in the subsamples.
+
+    Returns
+    -------
+    tuple
+        Unique row indices, their multiplicities and the start of every subsample.
+    """
+    if (row_sets is None) == (weights is None):
+        raise ValueError("Exactly one of 'row_sets' and 'weights' must be provided.")
+
+    if weights is not None:
+        weights = np.asarray(weights)
+        if weights.ndim != 2 or weights.shape[1] != n:
+            raise ValueError("'weights' must be a 2-d array with one column per row of X.")
+        if (weights < 0).any() or not np.array_equal(weights, np.round(weights)):
+            raise ValueError("'weights' must contain non-negative integer multiplicities.")
+        samples = [(np.flatnonzero(w), w[w > 0]) for w in weights]
+    else:
+        samples = []
+        for row_set in row_sets:
+            row_set = np.asarray(row_set)
+            if row_set.ndim != 1 or not np.issubdtype(row_set.dtype, np.integer):
+                raise ValueError("'row_sets' must contain 1-d integer arrays of row indices.")
+            if len(row_set) > 0 and (row_set.min() < 0 or row_set.max() >= n):
+                raise ValueError("'row_sets' contains row indices outside of X.")
+            samples.append(np.unique(row_set, return_counts=True))
+
+    if len(samples) == 0:
+        raise ValueError("At least one subsample must be provided.")
+    if any(len(sample_rows) < 2 for sample_rows, _ in samples):
+        raise ValueError("Every subsample must contain at least two distinct rows.")
+
+    offsets = np.zeros(len(samples) + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(sample_rows) for sample_rows, _ in samples])
+    rows = np.concatenate([sample_rows for sample_rows, _ in samples]).astype(np.uint64)
+    row_weights = np.concatenate([sample_weights for _, sample_weights in samples]).astype(np.float64)
+    return rows, row_weights, offsets
+
+
+class TLARSBatch:
+    """
+    Many TLARS models that share their original predictors (e.g., the random experiments of the
+    T-Rex selector), created by restore_batch() or load_batch().
+
+    The standardized original predictors are held once and shared read-only by all models; every
+    model only stores its dummies. The models can be continued together with execute_lars_step()
+    or used individually like any TLARS model.
+
+    Attributes
+    ----------
+    models : list of TLARS
+        The restored models.
+    """
+
+    def __init__(self, models, original_X):
+        self.models = models
+        self._original_X = original_X
+
+    def __len__(self):
+        return len(self.models)
+
+    def __getitem__(self, index):
+        return self.models[index]
+
+    def __iter__(self):
+        return iter(self.models)
+
+    def execute_lars_step(self, T_stop, early_stop=True, n_threads=None):
+        """
+        Continue all models until T_stop dummies are included.
+
+        Parameters
+        ----------
+        T_stop : int
+            See TLARS.fit().
+        early_stop : bool, default=True
+            See TLARS.fit().
+        n_threads : int, optional
+            Total number of threads. Defaults to the thread budget (see set_num_threads).
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        num_dummies = min(model._model.num_dummies for model in self.models)
+        if not (1 <= T_stop <= num_dummies):
+            raise ValueError(f"Value of 'T_stop' not valid. 'T_stop' must be an integer from 1 to {num_dummies}.")
+        outer = _split_threads(len(self.models), n_threads)
+        with _parallel_region(outer):
+            _continue_experiments([model._model for model in self.models], int(T_stop), outer, early_stop)
+        return self
+
+    def get_all(self):
+        """
+        Get the states of all models (see TLARS.get_all()).
+
+        Returns
+        -------
+        list of dict
+            States with the complete predictor matrix of every model.
+        """
+        return [model.get_all() for model in self.models]
+
+    def save(self, path):
+        """
+        Write the states of all models into one file that holds the original predictors once.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file (restore it with load_batch()).
+        """
+        states = [model._model.get_all(False) for model in self.models]
+        with open(path, 'wb') as f:
+            pickle.dump({'format': 'tlars-batch', 'version': 1, 'original_X': self._original_X, 'states': states},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def restore_batch(states, n_threads=None):
+    """
+    Restore many TLARS models from their states at once.
+
+    Restoring a model with TLARS(lars_state=...) copies the complete predictor matrix out of the
+    state. If the states share their original predictors (the first p - num_dummies columns, as
+    for the random experiments of the T-Rex selector), restore_batch() verifies that these columns
+    are identical, keeps one copy that all models read from, and copies only the dummies of every
+    model, in parallel.
+
+    Parameters
+    ----------
+    states : list of dict
+        States obtained via TLARS.get_all().
+    n_threads : int, optional
+        Number of threads used to copy the predictors and, later, to continue the models with
+        TLARSBatch.execute_lars_step(). Defaults to the thread budget (see set_num_threads).
+
+    Returns
+    -------
+    TLARSBatch
+        The restored models.
+    """
+    states = list(states)
+    if len(states) == 0:
+        raise ValueError("At least one state must be provided.")
+    if any(not isinstance(state, dict) or len(state) != 4 for state in states):
+        raise ValueError("Every state must be a dictionary containing the state variables of a TLARS object. "
+                         "It must be obtained via model.get_all().")
+
+    # Original predictors: identical columns of all states (skipped for sufficient statistics)
+    num_original = {state['l1']['p'] - state['l3']['num_dummies'] for state in states}
+    num_rows = {state['l1']['n'] for state in states}
+    original_X = None
+    if (len(num_original) == 1 and len(num_rows) == 1 and num_original != {0}
+            and not any(state['l3'].get('use_gram', False) for state in states)):
+        p = num_original.pop()
+        original_X = np.asfortranarray(states[0]['l2']['X'][:, :p])
+        for state in states[1:]:
+            columns = state['l2']['X'][:, :p]
+            same_memory = columns.ctypes.data == original_X.ctypes.data and columns.strides == original_X.strides
+            if not (same_memory or np.array_equal(columns, original_X)):
+                original_X = None
+                break
+
+    if original_X is None:
+        return _restore(states, [None]*len(states), None, n_threads)
+    p = original_X.shape[1]
+    own_blocks = [state['l2']['X'][:, p:] for state in states]
+    return _restore(states, own_blocks, original_X, n_threads)
+
+
+def load_batch(path, n_threads=None):
+    """
+    Restore many TLARS models from a file written by TLARSBatch.save().
+
+    Parameters
+    ----------
+    path : str
+        Path of the file.
+    n_threads : int, optional
+        See restore_batch().
+
+    Returns
+    -------
+    TLARSBatch
+        The restored models.
+    """
+    with open(path, 'rb') as f:
+        container = pickle.load(f)
+    if not isinstance(container, dict) or container.get('format') != 'tlars-batch':
+        raise ValueError(f"'{path}' is not a file written by TLARSBatch.save().")
+    original_X = container['original_X']
+    states = container['states']
+    own_blocks = [state['l2']['X'] if original_X is not None else None for state in states]
+    return _restore(states, own_blocks, original_X, n_threads)
+
+
+def _restore(states, own_blocks, original_X, n_threads):
+    """
+    Restore models from states and the predictors that are not shared.
+
+    Parameters
+    ----------
+    states : list of dict
+        States of the models. Their predictor matrices are not read if own_blocks is given.
+    own_blocks : list
+        Predictors of every model after the shared ones (None to use the predictor matrix of
+        the state).
+    original_X : numpy.ndarray or None
+        Shared original predictors.
+    n_threads : int or None
+        Total number of threads.
+
+    Returns
+    -------
+    TLARSBatch
+        The restored models.
+    """
+    from . import TLARS
+
+    light_states = []
+    for state, own_block in zip(states, own_blocks):
+        l2 = state['l2'] if own_block is None else {key: value for key, value in state['l2'].items() if key != 'X'}
+        light_states.append({'l1': state['l1'], 'l2': l2, 'l3': state['l3'], 'l4': state['l4']})
+
+    outer = _split_threads(len(states), n_threads)
+    engines = _restore_experiments(light_states, original_X, own_blocks, outer)
+    models = []
+    for engine in engines:
+        model = TLARS.__new__(TLARS)
+        model._model = engine
+        model.n_threads = 1
+        models.append(model)
+    return TLARSBatch(models, original_X)
@@ -0,0 +1,257 @@
+import os
+import glob
+import pickle
+import hashlib
+import tempfile
+import numpy as np
+
+
+class FitCache:
+    """
+    On-disk cache of fitted TLARS models keyed by a fingerprint of the data and the fit parameters.
+
+    Fitted states (see TLARS.get_all()) are stored as one file per data set, fit parameters and
+    T_stop. The predictor matrix is not stored: a cached state is restored on the predictors that
+    are passed to fit(), so a file only holds the O(n + p) vectors of the state, the active
+    factorization and the stored solution path (see the history argument of TLARS; 'knots_only'
+    or 'last' keep the files small for wide data). When a larger T_stop than the deepest cached
+    one is requested, the deepest cached state is warm-restarted and only the missing steps are
+    computed. The least recently used files are evicted when the cache exceeds max_bytes.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the cache files (created if it does not exist).
+    max_bytes : int, default=2**30
+        Maximum total size of the cache files.
+    num_blocks : int, default=64
+        Number of evenly spaced blocks of X that are hashed for the fingerprint. The same number
+        of evenly spaced rows and columns of X is hashed as well.
+    block_size : int, default=4096
+        Number of elements of X per hashed block.
+    full_hash : bool, default=False
+        If True, all elements of X are hashed. This reads all n*p elements (for a memory-mapped X,
+        the whole file), which can cost as much as the fit itself. Otherwise, the fingerprint
+        consists of the shape, the data type, the hashed blocks, rows and columns, which only
+        reads num_blocks*(block_size + n + p) elements but does not detect changes outside of
+        them.
+
+    Attributes
+    ----------
+    hits : int
+        Number of fits that were loaded from the cache without computing any step.
+    resumed : int
+        Number of fits that were continued from a cached state with a smaller T_stop.
+    misses : int
+        Number of fits that were computed from scratch.
+    """
+
+    def __init__(self, directory, max_bytes=2**30, num_blocks=64, block_size=4096, full_hash=False):
+        if not isinstance(max_bytes, (int, np.integer)) or max_bytes < 0:
+            raise ValueError("'max_bytes' must be an integer >= 0.")
+        if num_blocks < 1 or block_size < 1:
+            raise ValueError("'num_blocks' and 'block_size' must be >= 1.")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self.num_blocks = int(num_blocks)
+        self.block_size = int(block_size)
+        self.full_hash = full_hash
+        self.hits = 0
+        self.resumed = 0
+        self.misses = 0
+
+    def fingerprint(self, X, y, **params):
+        """
+        Compute the cache key of a data set and fit parameters.
+
+        Parameters
+        ----------
+        X : numpy.ndarray
+            Predictor matrix (including dummies).
+        y : numpy.ndarray
+            Response vector.
+        **params
+            Parameters of the fit (e.g., intercept, standardize, num_dummies, type).
+
+        Returns
+        -------
+        str
+            Hexadecimal key.
+        """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(repr((X.shape, X.dtype.str, sorted(params.items()))).encode())
+        if self.full_hash:
+            # Hash chunks of rows, so that only one chunk is copied if X is not C-contiguous
+            chunk = max(1, 2**20 // max(1, X.shape[1]))
+            for start in range(0, X.shape[0], chunk):
+                h.update(np.ascontiguousarray(X[start:start + chunk]).data)
+        else:
+            size = X.size
+            starts = np.unique(np.linspace(0, max(0, size - self.block_size), self.num_blocks).astype(np.int64))
+            indices = (starts[:, None] + np.arange(min(self.block_size, size))).ravel()
+            h.update(np.ascontiguousarray(X.flat[indices]).data)
+            # Evenly spaced rows and columns (only the selected elements are read and copied)
+            n, p = X.shape
+            rows = np.unique(np.linspace(0, n - 1, min(n, self.num_blocks)).astype(np.int64))
+            cols = np.unique(np.linspace(0, p - 1, min(p, self.num_blocks)).astype(np.int64))
+            h.update(np.ascontiguousarray(X[rows]).data)
+            h.update(np.ascontiguousarray(X[:, cols]).data)
+        h.update(np.ascontiguousarray(y, dtype=np.float64).data)
+        return h.hexdigest()
+
+    def fit(self, X, y, T_stop=None, early_stop=True, **kwargs):
+        """
+        Fit a TLARS model or load it from the cache.
+
+        Parameters
+        ----------
+        X : numpy.ndarray
+            Real valued predictor matrix (including dummies).
+        y : numpy.ndarray
+            Response vector.
+        T_stop : int, optional
+            See TLARS.fit(). Defaults to num_dummies.
+        early_stop : bool, default=True
+            See TLARS.fit().
+        **kwargs
+            Arguments of TLARS (intercept, standardize, num_dummies, type, history, verbose,
+            n_threads). Only verbose and n_threads are not part of the key.
+
+        Returns
+        -------
+        TLARS
+            The fitted model.
+        """
+        from . import TLARS
+
+        if not isinstance(X, np.ndarray):
+            raise ValueError("'X' must be a numpy array.")
+        y = np.asarray(y, dtype=np.float64).ravel()
+        run_options = {key: kwargs.pop(key) for key in ('verbose', 'n_threads') if key in kwargs}
+        params = {'intercept': False, 'standardize': True, 'num_dummies': 0, 'type': 'lar', 'history': 'full'}
+        unknown = set(kwargs) - set(params)
+        if unknown:
+            raise ValueError(f"Unknown arguments: {', '.join(sorted(unknown))}.")
+        params.update(kwargs)
+        if T_stop is None:
+            T_stop = params['num_dummies']
+        key = self.fingerprint(X, y, **params)
+
+        # The full path is stored with the depth 'full', early stopped fits with their T_stop
+        depth = 'full' if not early_stop else f"T{int(T_stop):08d}"
+        path = self._path(key, depth)
+        if os.path.exists(path):
+            model = self._load(path, X, params, **run_options)
+            if model is not None:
+                self.hits += 1
+                return model
+
+        # Resume from the deepest cached early stopped state
+        model = None
+        for cached in sorted(glob.glob(self._path(key, 'T*')), reverse=True):
+            if not early_stop or int(os.path.basename(cached).split('-T')[1].split('.')[0]) < T_stop:
+                model = self._load(cached, X, params, **run_options)
+                if model is not None:
+                    self.resumed += 1
+                    break
+        if model is None:
+            self.misses += 1
+            model = TLARS(X, y, **params, **run_options)
+
+        model.fit(T_stop=T_stop, early_stop=early_stop)
+        lars_state = model._model.get_all(False)
+        del lars_state['l2']['X']
+        self._store(path, lars_state)
+        return model
+
+    def clear(self):
+        """
+        Remove all cache files.
+        """
+        for path in self._files():
+            os.remove(path)
+
+    @property
+    def size_bytes(self):
+        """
+        Get the total size of the cache files.
+
+        Returns
+        -------
+        int
+            Size in bytes.
+        """
+        return sum(os.path.getsize(path) for path in self._files())
+
+    def _path(self, key, depth):
+        """
+        Get the path of the cache file of a key and a depth.
+        """
+        return os.path.join(self.directory, f"{key}-{depth}.tlars")
+
+    def _files(self):
+        """
+        Get the paths of all cache files.
+        """
+        return glob.glob(os.path.join(self.directory, "*.tlars"))
+
+    def _load(self, path, X, params, **run_options):
+        """
+        Load a model from a cache file and mark the file as recently used.
+
+        The state is restored on X, which is preprocessed once (see PreparedDesign) and read by the
+        model without a further copy.
+
+        Returns
+        -------
+        TLARS or None
+            The model or None if the file is unreadable (e.g., removed concurrently).
+        """
+        from . import TLARS
+        from .design import PreparedDesign
+
+        try:
+            with open(path, 'rb') as f:
+                lars_state = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        design = PreparedDesign(X, intercept=params['intercept'], standardize=params['standardize'])
+        model = TLARS(lars_state=lars_state, n_threads=run_options.get('n_threads', 1))
+        model._model.set_shared_block(design._design, np.empty((X.shape[0], 0)))
+        if 'verbose' in run_options:
+            model._model.verbose = run_options['verbose']
+        return model
+
+    def _store(self, path, lars_state):
+        """
+        Write a state atomically and evict the least recently used files.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(lars_state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used files until the cache fits into max_bytes.
+        """
+        files = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,348 @@
+import os
+import pickle
+import numpy as np
+from .threads import _parallel_region
+
+
+class CheckpointWriter:
+    """
+    Append-only incremental checkpoints of a TLARS model.
+
+    The first record of the checkpoint file is the complete state of the model (see
+    TLARS.get_all()), which contains the standardized predictor matrix, norm_x and mean_x. Every
+    further checkpoint appends only the changes since the previous one: the new actions, the
+    non-zero coefficients, RSS, step sizes and lambda-values of the new steps. The cost of a
+    checkpoint therefore depends on the number of new steps and active predictors, not on n, p or
+    the length of the path. Use load_checkpoint() to restore the model.
+
+    If the file already contains a checkpoint (e.g., after restoring a preempted run with
+    load_checkpoint()), new checkpoints are appended to it; a record that was only partially
+    written is discarded.
+
+    Parameters
+    ----------
+    model : TLARS
+        The model to checkpoint.
+    path : str
+        Path of the checkpoint file.
+    fsync : bool, default=True
+        If True, every checkpoint is flushed to the storage device before returning.
+
+    Examples
+    --------
+    >>> writer = CheckpointWriter(TLARS(XD, y, num_dummies=num_dummies), "run.ckpt")
+    >>> writer.fit(early_stop=False, every=10)
+    >>> model = load_checkpoint("run.ckpt")
+    """
+
+    def __init__(self, model, path, fsync=True):
+        self.model = model
+        self.path = path
+        self.fsync = fsync
+
+        # Position of the model: step counter, number of actions and number of ignored predictors
+        delta = model._model.get_checkpoint_delta(2**30, 2**30)
+        position = (delta['k'], len(model._model.get_actions()), delta['count_ignored'])
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            records, end = _read_records(path)
+            if not records:
+                raise ValueError(f"'{path}' does not contain a checkpoint.")
+            if _position(records) != position:
+                raise ValueError("The model does not match the latest checkpoint in the file. "
+                                 "Restore it with load_checkpoint() first.")
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+            self._position = position
+        else:
+            self._append(model.get_all())
+            self._position = position
+
+    def checkpoint(self):
+        """
+        Append the changes of the model since the previous checkpoint.
+
+        Returns
+        -------
+        int
+            Number of bytes appended (0 if the model did not change).
+        """
+        since_step, since_action, since_ignored = self._position
+        delta = self.model._model.get_checkpoint_delta(since_step, since_action, since_ignored)
+        position = (delta['k'], since_action + len(delta['actions']), delta['count_ignored'])
+        if position == self._position:
+            return 0
+        num_bytes = self._append(delta)
+        self._position = position
+        return num_bytes
+
+    def fit(self, T_stop=None, early_stop=True, every=1):
+        """
+        Fit the model and append a checkpoint after every `every` steps.
+
+        Parameters
+        ----------
+        T_stop : int, optional
+            See TLARS.fit(). Defaults to the number of dummies.
+        early_stop : bool, default=True
+            See TLARS.fit().
+        every : int, default=1
+            Number of T-LARS steps between two checkpoints.
+
+        Returns
+        -------
+        TLARS
+            The fitted model.
+        """
+        num_dummies = self.model._model.num_dummies
+        if T_stop is None:
+            T_stop = num_dummies
+        if not (1 <= T_stop <= num_dummies):
+            raise ValueError(f"Value of 'T_stop' not valid. 'T_stop' must be an integer from 1 to {num_dummies}.")
+        if not isinstance(every, (int, np.integer)) or every < 1:
+            raise ValueError("'every' must be an integer >= 1.")
+
+        while True:
+            with _parallel_region(self.model.n_threads):
+                self.model._model.execute_lars_step(T_stop, early_stop, int(every))
+            if self.checkpoint() == 0:
+                return self.model
+
+    def _append(self, record):
+        """
+        Append a record to the checkpoint file.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+        """
+        data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(self.path, 'ab') as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        return len(data)
+
+
+def load_checkpoint(path, n_threads=1):
+    """
+    Restore a TLARS model from a checkpoint file written by CheckpointWriter.
+
+    The changes of all checkpoints are replayed on the initial state: the actions determine the
+    active and inactive predictors, the stored coefficients of the latest step determine the
+    residuals and correlations, and the Cholesky factor of the active predictors is rebuilt. A
+    last record that was only partially written (e.g., because the worker was preempted) is
+    ignored.
+
+    Parameters
+    ----------
+    path : str
+        Path of the checkpoint file.
+    n_threads : int, default=1
+        Number of threads of the restored model (see TLARS).
+
+    Returns
+    -------
+    TLARS
+        The model at the latest checkpoint, ready to continue with fit().
+    """
+    from . import TLARS
+
+    records, _ = _read_records(path)
+    if not records:
+        raise ValueError(f"'{path}' does not contain a checkpoint.")
+    return TLARS(lars_state=_replay(records[0], records[1:]), n_threads=n_threads)
+
+
+def _read_records(path):
+    """
+    Read all complete records of a checkpoint file.
+
+    Returns
+    -------
+    tuple
+        List of the records and the file offset after the last complete record.
+    """
+    records = []
+    end = 0
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                records.append(pickle.load(f))
+            except (EOFError, pickle.UnpicklingError, ValueError):
+                # End of the file or a partially written last record
+                break
+            end = f.tell()
+    return records, end
+
+
+def _position(records):
+    """
+    Get the step counter, number of actions and number of ignored predictors after the last record.
+    """
+    base = records[0]
+    k = base['l3']['k']
+    num_actions = len(base['l4']['actions'])
+    num_ignored = sum(base['l1']['ignored_pred'])
+    for delta in records[1:]:
+        k = delta['k']
+        num_actions += len(delta['actions'])
+        num_ignored = delta.get('count_ignored', len(delta['ignored']))
+    return k, num_actions, num_ignored
+
+
+def _replay(state, deltas, shared_X=None):
+    """
+    Apply the changes of the checkpoints to the initial state.
+
+    Parameters
+    ----------
+    state : dict
+        Initial state (see TLARS.get_all()). It is modified in place.
+    deltas : list of dict
+        Changes of the checkpoints (see tlars_cpp.get_checkpoint_delta()).
+    shared_X : numpy.ndarray, optional
+        Preprocessed predictors that precede the predictor matrix of the state, for a state
+        obtained via tlars_cpp.get_all(include_shared=False) (see TLARS.from_design()).
+
+    Returns
+    -------
+    dict
+        State at the latest checkpoint.
+    """
+    if not deltas:
+        return state
+    l1, l2, l3, l4 = state['l1'], state['l2'], state['l3'], state['l4']
+    p = l1['p']
+    dummy_ind = p - l3['num_dummies']
+
+    # Solution path of the initial state by step (coefficients as non-zero entries)
+    k = l3['k']
+    stored = [(list(indices), list(values)) for indices, values in zip(l1['knot_indices'], l1['knot_values'])]
+    for beta in l1['beta_state']:
+        indices = np.flatnonzero(beta)
+        stored.append((indices.tolist(), np.asarray(beta)[indices].tolist()))
+    path = dict(zip(range(k - len(stored) + 1, k + 1), stored))
+    RSS = dict(zip(range(k - len(l2['RSS']) + 1, k + 1), l2['RSS']))
+    gamrat = dict(zip(range(k - len(l2['gamrat']) + 1, k + 1), l2['gamrat']))
+    gamhat = dict(zip(range(k - len(l2['gamhat_list']) + 1, k + 1), l2['gamhat_list']))
+    lambda_start = l1['lambda_start']
+    lambdas = dict(zip(range(lambda_start, k), l2['lambda']))
+
+    # Ordered sets (insertion order) of the active and inactive predictors
+    active = dict.fromkeys(l1['active_pred'])
+    inactive = dict.fromkeys(l1['inactive_pred'])
+    ignored = list(l1['ignored_pred'])
+    first_in = list(l2['first_in'])
+    actions = list(l4['actions'])
+
+    for delta in deltas:
+        for action, entry_step in zip(delta['actions'], delta['first_in']):
+            index = abs(action) - 1
+            if action > 0:
+                del inactive[index]
+                active[index] = None
+                first_in[index] = entry_step
+            else:
+                del active[index]
+                inactive[index] = None
+        actions.extend(delta['actions'])
+        for index in delta['ignored']:
+            if not ignored[index]:
+                ignored[index] = True
+                inactive.pop(index, None)
+        first_step = delta['first_step']
+        path.update(zip(range(first_step, first_step + len(delta['beta_indices'])),
+                        zip(delta['beta_indices'], delta['beta_values'])))
+        RSS.update(zip(range(first_step, first_step + len(delta['RSS'])), delta['RSS']))
+        gamrat.update(zip(range(first_step, first_step + len(delta['gamrat'])), delta['gamrat']))
+        gamhat.update(zip(range(first_step, first_step + len(delta['gamhat'])), delta['gamhat']))
+        lambdas.update(zip(range(delta['lambda_first'], delta['lambda_first'] + len(delta['lambda'])), delta['lambda']))
+        k = delta['k']
+    history = deltas[-1]['history']
+
+    def tail(values, last):
+        # Consecutive entries up to step last (only the last one if history = 'last')
+        first = last
+        while history != 'last' and first - 1 in values:
+            first -= 1
+        return [values[step] for step in range(first, last + 1) if step in values]
+
+    # Solution path according to the history
+    steps = tail(path, k)
+    beta = np.zeros(p)
+    beta[steps[-1][0]] = steps[-1][1]
+    l1['beta_state'] = [path_beta.tolist() for path_beta in _dense(steps, p)] if history == 'full' else [beta.tolist()]
+    l1['knot_indices'] = [indices for indices, _ in steps[:-1]] if history == 'knots_only' else []
+    l1['knot_values'] = [values for _, values in steps[:-1]] if history == 'knots_only' else []
+    l1['history'] = history
+    l2['RSS'] = tail(RSS, k)
+    l2['RSS_next'] = l2['RSS'][-1]
+    l2['R2'] = [1 - rss / l1['ssy'] for rss in l2['RSS']]
+    l2['R2_next'] = l2['R2'][-1]
+    l2['gamrat'] = tail(gamrat, k) if k > 0 else []
+    l2['gamhat_list'] = tail(gamhat, k) if k > 0 else []
+    if l2['gamhat_list']:
+        l2['gamhat'] = l2['gamhat_list'][-1]
+    if history == 'last':
+        lambda_start = max(lambda_start, k - 1)
+    l1['lambda_start'] = lambda_start
+    l2['lambda'] = np.array([lambdas.get(index, 0.0) for index in range(lambda_start, k)] or [0.0])
+
+    # Active set and counters
+    active = list(active)
+    l1['active_pred'] = active
+    l1['count_active_pred'] = len(active)
+    l1['inactive_pred'] = list(inactive)
+    l1['count_inactive_pred'] = len(inactive)
+    l1['ignored_pred'] = ignored
+    l1['count_ignored_pred'] = sum(ignored)
+    l1['new_pred'] = []
+    l1['count_new_pred'] = 0
+    l2['first_in'] = first_in
+    l3['count_dummies'] = sum(index >= dummy_ind for index in active)
+    l3['k'] = k
+    l3['drop'] = deltas[-1]['drop']
+    l3['next_beta'] = beta.tolist()
+    l4['actions'] = actions
+    l4['df'] = np.cumsum([int(l3['intercept'])] + [1 if action > 0 else -1 for action in actions]).tolist()
+
+    # Residuals, correlations and Cholesky factor of the active predictors
+    if l3['use_gram']:
+        gram = l2['gram']
+        l1['corr_predictors'] = np.ravel(l2['gram_xty']) - gram @ beta
+        gram_active = gram[np.ix_(active, active)]
+    elif shared_X is None:
+        X = l2['X']
+        residuals = np.ravel(l2['y']) - X @ beta
+        l1['residuals'] = residuals
+        l1['corr_predictors'] = X.T @ residuals
+        X_active = X[:, active]
+        gram_active = X_active.T @ X_active
+    else:
+        X = l2['X']
+        num_shared = shared_X.shape[1]
+        residuals = np.ravel(l2['y']) - shared_X @ beta[:num_shared] - X @ beta[num_shared:]
+        l1['residuals'] = residuals
+        l1['corr_predictors'] = np.concatenate([shared_X.T @ residuals, X.T @ residuals])
+        columns = [shared_X[:, index] if index < num_shared else X[:, index - num_shared] for index in active]
+        X_active = np.column_stack(columns) if columns else np.zeros((len(residuals), 0))
+        gram_active = X_active.T @ X_active
+    if active:
+        l2['active_data_decomp'] = np.asfortranarray(np.linalg.cholesky(gram_active).T)
+    else:
+        l2['active_data_decomp'] = np.zeros((1, 1))
+    l2['active_data_rank'] = len(active)
+    return state
+
+
+def _dense(steps, p):
+    """
+    Expand coefficient vectors given by their non-zero entries.
+    """
+    for indices, values in steps:
+        beta = np.zeros(p)
+        beta[indices] = values
+        yield beta
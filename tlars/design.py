@@ -0,0 +1,128 @@
+import numpy as np
+from .tlars_cpp import prepared_design
+
+
+class PreparedDesign:
+    """
+    Preprocessed predictor matrix that is shared by many TLARS models.
+
+    The column means, the column norms, the mask of ignored (constant) predictors and the
+    centered/standardized matrix are computed once. The design can be passed to TLARS in place
+    of X any number of times (e.g., with different responses, dummies appended beforehand, or
+    from different threads); all models read the same matrix without copying or
+    re-standardizing it.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        Real valued predictor matrix (including dummies).
+    intercept : bool, default=False
+        If True, an intercept is included (the columns are centered).
+    standardize : bool, default=True
+        If True, the predictors are standardized.
+    """
+
+    def __init__(self, X, intercept=False, standardize=True):
+        if not isinstance(X, np.ndarray):
+            raise ValueError("'X' must be a numpy array.")
+
+        if X.ndim != 2:
+            raise ValueError("'X' must be a 2-dimensional array.")
+
+        if np.isnan(X).any():
+            raise ValueError("'X' contains NaN values. Please remove or impute them before proceeding.")
+
+        if not standardize:
+            import warnings
+            warnings.warn("'standardize' should be True for the T-LARS algorithm. "
+                          "Since you set standardize=False, we hope you have a good reason for doing that!")
+
+        self._design = prepared_design(np.asarray(X, dtype=np.float64), intercept, standardize)
+
+    @property
+    def shape(self):
+        """
+        Get the shape of the predictor matrix.
+
+        Returns
+        -------
+        tuple
+            Number of rows and columns.
+        """
+        return (self._design.n_rows, self._design.n_cols)
+
+    @property
+    def intercept(self):
+        """
+        Get whether the columns are centered.
+
+        Returns
+        -------
+        bool
+            True if an intercept is included.
+        """
+        return self._design.intercept
+
+    @property
+    def standardize(self):
+        """
+        Get whether the columns are standardized.
+
+        Returns
+        -------
+        bool
+            True if the predictors are standardized.
+        """
+        return self._design.standardize
+
+    @property
+    def mean_x(self):
+        """
+        Get the sample means of the predictors.
+
+        Returns
+        -------
+        numpy.ndarray
+            The sample means of the predictors.
+        """
+        return self._design.mean_x
+
+    @property
+    def norm_x(self):
+        """
+        Get the L2-norms of the (centered) predictors.
+
+        Returns
+        -------
+        numpy.ndarray
+            The L2-norms of the predictors.
+        """
+        return self._design.norm_x
+
+    @property
+    def ignored_pred(self):
+        """
+        Get the mask of predictors that are ignored because of a too low variance.
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean mask of ignored predictors.
+        """
+        return np.array(self._design.ignored_pred, dtype=bool)
+
+    def __repr__(self):
+        """
+        Get a string representation of the design.
+
+        Returns
+        -------
+        str
+            A string representation of the design.
+        """
+        n, p = self.shape
+        return (f"PreparedDesign object:\n"
+                f"\t - Shape: {n} x {p}\n"
+                f"\t - Intercept: {self.intercept}\n"
+                f"\t - Standardize: {self.standardize}\n"
+                f"\t - Ignored predictors: {int(self.ignored_pred.sum())}")
@@ -0,0 +1,431 @@
+import os
+import abc
+import sys
+import secrets
+import threading
+import subprocess
+from collections import deque
+from multiprocessing.connection import Listener, Client, wait
+import numpy as np
+from .checkpoint import _replay
+from .threads import _parallel_region, get_num_threads, set_num_threads
+
+
+class Transport(abc.ABC):
+    """
+    Interface of the transports that connect run_experiments() with its workers.
+
+    A transport starts (or accepts) workers, forwards messages to them and returns their
+    messages. Workers are identified by arbitrary hashable ids. A worker that fails or
+    disconnects is reported once by recv() with the message None; its running task is then
+    resumed by another worker. Subclasses must implement all methods.
+    """
+
+    @abc.abstractmethod
+    def start(self, config):
+        """
+        Start the workers and send them the configuration of the experiments.
+
+        Parameters
+        ----------
+        config : dict
+            Message that every worker receives before its first task.
+        """
+
+    @abc.abstractmethod
+    def workers(self):
+        """
+        Get the ids of the workers that are alive.
+
+        Returns
+        -------
+        list
+            Worker ids.
+        """
+
+    @abc.abstractmethod
+    def send(self, worker_id, message):
+        """
+        Send a message to a worker.
+        """
+
+    @abc.abstractmethod
+    def recv(self):
+        """
+        Wait for the next message of any worker.
+
+        Returns
+        -------
+        tuple
+            Worker id and message (None if the worker failed).
+        """
+
+    @abc.abstractmethod
+    def close(self):
+        """
+        Stop the workers and release all resources.
+        """
+
+
+class SocketTransport(Transport):
+    """
+    Transport over authenticated TCP connections, e.g., to workers on other machines.
+
+    The coordinator listens on address; every worker connects with run_worker() (using the same
+    authkey) and keeps its own memory-mapped copy of the predictor matrix.
+
+    Parameters
+    ----------
+    num_workers : int
+        Number of workers that must connect before the experiments start.
+    address : tuple, default=('localhost', 0)
+        Host and port to listen on (port 0: any free port, see the address attribute).
+    authkey : bytes, optional
+        Shared secret of the coordinator and the workers. Defaults to the environment variable
+        TLARS_AUTHKEY (hexadecimal) or a random key.
+    connect_timeout : float, default=60
+        Seconds to wait for the workers to connect.
+    """
+
+    def __init__(self, num_workers, address=('localhost', 0), authkey=None, connect_timeout=60):
+        if not isinstance(num_workers, (int, np.integer)) or num_workers < 1:
+            raise ValueError("'num_workers' must be an integer >= 1.")
+        if authkey is None:
+            authkey = bytes.fromhex(os.environ['TLARS_AUTHKEY']) if 'TLARS_AUTHKEY' in os.environ \
+                else secrets.token_bytes(32)
+        self.num_workers = int(num_workers)
+        self.authkey = authkey
+        self.connect_timeout = connect_timeout
+        self._listener = Listener(address, authkey=authkey)
+        self._connections = {}
+
+    @property
+    def address(self):
+        """
+        Get the host and port the coordinator listens on.
+
+        Returns
+        -------
+        tuple
+            Host and port.
+        """
+        return self._listener.address
+
+    def start(self, config):
+        accepted = []
+
+        def accept():
+            try:
+                for _ in range(self.num_workers):
+                    accepted.append(self._listener.accept())
+            except OSError:
+                # The listener was closed while waiting
+                pass
+
+        thread = threading.Thread(target=accept, daemon=True)
+        thread.start()
+        thread.join(self.connect_timeout)
+        if len(accepted) < self.num_workers:
+            self.close()
+            raise RuntimeError(f"Only {len(accepted)} of {self.num_workers} workers connected.")
+        self._connections = dict(enumerate(accepted))
+        for worker_id in self.workers():
+            self.send(worker_id, ('config', config))
+
+    def workers(self):
+        return list(self._connections)
+
+    def send(self, worker_id, message):
+        try:
+            self._connections[worker_id].send(message)
+        except OSError:
+            # The failure is reported by recv()
+            pass
+
+    def recv(self):
+        ids = {connection: worker_id for worker_id, connection in self._connections.items()}
+        connection = wait(list(ids))[0]
+        worker_id = ids[connection]
+        try:
+            return worker_id, connection.recv()
+        except (EOFError, OSError):
+            connection.close()
+            del self._connections[worker_id]
+            return worker_id, None
+
+    def close(self):
+        for connection in self._connections.values():
+            try:
+                connection.send(('stop',))
+            except OSError:
+                pass
+            connection.close()
+        self._connections = {}
+        self._listener.close()
+
+
+class LocalTransport(SocketTransport):
+    """
+    Transport to worker subprocesses on the local machine (connected over localhost sockets).
+
+    Parameters
+    ----------
+    num_workers : int, optional
+        Number of worker processes. Defaults to the thread budget (see set_num_threads).
+    connect_timeout : float, default=60
+        Seconds to wait for the workers to start.
+    """
+
+    def __init__(self, num_workers=None, connect_timeout=60):
+        super().__init__(get_num_threads() if num_workers is None else num_workers, connect_timeout=connect_timeout)
+        self._processes = {}
+
+    def start(self, config):
+        host, port = self.address
+        # The workers import the same tlars package as the coordinator
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        python_path = os.pathsep.join(filter(None, [package_root, os.environ.get('PYTHONPATH')]))
+        env = dict(os.environ, TLARS_AUTHKEY=self.authkey.hex(), PYTHONPATH=python_path)
+        command = f"from tlars.distributed import run_worker; run_worker({host!r}, {port})"
+        processes = [subprocess.Popen([sys.executable, '-c', command], env=env) for _ in range(self.num_workers)]
+        # The thread budget is split between the workers, each of which runs one fit at a time
+        n_threads = max(1, get_num_threads() // self.num_workers)
+        try:
+            super().start(dict(config, report_pid=True, n_threads=n_threads))
+            # Workers are identified in the order in which they connected, so map them via their process ids
+            self._processes = {}
+            for worker_id, connection in self._connections.items():
+                pid = connection.recv()
+                self._processes[worker_id] = next(process for process in processes if process.pid == pid)
+        except (EOFError, OSError) as error:
+            SocketTransport.close(self)
+            self._kill(processes)
+            raise RuntimeError("A worker failed while starting.") from error
+        except RuntimeError:
+            self._kill(processes)
+            raise
+
+    def close(self):
+        super().close()
+        for process in self._processes.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._processes = {}
+
+    @staticmethod
+    def _kill(processes):
+        """
+        Kill worker processes and wait for them to exit.
+        """
+        for process in processes:
+            process.kill()
+        for process in processes:
+            process.wait()
+
+
+def run_worker(host, port, authkey=None):
+    """
+    Run a worker that connects to a coordinator (see SocketTransport) and fits its experiments.
+
+    The worker memory-maps the predictor matrix from the path in the configuration, so the path
+    must be valid on the worker's machine.
+
+    Parameters
+    ----------
+    host : str
+        Host of the coordinator.
+    port : int
+        Port of the coordinator.
+    authkey : bytes, optional
+        Shared secret. Defaults to the environment variable TLARS_AUTHKEY (hexadecimal).
+    """
+    if authkey is None:
+        authkey = bytes.fromhex(os.environ['TLARS_AUTHKEY'])
+    connection = Client((host, port), authkey=authkey)
+    try:
+        worker = None
+        while True:
+            message = connection.recv()
+            if message[0] == 'config':
+                if 'n_threads' in message[1]:
+                    set_num_threads(message[1]['n_threads'])
+                worker = _ExperimentWorker(message[1])
+                if message[1].get('report_pid'):
+                    connection.send(os.getpid())
+            elif message[0] == 'task':
+                try:
+                    worker.run(message[1], connection.send)
+                except Exception as error:
+                    connection.send(('error', message[1]['task_id'], repr(error)))
+            else:
+                return
+    except EOFError:
+        return
+    finally:
+        connection.close()
+
+
+def run_experiments(X_path, y, seeds, T_stop, num_dummies, transport=None, intercept=False,
+                    standardize=True, type='lar', max_retries=3):
+    """
+    Run T-Rex random experiments on several workers.
+
+    Every experiment appends num_dummies Gaussian dummies, generated from its seed, to the
+    predictor matrix and is fitted until T_stop dummies are included. The workers memory-map the
+    predictor matrix from X_path and ship a compact checkpoint (see CheckpointWriter) every time
+    another dummy enters. If a worker fails, its experiment is resumed by another worker from the
+    last shipped checkpoint instead of being restarted.
+
+    Parameters
+    ----------
+    X_path : str
+        Path of the predictor matrix (without dummies) saved with numpy.save(). The path must be
+        valid on every worker.
+    y : numpy.ndarray
+        Response vector.
+    seeds : list of int
+        Seeds of the dummies, one per experiment.
+    T_stop : int
+        Number of included dummies after which the experiments are stopped.
+    num_dummies : int
+        Number of dummies per experiment.
+    transport : Transport, optional
+        Transport to the workers. Defaults to LocalTransport().
+    intercept, standardize, type
+        See TLARS.
+    max_retries : int, default=3
+        Number of times a single experiment may be resumed after worker failures.
+
+    Returns
+    -------
+    list of dict
+        One dictionary per seed with keys 'seed', 'active' (indices of the active original
+        predictors at termination), 'actions' (see TLARS.actions_) and 'resumed' (number of
+        times the experiment was resumed).
+    """
+    y = np.asarray(y, dtype=np.float64).ravel()
+    if not isinstance(X_path, (str, os.PathLike)):
+        raise ValueError("'X_path' must be the path of a predictor matrix saved with numpy.save().")
+    if not isinstance(num_dummies, (int, np.integer)) or num_dummies < 1:
+        raise ValueError("'num_dummies' must be an integer >= 1.")
+    if not isinstance(T_stop, (int, np.integer)) or not 1 <= T_stop <= num_dummies:
+        raise ValueError(f"Value of 'T_stop' not valid. 'T_stop' must be an integer from 1 to {num_dummies}.")
+    if transport is None:
+        transport = LocalTransport()
+
+    config = {'X_path': os.path.abspath(X_path), 'y': y, 'num_dummies': int(num_dummies), 'intercept': intercept,
+              'standardize': standardize, 'type': type}
+    tasks = [{'task_id': task_id, 'seed': int(seed), 'T_stop': int(T_stop), 'deltas': []}
+             for task_id, seed in enumerate(seeds)]
+    results = [None]*len(tasks)
+    pending = deque(range(len(tasks)))
+    running = {}
+    resumed = [0]*len(tasks)
+
+    transport.start(config)
+    try:
+        idle = deque(transport.workers())
+        while pending or running:
+            while pending and idle:
+                worker_id = idle.popleft()
+                task_id = pending.popleft()
+                running[worker_id] = task_id
+                transport.send(worker_id, ('task', tasks[task_id]))
+            if not running:
+                raise RuntimeError("All workers failed.")
+
+            worker_id, message = transport.recv()
+            if message is None:
+                task_id = running.pop(worker_id, None)
+                if worker_id in idle:
+                    idle.remove(worker_id)
+                if task_id is not None:
+                    resumed[task_id] += 1
+                    if resumed[task_id] > max_retries:
+                        raise RuntimeError(f"Experiment with seed {tasks[task_id]['seed']} failed {resumed[task_id]} times.")
+                    pending.appendleft(task_id)
+            elif message[0] == 'progress':
+                tasks[message[1]]['deltas'].append(message[2])
+            elif message[0] == 'result':
+                task_id = running.pop(worker_id)
+                results[task_id] = dict(message[2], seed=tasks[task_id]['seed'], resumed=resumed[task_id])
+                idle.append(worker_id)
+            else:
+                raise RuntimeError(f"Experiment with seed {tasks[message[1]]['seed']} failed: {message[2]}")
+    finally:
+        transport.close()
+    return results
+
+
+class _ExperimentWorker:
+    """
+    Fits the random experiments of a worker on its memory-mapped predictor matrix.
+
+    The predictor matrix is preprocessed once into a PreparedDesign that all experiments of the
+    worker share (see TLARS.from_design()); every experiment only stores its own dummies.
+
+    Parameters
+    ----------
+    config : dict
+        Configuration sent by run_experiments().
+    """
+
+    def __init__(self, config):
+        from . import PreparedDesign
+
+        self.design = PreparedDesign(np.load(config['X_path'], mmap_mode='r'), intercept=config['intercept'],
+                                     standardize=config['standardize'])
+        self.config = config
+
+    def run(self, task, send):
+        """
+        Fit (or resume) an experiment, sending a checkpoint whenever another dummy enters.
+
+        Parameters
+        ----------
+        task : dict
+            Task with keys 'task_id', 'seed', 'T_stop' and 'deltas' (checkpoints shipped so far).
+        send : callable
+            Function that sends a message to the coordinator.
+        """
+        from . import TLARS
+        from .tlars_cpp import tlars_cpp
+
+        config = self.config
+        n, p = self.design.shape
+        dummies = np.random.default_rng(task['seed']).standard_normal((n, config['num_dummies']))
+        model = TLARS.from_design(self.design, config['y'], dummies, type=config['type'], history='last')
+        if task['deltas']:
+            # Replay the checkpoints on the dummies only and attach the shared design again
+            state = _replay(model._model.get_all(False), task['deltas'], shared_X=self.design._design.X)
+            own_X = state['l2'].pop('X')
+            model._model = tlars_cpp(state)
+            model._model.set_shared_block(self.design._design, own_X)
+            model.n_threads = 1
+
+        # Position of the model (this also starts the log of the changes of the following steps)
+        delta = model._model.get_checkpoint_delta(2**30, 2**30)
+        since_step, since_action, since_ignored = delta['k'], len(model._model.get_actions()), delta['count_ignored']
+
+        # One fit at a time: BLAS may use the whole thread budget of the worker
+        with _parallel_region(model.n_threads):
+            while model.n_active_dummies_ < task['T_stop']:
+                model._model.execute_lars_step(model.n_active_dummies_ + 1, True)
+                delta = model._model.get_checkpoint_delta(since_step, since_action, since_ignored)
+                if delta['k'] == since_step and not delta['actions']:
+                    # The solution path ended before T_stop dummies were included
+                    break
+                since_step, since_action, since_ignored = delta['k'], since_action + len(delta['actions']), delta['count_ignored']
+                send(('progress', task['task_id'], delta))
+
+        actions = model.actions_
+        active = set()
+        for action in actions:
+            if action > 0:
+                active.add(action - 1)
+            else:
+                active.discard(-action - 1)
+        active = np.array(sorted(index for index in active if index < p), dtype=np.int64)
+        send(('result', task['task_id'], {'active': active, 'actions': actions}))
@@ -0,0 +1,137 @@
+import numpy as np
+
+
+class GramAccumulator:
+    """
+    One-pass accumulator of the sufficient statistics of a linear model.
+
+    Ingests the rows of (X, y) chunk by chunk and accumulates the uncentered
+    cross-products X'X, X'y, y'y together with the column sums and the number of
+    observations. Memory is O(p^2), independent of the number of observations, so
+    data sets that are streamed from a database, read from a memory-mapped file or
+    aggregated across sites can be fitted with TLARS.from_gram().
+
+    Dummies must be appended to the rows of X before they are passed to update(),
+    exactly as for TLARS(X, y).
+
+    Parameters
+    ----------
+    chunk_size : int, optional
+        Default number of rows that are converted to float64 and multiplied at once
+        by update(). If None, every array passed to update() is processed at once.
+    """
+
+    def __init__(self, chunk_size=None):
+        if chunk_size is not None and (not isinstance(chunk_size, (int, np.integer)) or chunk_size < 1):
+            raise ValueError("'chunk_size' must be a positive integer or None.")
+        self.chunk_size = chunk_size
+        self.n = 0
+        self.XtX = None
+        self.Xty = None
+        self.yty = 0.0
+        self.col_sums = None
+        self.y_sum = 0.0
+
+    @classmethod
+    def from_chunks(cls, chunks, chunk_size=None):
+        """
+        Accumulate the statistics of an iterable of (X_chunk, y_chunk) pairs.
+
+        Parameters
+        ----------
+        chunks : iterable
+            Iterable (e.g., a generator) yielding pairs (X_chunk, y_chunk).
+        chunk_size : int, optional
+            See GramAccumulator.
+
+        Returns
+        -------
+        GramAccumulator
+            The filled accumulator.
+        """
+        accumulator = cls(chunk_size=chunk_size)
+        for X_chunk, y_chunk in chunks:
+            accumulator.update(X_chunk, y_chunk)
+        return accumulator
+
+    def update(self, X, y):
+        """
+        Add rows to the accumulated statistics.
+
+        Parameters
+        ----------
+        X : array_like
+            Rows of the predictor matrix (e.g., a slice of a numpy.memmap).
+        y : array_like
+            Corresponding entries of the response vector.
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        y = np.asarray(y).ravel()
+        if np.ndim(X) != 2:
+            raise ValueError("'X' must be a 2-dimensional array.")
+        if X.shape[0] != len(y):
+            raise ValueError("Number of rows in X does not match length of y.")
+        if self.XtX is not None and X.shape[1] != self.XtX.shape[1]:
+            raise ValueError(f"'X' must have {self.XtX.shape[1]} columns like the previously added rows.")
+
+        if self.XtX is None:
+            p = X.shape[1]
+            self.XtX = np.zeros((p, p))
+            self.Xty = np.zeros(p)
+            self.col_sums = np.zeros(p)
+
+        step = X.shape[0] if self.chunk_size is None else self.chunk_size
+        for start in range(0, X.shape[0], max(step, 1)):
+            X_chunk = np.asarray(X[start:start + step], dtype=np.float64)
+            y_chunk = np.asarray(y[start:start + step], dtype=np.float64)
+            if np.isnan(X_chunk).any() or np.isnan(y_chunk).any():
+                raise ValueError("The data contains NaN values. Please remove or impute them before proceeding.")
+            self.XtX += X_chunk.T @ X_chunk
+            self.Xty += X_chunk.T @ y_chunk
+            self.yty += float(y_chunk @ y_chunk)
+            self.col_sums += X_chunk.sum(axis=0)
+            self.y_sum += float(y_chunk.sum())
+            self.n += X_chunk.shape[0]
+        return self
+
+    def statistics(self):
+        """
+        Get the accumulated sufficient statistics.
+
+        Returns
+        -------
+        dict
+            Dictionary with keys 'XtX', 'Xty', 'yty', 'n', 'col_sums' and 'y_sum' that
+            can be passed to TLARS.from_gram() as keyword arguments.
+        """
+        if self.XtX is None:
+            raise ValueError("No rows have been added to the accumulator.")
+        return {
+            'XtX': self.XtX,
+            'Xty': self.Xty,
+            'yty': self.yty,
+            'n': self.n,
+            'col_sums': self.col_sums,
+            'y_sum': self.y_sum
+        }
+
+    def to_tlars(self, **kwargs):
+        """
+        Create a TLARS model from the accumulated statistics.
+
+        Parameters
+        ----------
+        **kwargs
+            Further arguments passed to TLARS.from_gram() (e.g., num_dummies, intercept).
+
+        Returns
+        -------
+        TLARS
+            A TLARS object that can be fitted like one created from X and y.
+        """
+        from . import TLARS
+        return TLARS.from_gram(**self.statistics(), **kwargs)
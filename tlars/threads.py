@@ -0,0 +1,184 @@
+import os
+import threading
+import numpy as np
+from contextlib import contextmanager
+from .tlars_cpp import blas_threading_library, blas_get_num_threads, blas_set_num_threads
+
+# Total number of cores used by tlars (None: number of CPUs) and pinned number of BLAS threads (None: derived)
+_num_threads = None
+_blas_threads = None
+
+# Number of threads of the BLAS library when tlars was imported (e.g., set via OPENBLAS_NUM_THREADS)
+_blas_default = blas_get_num_threads()
+
+# Number of threads of the fits that are currently running (outer parallelism)
+_active_threads = 0
+_lock = threading.Lock()
+
+
+def get_num_threads():
+    """
+    Get the total number of cores that tlars may use.
+
+    Returns
+    -------
+    int
+        The thread budget set via set_num_threads() or the number of CPUs.
+    """
+    return _num_threads or os.cpu_count() or 1
+
+
+def thread_info():
+    """
+    Get information about the thread settings.
+
+    Returns
+    -------
+    dict
+        Dictionary with the thread budget ('num_threads'), the pinned number of BLAS threads
+        ('blas_threads', None if derived automatically), the BLAS library whose threads are
+        controlled ('blas_library', None if the linked BLAS library cannot be controlled) and its
+        current number of threads ('blas_num_threads').
+    """
+    library = blas_threading_library()
+    return {'num_threads': get_num_threads(),
+            'blas_threads': _blas_threads,
+            'blas_library': library or None,
+            'blas_num_threads': blas_get_num_threads() if library else None}
+
+
+class set_num_threads:
+    """
+    Set the total number of cores used by tlars and, optionally, the number of BLAS threads.
+
+    The budget is the default number of threads of TLARS (n_threads=None) and of the batch
+    functions. While fits run, the budget is split between the fits (outer parallelism) and the
+    threads of the BLAS library (inner parallelism): with k threads busy running fits, BLAS may
+    use budget // k threads, so concurrent fits do not oversubscribe the cores. The threads of
+    OpenBLAS and MKL builds are controlled; other BLAS libraries are left untouched.
+
+    Can be called as a function (the settings persist) or used as a context manager (the previous
+    settings are restored on exit).
+
+    Parameters
+    ----------
+    n_threads : int, optional
+        Total number of cores. If None, the number of CPUs is used.
+    blas_threads : int, optional
+        Fixed number of BLAS threads. If None, it is derived from the budget for every fit.
+
+    Examples
+    --------
+    >>> with tlars.set_num_threads(8):
+    ...     counts = subsample_selection_counts(X, y, row_sets=row_sets, num_dummies=p)
+    """
+
+    def __init__(self, n_threads=None, blas_threads=None):
+        global _num_threads, _blas_threads
+
+        for name, value in (('n_threads', n_threads), ('blas_threads', blas_threads)):
+            if value is not None and (not isinstance(value, (int, np.integer)) or value < 1):
+                raise ValueError(f"'{name}' must be an integer >= 1 or None.")
+        if n_threads is not None:
+            n_threads = int(n_threads)
+        if blas_threads is not None:
+            blas_threads = int(blas_threads)
+
+        with _lock:
+            self._previous = (_num_threads, _blas_threads, blas_get_num_threads())
+            _num_threads = n_threads
+            _blas_threads = blas_threads
+            if blas_threads is not None:
+                blas_set_num_threads(blas_threads)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _num_threads, _blas_threads
+
+        with _lock:
+            _num_threads, _blas_threads, previous_blas = self._previous
+            if previous_blas > 0:
+                blas_set_num_threads(previous_blas)
+        return False
+
+
+def _inner_threads(active_threads):
+    """
+    Get the number of BLAS threads for a given number of busy outer threads.
+
+    Parameters
+    ----------
+    active_threads : int
+        Number of threads that are running fits.
+
+    Returns
+    -------
+    int
+        Number of BLAS threads.
+    """
+    if _blas_threads is not None:
+        return _blas_threads
+    inner = max(1, get_num_threads() // max(1, active_threads))
+    if _num_threads is None and _blas_default > 0:
+        # Without an explicit budget, never exceed the BLAS setting of the environment
+        inner = min(inner, _blas_default)
+    return inner
+
+
+@contextmanager
+def _parallel_region(n_threads):
+    """
+    Register fits that run on n_threads threads and limit the BLAS threads accordingly.
+
+    Parameters
+    ----------
+    n_threads : int
+        Number of threads running fits inside the region.
+    """
+    global _active_threads
+
+    with _lock:
+        _active_threads += n_threads
+        _apply_blas_limit()
+    try:
+        yield
+    finally:
+        with _lock:
+            _active_threads -= n_threads
+            _apply_blas_limit()
+
+
+def _apply_blas_limit():
+    """
+    Set the number of BLAS threads for the currently running fits (the caller holds the lock).
+    """
+    if _blas_default <= 0:
+        return
+    if _active_threads > 0:
+        target = _inner_threads(_active_threads)
+    else:
+        target = _blas_threads or _blas_default
+    if blas_get_num_threads() != target:
+        blas_set_num_threads(target)
+
+
+def _split_threads(n_tasks, n_threads=None):
+    """
+    Split a number of threads between independent tasks and BLAS.
+
+    Parameters
+    ----------
+    n_tasks : int
+        Number of independent tasks (e.g., subsamples).
+    n_threads : int, optional
+        Total number of threads. If None, the thread budget is used.
+
+    Returns
+    -------
+    int
+        Number of threads running the tasks.
+    """
+    total = get_num_threads() if n_threads is None else n_threads
+    return max(1, min(total, n_tasks))
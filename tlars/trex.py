@@ -0,0 +1,187 @@
+import numpy as np
+from .tlars_cpp import continue_experiments as _continue_experiments
+from .tlars_cpp import occurrence_counts as _occurrence_counts
+from .design import PreparedDesign
+from .threads import _parallel_region, _split_threads
+
+
+def relative_occurrences(models, T_max=None):
+    """
+    Compute the relative occurrences of the original predictors over many T-Rex experiments.
+
+    The actions of every experiment are replayed once in the C++ backend, so experiments that
+    were fitted up to T_max included dummies yield the relative occurrences for all
+    T = 1, ..., T_max without refitting.
+
+    Parameters
+    ----------
+    models : list of TLARS
+        Fitted random experiments (same original predictors, possibly different dummies).
+    T_max : int, optional
+        Largest number of included dummies. Defaults to the largest number of included dummies
+        over all experiments.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (T_max, p) whose entry (T-1, j) is the fraction of experiments in which the
+        original predictor j is active when the T-th dummy enters. Experiments whose path ends
+        before the T-th dummy enters contribute their final active set.
+    """
+    if len(models) == 0:
+        raise ValueError("At least one experiment must be provided.")
+    if T_max is None:
+        T_max = max(model.n_active_dummies_ for model in models)
+    if not isinstance(T_max, (int, np.integer)) or T_max < 1:
+        raise ValueError("'T_max' must be an integer >= 1.")
+    if len({len(model.coef_) - model.n_dummies_ for model in models}) != 1:
+        raise ValueError("All experiments must have the same number of original predictors.")
+
+    counts = _occurrence_counts([model._model for model in models], int(T_max))
+    return np.asarray(counts, dtype=np.float64) / len(models)
+
+
+def trex_calibrate(X, y, tFDR=0.2, K=20, L_factor=None, max_L_factor=10, T_max=None,
+                   intercept=False, standardize=True, type='lar', seed=None, n_threads=None):
+    """
+    Select variables with the T-Rex selector, calibrating T and L to control the FDR.
+
+    K random experiments are created by appending L = L_factor * p Gaussian dummies to X (X is
+    preprocessed once and shared by all experiments, see TLARS.from_design). For
+    T = 1, 2, ... every experiment is warm-continued from its previous state until T dummies are
+    included (no experiment is refitted), the relative occurrences of the original predictors are
+    accumulated and the false discovery proportion (FDP) of the voting levels is estimated. T is
+    increased until the estimated FDP at the highest voting level exceeds tFDR. The number of
+    selected variables is then maximized over all (T, v) pairs whose estimated FDP does not
+    exceed tFDR.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        Real valued predictor matrix (without dummies).
+    y : numpy.ndarray
+        Response vector.
+    tFDR : float, default=0.2
+        Target false discovery rate.
+    K : int, default=20
+        Number of random experiments.
+    L_factor : int, optional
+        Number of dummies as a multiple of p. If None, L_factor is increased from 1 to
+        max_L_factor until the estimated FDP at T=1 and the highest voting level is below tFDR.
+    max_L_factor : int, default=10
+        Largest L_factor tried when L_factor is None.
+    T_max : int, optional
+        Largest number of included dummies. Defaults to ceil(n / 2) (at most L).
+    intercept, standardize, type
+        See TLARS.
+    seed : int, optional
+        Seed of the random number generator of the dummies.
+    n_threads : int, optional
+        Total number of threads. Defaults to the thread budget (see set_num_threads).
+
+    Returns
+    -------
+    dict
+        Dictionary with keys 'selected' (boolean mask of the selected original predictors),
+        'T_stop' and 'v_thresh' (calibrated number of dummies and voting level), 'L' (number of
+        dummies), 'V' (voting levels), 'fdp_hat' and 'num_selected' (estimated FDP and number of
+        selected variables for every T and voting level) and 'phi' (relative occurrences of shape
+        (number of evaluated T, p)).
+    """
+    from . import TLARS
+
+    if not isinstance(X, np.ndarray):
+        raise ValueError("'X' must be a numpy array.")
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64).ravel()
+    if X.ndim != 2 or X.shape[0] != len(y):
+        raise ValueError("Number of rows in X does not match length of y.")
+    if np.isnan(X).any() or np.isnan(y).any():
+        raise ValueError("'X' or 'y' contains NaN values. Please remove or impute them before proceeding.")
+    if not 0 < tFDR < 1:
+        raise ValueError("'tFDR' must be in the interval (0, 1).")
+    if not isinstance(K, (int, np.integer)) or K < 2:
+        raise ValueError("'K' must be an integer >= 2.")
+    if L_factor is not None and (not isinstance(L_factor, (int, np.integer)) or L_factor < 1):
+        raise ValueError("'L_factor' must be an integer >= 1 or None.")
+
+    n, p = X.shape
+    design = PreparedDesign(X, intercept=intercept, standardize=standardize)
+    rng = np.random.default_rng(seed)
+    V = 0.5 + np.arange(int(np.floor((0.5 - 1e-12) * K)) + 1) / K
+    outer = _split_threads(K, n_threads)
+
+    def continue_to(models, T):
+        with _parallel_region(outer):
+            snapshot = _continue_experiments([model._model for model in models], int(T), outer)
+        return np.asarray(snapshot).sum(axis=0) / K
+
+    # Calibrate L: the estimated FDP at T = 1 and the highest voting level must not exceed tFDR
+    for L_factor in ([L_factor] if L_factor is not None else range(1, max_L_factor + 1)):
+        L = L_factor * p
+        models = [TLARS.from_design(design, y, rng.standard_normal((n, L)), type=type, history='last')
+                  for _ in range(K)]
+        phi = [continue_to(models, 1)]
+        fdp_hat = [_fdp_hat(np.array(phi), p, L, V)]
+        if fdp_hat[0][-1] <= tFDR:
+            break
+
+    # Calibrate T: warm-continue all experiments by one dummy at a time
+    if T_max is None:
+        T_max = int(np.ceil(n / 2))
+    T_max = min(T_max, L)
+    while len(phi) < T_max and fdp_hat[-1][-1] <= tFDR:
+        phi.append(continue_to(models, len(phi) + 1))
+        fdp_hat.append(_fdp_hat(np.array(phi), p, L, V))
+
+    phi = np.array(phi)
+    fdp_hat = np.array(fdp_hat)
+    num_selected = (phi[:, :, None] > V).sum(axis=1)
+
+    # Maximize the number of selected variables subject to the FDP estimate (ties: highest v, lowest T)
+    feasible = fdp_hat <= tFDR
+    if feasible.any():
+        best = np.where(feasible, num_selected, -1)
+        T_index, v_index = max(zip(*np.nonzero(best == best.max())), key=lambda tv: (tv[1], -tv[0]))
+        selected = phi[T_index] > V[v_index]
+        T_stop, v_thresh = int(T_index) + 1, float(V[v_index])
+    else:
+        selected = np.zeros(p, dtype=bool)
+        T_stop, v_thresh = 1, float(V[-1])
+
+    return {'selected': selected, 'T_stop': T_stop, 'v_thresh': v_thresh, 'L': L, 'V': V,
+            'fdp_hat': fdp_hat, 'num_selected': num_selected, 'phi': phi}
+
+
+def _fdp_hat(phi, p, L, V):
+    """
+    Estimate the false discovery proportion of the T-Rex selector for several voting levels.
+
+    Parameters
+    ----------
+    phi : numpy.ndarray
+        Relative occurrences of shape (T, p) for T = 1, ..., T.
+    p : int
+        Number of original predictors.
+    L : int
+        Number of dummies.
+    V : numpy.ndarray
+        Voting levels.
+
+    Returns
+    -------
+    numpy.ndarray
+        Estimated FDP in [0, 1] for every voting level (variables with relative occurrence > v are
+        selected).
+    """
+    # Deflated relative occurrences: remove the expected share of null variables entering at every t
+    av_num_selected = phi.sum(axis=1)
+    delta_av = np.diff(av_num_selected, prepend=0)
+    t = np.arange(1, phi.shape[0] + 1)
+    expected_nulls = (p - av_num_selected) / (L - t + 1)
+    scale = np.where(delta_av > np.finfo(float).eps,
+                     1 - expected_nulls / np.where(delta_av > np.finfo(float).eps, delta_av, 1), 0)
+    phi_prime = np.clip(scale @ np.diff(phi, axis=0, prepend=0), 0, 1)
+
+    selected = phi[-1][:, None] > V
+    return ((1 - phi_prime)[:, None] * selected).sum(axis=0) / np.maximum(1, selected.sum(axis=0))